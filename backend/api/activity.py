@@ -0,0 +1,205 @@
+"""
+Activity feeds and customer dashboard counters.
+
+Feeds are materialised on write: an order event or chat message adds an
+ActivityItem to each affected user's feed (order_create and
+ChatConsumer.save_message call in here), and each feed is trimmed to
+ACTIVITY_FEED['MAX_ITEMS'] entries. Consecutive messages in one room within
+MERGE_MESSAGES_WITHIN seconds update a single entry instead of adding one
+per message, so a busy conversation cannot push everything else out.
+
+CustomerStats is recomputed for one customer whenever one of their orders is
+saved or deleted. The dashboard then reads that row and the newest feed
+entries: two indexed queries.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ActivityItem, CustomerStats, Order
+
+_DEFAULTS = {
+    'MAX_ITEMS': 50,                   # per user; older entries are deleted
+    'DASHBOARD_ITEMS': 5,
+    'MERGE_MESSAGES_WITHIN': 15 * 60,  # seconds
+    'ACTIVE_ORDERS_SHOWN': 3,
+}
+
+OPEN_STATUSES = ('pending', 'accepted', 'in_progress')
+# Wording and colour of open orders on the customer dashboard
+ORDER_BADGES = {
+    'pending': ('AWAITING CONFIRMATION', 'zinc'),
+    'accepted': ('ACCEPTED', 'emerald'),
+    'in_progress': ('IN PROGRESS', 'emerald'),
+}
+# Feed item kind -> icon_type the dashboard draws
+ICONS = {'message': 'message', 'order': 'check', 'payment': 'payment'}
+PREVIEW_LENGTH = 80
+
+
+def conf(name):
+    return getattr(settings, 'ACTIVITY_FEED', {}).get(name, _DEFAULTS[name])
+
+
+def display_name(user):
+    return user.get_full_name() or user.username
+
+
+def _trim(user_id):
+    stale = list(
+        ActivityItem.objects.filter(user_id=user_id)
+        .order_by('-created_at', '-id')
+        .values_list('pk', flat=True)[conf('MAX_ITEMS'):conf('MAX_ITEMS') + 100]
+    )
+    if stale:
+        ActivityItem.objects.filter(pk__in=stale).delete()
+
+
+def publish(entries, kind, group_key=''):
+    """
+    Add ``entries`` ({user_id: content}) to those users' feeds. With a
+    ``group_key``, a user's entry with the same key from the last
+    MERGE_MESSAGES_WITHIN seconds is moved to the top and rewritten instead.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        fresh = dict(entries)
+        if group_key:
+            since = now - timedelta(seconds=conf('MERGE_MESSAGES_WITHIN'))
+            for user_id, content in entries.items():
+                if ActivityItem.objects.filter(
+                    user_id=user_id, group_key=group_key, created_at__gte=since
+                ).update(content=content, created_at=now):
+                    del fresh[user_id]
+        ActivityItem.objects.bulk_create([
+            ActivityItem(user_id=user_id, kind=kind, content=content, group_key=group_key, created_at=now)
+            for user_id, content in fresh.items()
+        ])
+        for user_id in fresh:
+            _trim(user_id)
+
+
+def _quote(text):
+    text = ' '.join(text.split())
+    return text if len(text) <= PREVIEW_LENGTH else text[:PREVIEW_LENGTH].rstrip() + '...'
+
+
+def record_message(message, recipient_ids):
+    """Feed entry for each recipient of a chat message (everyone in the room but the sender)."""
+    content = f"New message from {display_name(message.sender)}: '{_quote(message.content)}'"
+    publish(
+        {user_id: content for user_id in recipient_ids if user_id != message.sender_id},
+        'message', group_key=f'room:{message.room_id}',
+    )
+
+
+def order_event_text(status, title, other_party, created=False):
+    if created:
+        return f"New Order: '{title}' with {other_party} was placed."
+    if status == 'completed':
+        return f"Order Completed: '{title}' with {other_party} was marked as complete."
+    if status == 'cancelled':
+        return f"Order Cancelled: '{title}' with {other_party} was cancelled."
+    return f"Order Update: '{title}' with {other_party} is now {dict(Order.STATUS_CHOICES)[status]}."
+
+
+def record_order_event(order, customer_name, provider_name, created=False):
+    """Feed entries for both parties of ``order`` after it was created or changed status."""
+    title = order.service.title
+    publish({
+        order.customer_id: order_event_text(order.status, title, provider_name, created),
+        order.provider_id: order_event_text(order.status, title, customer_name, created),
+    }, 'order')
+
+
+def _active_order_row(order):
+    label, colour = ORDER_BADGES[order.status]
+    provider = getattr(order.provider, 'provider_profile', None)
+    return {
+        'id': str(order.order_id),
+        'service_title': order.service.title,
+        'provider_name': provider.name if provider else display_name(order.provider),
+        'status': label,
+        'amount': str(order.price - order.discount),
+        'status_color': colour,
+    }
+
+
+def refresh_customer_stats(user_id, create=True):
+    """
+    Recompute one customer's CustomerStats row from their orders and return
+    it. With ``create=False`` only an existing row is updated.
+    """
+    orders = Order.objects.filter(customer_id=user_id)
+    totals = orders.aggregate(
+        total_investment=Sum(F('price') - F('discount'), filter=~Q(status='cancelled'), default=Decimal('0')),
+        active_projects=Count('pk', filter=Q(status__in=OPEN_STATUSES)),
+        saved_experts=Count('provider', distinct=True),
+    )
+    active = (
+        orders.filter(status__in=OPEN_STATUSES)
+        .select_related('service', 'provider__provider_profile')
+        .order_by('-created_at')[:conf('ACTIVE_ORDERS_SHOWN')]
+    )
+    values = {**totals, 'active_orders': [_active_order_row(order) for order in active]}
+    if not create:
+        CustomerStats.objects.filter(user_id=user_id).update(updated_at=timezone.now(), **values)
+        return None
+    stats, _ = CustomerStats.objects.update_or_create(user_id=user_id, defaults=values)
+    return stats
+
+
+@receiver(post_save, sender=Order)
+def _order_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_customer_stats(instance.customer_id)
+
+
+@receiver(post_delete, sender=Order)
+def _order_deleted(sender, instance, **kwargs):
+    # Never (re)create the row here: the customer may be the one being deleted.
+    refresh_customer_stats(instance.customer_id, create=False)
+
+
+def time_ago(moment, now=None):
+    """Short relative time for the dashboard: "JUST NOW", "12M AGO", "2H AGO", "YESTERDAY", "3D AGO"."""
+    seconds = ((now or timezone.now()) - moment).total_seconds()
+    if seconds < 60:
+        return "JUST NOW"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}M AGO"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}H AGO"
+    if seconds < 2 * 86400:
+        return "YESTERDAY"
+    return f"{int(seconds // 86400)}D AGO"
+
+
+def recent_activity(user_id, limit=None):
+    now = timezone.now()
+    items = (
+        ActivityItem.objects.filter(user_id=user_id)
+        .order_by('-created_at')
+        .values('id', 'kind', 'content', 'created_at')[:limit or conf('DASHBOARD_ITEMS')]
+    )
+    return [
+        {
+            'id': str(item['id']),
+            'type': item['kind'],
+            'content': item['content'],
+            'time_ago': time_ago(item['created_at'], now),
+            'icon_type': ICONS[item['kind']],
+        }
+        for item in items
+    ]
+
+
+def customer_stats(user_id):
+    """The customer's stats row, computed now if none was written yet."""
+    return CustomerStats.objects.filter(user_id=user_id).first() or refresh_customer_stats(user_id)
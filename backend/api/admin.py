@@ -1,5 +1,5 @@
 from django.contrib import admin
-from api.models import Provider, Customer, Tag, Service, ServiceMedia, ServiceCredential, UserPreference, Order
+from api.models import Provider, Customer, Tag, Service, ServiceMedia, ServiceCredential, UserPreference, Order, ChunkedUpload, StoredBlob, ProviderStats, ProviderDailyStats, CustomerStats, ActivityItem
 # Register your models here.
 
 admin.site.register(Provider)
@@ -9,4 +9,11 @@ admin.site.register(Service)
 admin.site.register(ServiceMedia)
 admin.site.register(ServiceCredential)
 admin.site.register(UserPreference)
-admin.site.register(Order)
\ No newline at end of file
+admin.site.register(Order)
+admin.site.register(ChunkedUpload)
+
+admin.site.register(StoredBlob)
+admin.site.register(ProviderStats)
+admin.site.register(ProviderDailyStats)
+admin.site.register(CustomerStats)
+admin.site.register(ActivityItem)
@@ -2,4 +2,11 @@ from django.apps import AppConfig
 
 
 class ApiConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Connect the search index, catalog cache, provider stats, activity and token cache signal handlers.
+        from . import search, catalog_cache, provider_stats, activity, authentication  # noqa: F401
+        from .storage import connect_signals
+        connect_signals()
@@ -0,0 +1,160 @@
+"""
+Cached token -> user resolution shared by DRF views and the chat WebSocket.
+
+Lookups go through two tiers:
+  1. an in-process dict with a short TTL (no I/O at all on a hit)
+  2. the TOKEN_AUTH_CACHE['CACHE_ALIAS'] cache, which must be shared
+     between workers (Redis in core/settings.py)
+and only fall through to the database on a miss in both. An unreachable
+shared cache counts as a miss.
+
+Deleting a Token (logout, admin, shell) invalidates both tiers of the current
+process and the shared tier; other processes drop their local copy once the
+short local TTL expires.
+
+Each lookup returns its own User instance: attributes a request sets on
+request.user never reach later requests.
+"""
+import copy
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+_DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'LOCAL_TTL': 5,       # seconds a process trusts its own copy
+    'SHARED_TTL': 300,    # seconds the shared cache keeps a token
+    'LOCAL_MAX_ENTRIES': 10000,
+}
+
+logger = logging.getLogger(__name__)
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def _conf(name):
+    return getattr(settings, 'TOKEN_AUTH_CACHE', {}).get(name, _DEFAULTS[name])
+
+
+def _shared_key(key):
+    return f'auth:token:{key}'
+
+
+def _fresh_copy(user):
+    """A copy of ``user`` without related rows cached on it (those would go stale)."""
+    user = copy.copy(user)
+    user._state = copy.copy(user._state)
+    user._state.fields_cache = {}
+    return user
+
+
+def _shared_get(key):
+    try:
+        return caches[_conf('CACHE_ALIAS')].get(_shared_key(key))
+    except Exception:
+        logger.warning("Token cache unavailable, reading token from the database", exc_info=True)
+        return None
+
+
+def _shared_set(key, user):
+    try:
+        caches[_conf('CACHE_ALIAS')].set(_shared_key(key), user, _conf('SHARED_TTL'))
+    except Exception:
+        logger.warning("Token cache unavailable, token not cached", exc_info=True)
+
+
+def _local_get(key):
+    entry = _local.get(key)
+    if entry is None:
+        return None
+    expires_at, user = entry
+    if expires_at < time.monotonic():
+        with _local_lock:
+            _local.pop(key, None)
+        return None
+    return _fresh_copy(user)
+
+
+def _local_set(key, user):
+    with _local_lock:
+        if len(_local) >= _conf('LOCAL_MAX_ENTRIES'):
+            _local.clear()
+        _local[key] = (time.monotonic() + _conf('LOCAL_TTL'), _fresh_copy(user))
+
+
+def get_user_for_token(key):
+    """Return the active User owning token ``key``, or None."""
+    if not key:
+        return None
+
+    user = _local_get(key)
+    if user is not None:
+        return user
+
+    user = _shared_get(key)
+    if user is None:
+        try:
+            user = Token.objects.select_related('user').get(key=key).user
+        except Token.DoesNotExist:
+            return None
+        _shared_set(key, user)
+
+    if not user.is_active:
+        return None
+    _local_set(key, user)
+    return user
+
+
+def prime_token(key, user):
+    """Seed both tiers with a freshly issued/fetched token (e.g. on login)."""
+    # Cache the bare user, as the database path does: related rows loaded
+    # alongside it (profiles, preferences) would go stale in the cache.
+    user = _fresh_copy(user)
+    _shared_set(key, user)
+    _local_set(key, user)
+
+
+def invalidate_token(key):
+    """Drop a token from both cache tiers."""
+    with _local_lock:
+        _local.pop(key, None)
+    try:
+        caches[_conf('CACHE_ALIAS')].delete(_shared_key(key))
+    except Exception:
+        # The entry outlives the token by at most SHARED_TTL.
+        logger.exception("Could not drop deleted token from the shared cache")
+
+
+@receiver(post_delete, sender=Token)
+def _token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def _user_saved(sender, instance, raw=False, **kwargs):
+    # A deactivated user's cached token would keep working until the TTLs ran out.
+    if not raw and not instance.is_active:
+        for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+            invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in replacement for DRF's TokenAuthentication backed by the token cache."""
+
+    def authenticate_credentials(self, key):
+        user = get_user_for_token(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        # DRF exposes the token as request.auth; nothing in the app reads it,
+        # so hand back the key instead of paying for a Token fetch.
+        return (user, key)
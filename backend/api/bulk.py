@@ -0,0 +1,199 @@
+"""
+Bulk service import and export for providers.
+
+Both directions stream: uploads are read row by row, validated with
+ServiceCreateSerializer and inserted in chunks (one transaction and a
+handful of batched statements per chunk, see ingest.create_services_bulk);
+exports are generated from a chunked queryset iterator. Row formats are
+NDJSON (one JSON object per line) and CSV with a header line, using the
+same field names as ``services/create/``. Tags are a JSON list, or in CSV
+either a JSON list or ``|``-separated names.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+
+from .ingest import create_services_bulk
+from .models import Service
+from .serializers import ServiceCreateSerializer
+
+_DEFAULTS = {
+    'CHUNK_SIZE': 500,     # rows validated and inserted per transaction
+    'MAX_ROWS': 20000,     # rows accepted per upload
+    'MAX_ERRORS': 100,     # per-row errors reported back
+}
+
+FORMATS = ('ndjson', 'csv')
+EXPORT_FIELDS = (
+    'id', 'service_title', 'service_description', 'service_type',
+    'price_min', 'price_max', 'tags', 'verification_status', 'is_active',
+)
+
+
+def conf(name):
+    return getattr(settings, 'SERVICE_BULK', {}).get(name, _DEFAULTS[name])
+
+
+class BulkFormatError(ValueError):
+    """The upload cannot be read as the requested format at all."""
+
+
+def detect_format(upload, requested=None):
+    """Pick the row format from an explicit ``requested`` value, else the file name."""
+    if requested:
+        return requested if requested in FORMATS else None
+    name = (getattr(upload, 'name', '') or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    return None
+
+
+def _parse_tags(raw):
+    if isinstance(raw, list):
+        return raw
+    raw = (raw or '').strip()
+    if not raw:
+        return []
+    if raw.startswith('['):
+        try:
+            tags = json.loads(raw)
+        except json.JSONDecodeError:
+            return []
+        return tags if isinstance(tags, list) else []
+    return raw.split('|')
+
+
+def _iter_ndjson(upload):
+    for line_no, line in enumerate(upload, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            yield line_no, None, {'non_field_errors': ['Invalid JSON.']}
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, {'non_field_errors': ['Expected a JSON object.']}
+            continue
+        yield line_no, row, None
+
+
+def _iter_csv(upload):
+    text = io.TextIOWrapper(getattr(upload, 'file', upload), encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.DictReader(text)
+        if not reader.fieldnames:
+            raise BulkFormatError('CSV upload has no header line.')
+        for row in reader:
+            # line_num counts physical lines, so quoted newlines are reported correctly
+            yield reader.line_num, row, None
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise BulkFormatError(f'Unreadable CSV: {exc}') from exc
+    finally:
+        text.detach()
+
+
+def iter_rows(upload, fmt):
+    """Yield (line number, raw row dict or None, parse errors or None)."""
+    return _iter_csv(upload) if fmt == 'csv' else _iter_ndjson(upload)
+
+
+def _validate(row):
+    data = dict(row)
+    tags = _parse_tags(data.get('tags'))
+    # ServiceCreateSerializer takes tags as the JSON string the frontend sends.
+    data['tags'] = json.dumps(tags)
+    serializer = ServiceCreateSerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    validated = dict(serializer.validated_data)
+    validated['tags'] = tags
+    return validated, None
+
+
+def import_services(provider, upload, fmt):
+    """
+    Validate and insert every row of ``upload`` as a new service (an ``id``
+    column from an export is ignored). Valid rows are committed chunk by chunk
+    even if other rows fail. Returns a summary dict with ``created``,
+    ``failed``, up to MAX_ERRORS ``errors`` ({line, errors}) and ``detail``
+    when the upload stopped being readable part-way.
+    """
+    chunk_size = conf('CHUNK_SIZE')
+    max_rows = conf('MAX_ROWS')
+    max_errors = conf('MAX_ERRORS')
+    summary = {'created': 0, 'failed': 0, 'errors': [], 'truncated': False}
+    chunk = []
+
+    def flush():
+        if chunk:
+            summary['created'] += len(create_services_bulk(provider, chunk))
+            chunk.clear()
+
+    seen = 0
+    try:
+        for line_no, row, errors in iter_rows(upload, fmt):
+            seen += 1
+            if seen > max_rows:
+                summary['truncated'] = True
+                break
+            if errors is None:
+                validated, errors = _validate(row)
+            if errors is not None:
+                summary['failed'] += 1
+                if len(summary['errors']) < max_errors:
+                    summary['errors'].append({'line': line_no, 'errors': errors})
+                continue
+            chunk.append(validated)
+            if len(chunk) >= chunk_size:
+                flush()
+    except BulkFormatError as exc:
+        # Rows before the unreadable point are still imported.
+        summary['detail'] = str(exc)
+    flush()
+    return summary
+
+
+def _export_rows(provider):
+    queryset = (
+        Service.objects.filter(provider=provider)
+        .order_by('created_at')
+        .prefetch_related('tags')
+    )
+    for service in queryset.iterator(chunk_size=conf('CHUNK_SIZE')):
+        yield {
+            'id': str(service.uuid),
+            'service_title': service.title,
+            'service_description': service.description,
+            'service_type': service.service_type,
+            'price_min': str(service.price_min),
+            'price_max': str(service.price_max),
+            'tags': [tag.name for tag in service.tags.all()],
+            'verification_status': service.verification_status,
+            'is_active': service.is_active,
+        }
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer streaming."""
+
+    def write(self, value):
+        return value
+
+
+def export_services(provider, fmt):
+    """Yield the provider's services as NDJSON lines or CSV rows (header first)."""
+    if fmt == 'csv':
+        writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+        yield writer.writerow(dict(zip(EXPORT_FIELDS, EXPORT_FIELDS)))
+        for row in _export_rows(provider):
+            row['tags'] = '|'.join(row['tags'])
+            yield writer.writerow(row)
+    else:
+        for row in _export_rows(provider):
+            yield json.dumps(row) + '\n'
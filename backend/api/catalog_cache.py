@@ -0,0 +1,111 @@
+"""
+Catalog generation counter and pre-rendered discovery sections.
+
+Any write that can change what a service listing shows (Service, its media or
+tags, the owning Provider) bumps a single generation number in the shared
+cache, so every worker sees it at once. Rendered JSON for the
+customer-independent discover sections is stored under that generation, so
+invalidation is one counter increment and stale entries simply age out.
+
+The counter starts from the nanosecond clock, also when it has to be
+recreated after an eviction: a generation is never handed out twice, so old
+sections and ETags cannot become valid again. While the cache is unreachable
+every request gets a fresh generation (no reuse, no 304s).
+"""
+import hashlib
+import logging
+import time
+
+from django.core.cache import caches
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Provider, Service, ServiceMedia
+
+_DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 60 * 60,
+}
+
+GENERATION_KEY = 'catalog:generation'
+
+logger = logging.getLogger(__name__)
+
+
+def conf(name):
+    return getattr(settings, 'CATALOG_CACHE', {}).get(name, _DEFAULTS[name])
+
+
+def _cache():
+    return caches[conf('CACHE_ALIAS')]
+
+
+def _new_generation():
+    # Above any earlier value: those are an earlier clock reading plus one
+    # per bump, and bumps never outpace nanoseconds.
+    return time.time_ns()
+
+
+def catalog_generation():
+    try:
+        generation = _cache().get(GENERATION_KEY)
+        if generation is None:
+            # add() so concurrent first readers agree on the starting value
+            _cache().add(GENERATION_KEY, _new_generation(), None)
+            generation = _cache().get(GENERATION_KEY)
+    except Exception:
+        logger.warning("Catalog cache unavailable", exc_info=True)
+        generation = None
+    return generation if generation is not None else _new_generation()
+
+
+def bump_catalog_generation():
+    try:
+        try:
+            _cache().incr(GENERATION_KEY)
+        except ValueError:
+            # Evicted: start again above every generation handed out so far.
+            _cache().add(GENERATION_KEY, _new_generation(), None)
+    except Exception:
+        logger.exception("Could not bump the catalog generation")
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=ServiceMedia)
+@receiver(post_delete, sender=ServiceMedia)
+@receiver(post_save, sender=Provider)
+@receiver(m2m_changed, sender=Service.tags.through)
+def _catalog_changed(sender, raw=False, action=None, **kwargs):
+    if raw or (action and action.startswith('pre_')):
+        return
+    # After commit, so nobody renders and caches a half-written catalog under the new generation.
+    transaction.on_commit(bump_catalog_generation)
+
+
+def _section_key(generation, base_url):
+    digest = hashlib.sha1(base_url.encode()).hexdigest()[:16]
+    return f'catalog:discover:{generation}:{digest}'
+
+
+def get_sections(generation, base_url, render):
+    """Return pre-rendered bytes for ``generation`` / ``base_url``, calling ``render()`` on a miss."""
+    key = _section_key(generation, base_url)
+    try:
+        body = _cache().get(key)
+    except Exception:
+        logger.warning("Catalog cache unavailable", exc_info=True)
+        return render()
+    if body is None:
+        body = render()
+        try:
+            _cache().set(key, body, conf('TIMEOUT'))
+        except Exception:
+            logger.warning("Catalog cache unavailable", exc_info=True)
+    return body
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.sha1(':'.join(str(p) for p in parts).encode()).hexdigest()
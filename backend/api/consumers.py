@@ -20,9 +20,14 @@ import logging
 import os
 import tempfile
 import traceback
+from urllib.parse import parse_qs
 
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from .authentication import get_user_for_token
+from .orders import user_group
+
 logger = logging.getLogger("onboarding")
 logger.setLevel(logging.DEBUG)
 if not logger.handlers:
@@ -226,3 +231,30 @@ class TranscribeConsumer(AsyncWebsocketConsumer):
         result = extract_profile(transcript, previous_fields or None)
         logger.info("  [LLM] done — fields=%s missing=%s", list(result.get("fields", {}).keys()), result.get("missing", []))
         return result
+
+
+class OrderEventsConsumer(AsyncWebsocketConsumer):
+    """
+    Pushes the authenticated user's order transitions (api/orders.py).
+
+    Connect with ?token=<auth token>. Server → client only:
+      {"type": "order", "order_id": "...", "status": "...", "previous_status": "...",
+       "version": 3, "updated_at": "..."}
+    """
+
+    async def connect(self):
+        token_key = parse_qs(self.scope['query_string'].decode()).get('token', [None])[0]
+        user = await database_sync_to_async(get_user_for_token)(token_key) if token_key else None
+        if user is None:
+            await self.close()
+            return
+        self.group_name = user_group(user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def order_event(self, event):
+        await self.send(text_data=json.dumps({**event, 'type': 'order'}))
@@ -0,0 +1,87 @@
+"""
+Faceted filtering for the customer discovery listing.
+
+Facet counts are "disjunctive": each facet is counted with every *other*
+active filter applied, so picking "remote" still shows how many "visit"
+services there are. All fixed-value facets (service type, verification,
+price bucket) come from a single conditional-aggregate query; the open-ended
+location facet is one grouped query limited to the top values.
+"""
+from django.db.models import Count, Q
+
+PRICE_BUCKETS = [
+    # (key, lowest price_min included, upper bound exclusive or None)
+    ('under_500', 0, 500),
+    ('500_2000', 500, 2000),
+    ('2000_10000', 2000, 10000),
+    ('10000_plus', 10000, None),
+]
+LOCATION_FACET_SIZE = 10
+
+
+def _bucket_q(key):
+    for bucket, low, high in PRICE_BUCKETS:
+        if bucket == key:
+            q = Q(price_min__gte=low)
+            return q & Q(price_min__lt=high) if high is not None else q
+    return Q()
+
+
+def build_filters(params):
+    """Map validated query params to one Q per facet (empty Q when unused)."""
+    price = Q()
+    if params.get('min_price') is not None:
+        price &= Q(price_max__gte=params['min_price'])
+    if params.get('max_price') is not None:
+        price &= Q(price_min__lte=params['max_price'])
+    if params.get('price_bucket'):
+        price &= _bucket_q(params['price_bucket'])
+    return {
+        'service_type': Q(service_type=params['service_type']) if params.get('service_type') else Q(),
+        'verification_status': (
+            Q(verification_status=params['verification_status'])
+            if params.get('verification_status') else Q()
+        ),
+        'price': price,
+        'location': Q(provider__location=params['location']) if params.get('location') else Q(),
+    }
+
+
+def _all_except(filters, facet):
+    q = Q()
+    for name, facet_q in filters.items():
+        if name != facet:
+            q &= facet_q
+    return q
+
+
+def facet_counts(queryset, filters, service_types, verification_statuses):
+    """Return {facet: {value: count}} for ``queryset`` (already scoped to active services)."""
+    aggregates = {}
+    for value, _ in service_types:
+        aggregates[f'service_type:{value}'] = Count(
+            'uuid', filter=Q(service_type=value) & _all_except(filters, 'service_type')
+        )
+    for value, _ in verification_statuses:
+        aggregates[f'verification_status:{value}'] = Count(
+            'uuid', filter=Q(verification_status=value) & _all_except(filters, 'verification_status')
+        )
+    for bucket, _, _ in PRICE_BUCKETS:
+        aggregates[f'price_bucket:{bucket}'] = Count(
+            'uuid', filter=_bucket_q(bucket) & _all_except(filters, 'price')
+        )
+
+    counts = {'service_type': {}, 'verification_status': {}, 'price_bucket': {}}
+    for key, value in queryset.aggregate(**aggregates).items():
+        facet, facet_value = key.split(':', 1)
+        counts[facet][facet_value] = value
+
+    locations = (
+        queryset.filter(_all_except(filters, 'location'))
+        .exclude(provider__location='')
+        .values('provider__location')
+        .annotate(count=Count('uuid'))
+        .order_by('-count', 'provider__location')[:LOCATION_FACET_SIZE]
+    )
+    counts['location'] = {row['provider__location']: row['count'] for row in locations}
+    return counts
@@ -0,0 +1,146 @@
+"""
+Resized image variants for listings.
+
+Uploaded service images and provider profile pictures are stored as sent.
+After the upload commits, a background job (api/tasks.py) renders each one at
+the IMAGE_VARIANTS['SIZES'] widths as WebP and JPEG, next to the original
+under ``variants/``, and records the stored names on the row:
+
+    {"thumb": {"width": 160, "webp": "<name>", "jpeg": "<name>"}, "card": {...}, ...}
+
+Until that has happened ``variants`` is empty and serializers fall back to
+the original file. Re-rendering releases the previous variants' stored
+files (api/storage.py). Legal ID photos are never listed and get no variants.
+"""
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from .catalog_cache import bump_catalog_generation
+from .models import Provider, ServiceMedia
+from .storage import release_files, variant_names
+from .tasks import run_in_background
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS = {
+    'SIZES': {'thumb': 160, 'card': 480, 'full': 1280},  # label -> max width in px
+    'WEBP_QUALITY': 80,
+    'JPEG_QUALITY': 82,
+}
+
+
+def conf(name):
+    return getattr(settings, 'IMAGE_VARIANTS', {}).get(name, _DEFAULTS[name])
+
+
+def _variant_name(name, label, ext):
+    # Keyed on the full original file name (unique in its directory), so
+    # "a.jpg" and "a.png" never share variants.
+    directory, filename = os.path.split(name)
+    stem, original_ext = os.path.splitext(filename)
+    return os.path.join(directory, 'variants', f"{stem}{original_ext.replace('.', '_')}_{label}.{ext}")
+
+
+def generate_variants(field_file):
+    """Render and store every configured variant of ``field_file``. Returns the variants dict."""
+    from PIL import Image, ImageOps
+
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    if image.mode not in ('RGB', 'L'):
+        # Flatten transparency onto white for JPEG; WebP gets the same pixels.
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+
+    variants = {}
+    for label, max_width in sorted(conf('SIZES').items(), key=lambda item: item[1]):
+        resized = image.copy()
+        if resized.width > max_width:
+            height = max(1, round(resized.height * max_width / resized.width))
+            resized = resized.resize((max_width, height), Image.LANCZOS)
+        entry = {'width': resized.width}
+        for ext, fmt, options in (
+            ('webp', 'WEBP', {'quality': conf('WEBP_QUALITY'), 'method': 4}),
+            ('jpeg', 'JPEG', {'quality': conf('JPEG_QUALITY'), 'optimize': True, 'progressive': True}),
+        ):
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt, **options)
+            name = _variant_name(field_file.name, label, ext)
+            entry[ext] = storage.save(name, ContentFile(buffer.getvalue()))
+        variants[label] = entry
+    return variants
+
+
+def _replace_variants(queryset, field, variants):
+    """Store ``variants`` on the row and release the ones it replaces."""
+    with transaction.atomic():
+        # Locked, so concurrent renders of one row each release what they replaced.
+        previous = queryset.select_for_update().values_list(field, flat=True).first()
+        # update() so the variant write does not look like a new upload
+        queryset.update(**{field: variants})
+        release_files(*variant_names(previous))
+
+
+def process_service_media(media_ids):
+    changed = False
+    for media in ServiceMedia.objects.filter(pk__in=media_ids).only('id', 'image'):
+        try:
+            variants = generate_variants(media.image)
+        except Exception:
+            logger.exception("Could not render variants for service media %s", media.pk)
+            continue
+        _replace_variants(ServiceMedia.objects.filter(pk=media.pk), 'variants', variants)
+        changed = True
+    if changed:
+        bump_catalog_generation()
+
+
+def process_provider_picture(provider_id):
+    provider = Provider.objects.filter(pk=provider_id).only('uuid', 'profile_picture').first()
+    if provider is None or not provider.profile_picture:
+        return
+    variants = generate_variants(provider.profile_picture)
+    _replace_variants(Provider.objects.filter(pk=provider_id), 'profile_picture_variants', variants)
+    bump_catalog_generation()
+
+
+def schedule_service_media(media_ids):
+    """Render variants for ``media_ids`` in the background once the current transaction commits."""
+    media_ids = [str(pk) for pk in media_ids]
+    if media_ids:
+        transaction.on_commit(lambda: run_in_background(process_service_media, media_ids))
+
+
+def schedule_provider_picture(provider_id):
+    transaction.on_commit(lambda: run_in_background(
+        process_provider_picture, provider_id, key=f'images:provider:{provider_id}'
+    ))
+
+
+def srcset(variants, urls, fallback_url):
+    """
+    Responsive image description for a serializer: ``src`` (card JPEG, or the
+    original until variants exist), ``srcset`` (WebP) and ``jpeg_srcset``.
+    """
+    if not variants:
+        return {'src': fallback_url, 'srcset': '', 'jpeg_srcset': ''}
+    # Originals narrower than a size yield same-width variants; list each width once.
+    by_width = {}
+    for entry in variants.values():
+        by_width.setdefault(entry['width'], entry)
+    ordered = [by_width[width] for width in sorted(by_width)]
+    card = variants.get('card') or ordered[-1]
+    return {
+        'src': urls.url(card['jpeg']),
+        'srcset': ', '.join(f"{urls.url(entry['webp'])} {entry['width']}w" for entry in ordered),
+        'jpeg_srcset': ', '.join(f"{urls.url(entry['jpeg'])} {entry['width']}w" for entry in ordered),
+    }
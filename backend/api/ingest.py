@@ -0,0 +1,137 @@
+"""
+Batched service ingestion.
+
+Creating a service costs a fixed number of queries regardless of how many
+tags, images or certificates it carries: tags are normalised once, upserted
+with one INSERT ... ON CONFLICT DO NOTHING, read back with one SELECT and
+attached with one through-table insert; media and credential rows are bulk
+inserted. Everything runs in one transaction.
+"""
+from django.db import transaction
+
+from .models import ChunkedUpload, Service, ServiceCredential, ServiceMedia, ServiceSearchDocument, Tag
+from .catalog_cache import bump_catalog_generation
+from .images import schedule_service_media
+from .storage import deferred_blob_refs
+from .uploads import claim_uploads
+
+TAG_MAX_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def normalize_tags(raw_tags):
+    """Lower-case, trim and de-duplicate tag names, keeping first-seen order."""
+    names = []
+    seen = set()
+    for raw in raw_tags or []:
+        if not isinstance(raw, str):
+            continue
+        name = raw.strip().lower()[:TAG_MAX_LENGTH]
+        if name and name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def upsert_tags(names):
+    """Ensure every (normalised) tag exists. Returns {name: tag id}."""
+    if not names:
+        return {}
+    # Tag.save() lower-cases names; bulk_create bypasses it, hence normalize_tags().
+    Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+    return dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+
+
+def attach_tags(service_tag_ids):
+    """Bulk insert (service_id, tag_id) pairs into the Service.tags through table."""
+    through = Service.tags.through
+    through.objects.bulk_create(
+        [through(service_id=service_id, tag_id=tag_id) for service_id, tag_id in service_tag_ids],
+        ignore_conflicts=True,
+    )
+
+
+def create_service(provider, title, description, service_type, price_min, price_max,
+                   tags=(), images=(), certifications=(), image_upload_ids=(), credential_upload_ids=()):
+    """
+    Create a Service with its tags, images and credentials atomically.
+    ``images``/``certifications`` are uploaded files; the ``*_upload_ids``
+    name completed chunked uploads (api/uploads.py), already in storage.
+    """
+    tag_names = normalize_tags(tags)
+    with transaction.atomic():
+        image_uploads, credential_uploads = claim_uploads(
+            provider.user, image_upload_ids, credential_upload_ids
+        )
+        service = Service.objects.create(
+            provider=provider,
+            title=title,
+            description=description,
+            service_type=service_type,
+            price_min=price_min,
+            price_max=price_max,
+        )
+        tag_ids = upsert_tags(tag_names)
+        attach_tags((service.pk, tag_ids[name]) for name in tag_names)
+        # One statement for the blob references of every file saved here.
+        with deferred_blob_refs():
+            media = ServiceMedia.objects.bulk_create([
+                ServiceMedia(service=service, image=image, position=position)
+                for position, image in enumerate(
+                    list(images) + [upload.file.name for upload in image_uploads]
+                )
+            ])
+            schedule_service_media([item.pk for item in media])
+            ServiceCredential.objects.bulk_create([
+                ServiceCredential(service=service, file=file, name=name, position=position)
+                for position, (file, name) in enumerate(
+                    [(cert, cert.name) for cert in certifications]
+                    + [(upload.file.name, upload.filename) for upload in credential_uploads]
+                )
+            ])
+        if image_uploads or credential_uploads:
+            # The stored file's reference moves from the upload to the new row.
+            ChunkedUpload.objects.filter(
+                pk__in=[upload.pk for upload in image_uploads + credential_uploads]
+            ).update(status='consumed', file='')
+    return service
+
+
+def create_services_bulk(provider, rows):
+    """
+    Insert many validated services (ServiceCreateSerializer.validated_data
+    dicts with ``tags`` already parsed to a list) in one transaction with a
+    handful of batched statements. Returns the created Service objects.
+    """
+    services = []
+    tag_names_per_service = []
+    for row in rows:
+        services.append(Service(
+            provider=provider,
+            title=row['service_title'],
+            description=row['service_description'],
+            service_type=row['service_type'],
+            price_min=row['price_min'],
+            price_max=row['price_max'],
+        ))
+        tag_names_per_service.append(normalize_tags(row.get('tags')))
+
+    with transaction.atomic():
+        # bulk_create skips Service.save()/full_clean(); the serializer has
+        # already enforced the same price rule.
+        Service.objects.bulk_create(services, batch_size=500)
+        tag_ids = upsert_tags(sorted({name for names in tag_names_per_service for name in names}))
+        attach_tags(
+            (service.pk, tag_ids[name])
+            for service, names in zip(services, tag_names_per_service)
+            for name in names
+        )
+        # No post_save signals fire for bulk inserts: index and invalidate here.
+        ServiceSearchDocument.objects.bulk_create([
+            ServiceSearchDocument(
+                service=service, title=service.title,
+                description=service.description, tags=' '.join(names),
+            )
+            for service, names in zip(services, tag_names_per_service)
+        ], batch_size=500)
+        transaction.on_commit(bump_catalog_generation)
+    return services
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.uploads import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete chunked uploads that expired before being attached to a service."
+
+    def handle(self, *args, **options):
+        removed = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired uploads."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.storage import rebuild_refcounts
+
+
+class Command(BaseCommand):
+    help = "Recount content-addressed media references from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete-unreferenced', action='store_true',
+            help="Also remove blobs that nothing refers to, with their files.",
+        )
+
+    def handle(self, *args, **options):
+        updated, created, removed = rebuild_refcounts(options['delete_unreferenced'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {updated}, created {created} and removed {removed} blob records."
+        ))
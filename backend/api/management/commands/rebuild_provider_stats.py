@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.provider_stats import rebuild_provider_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute provider dashboard statistics from the orders."
+
+    def handle(self, *args, **options):
+        providers = rebuild_provider_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt statistics for {providers} providers."))
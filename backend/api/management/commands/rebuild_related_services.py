@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.related import conf, rebuild_related
+
+
+class Command(BaseCommand):
+    help = "Rebuild the tag-similarity related-services lists (requires numpy and scipy)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None,
+                            help=f"Related services kept per service (default {conf('TOP_K')}).")
+
+    def handle(self, *args, **options):
+        written = rebuild_related(options['top_k'])
+        self.stdout.write(self.style.SUCCESS(f"Stored related services for {written} services."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.recommendations import refresh_all
+
+
+class Command(BaseCommand):
+    help = "Recompute the popular segment and every customer's recommendation list."
+
+    def handle(self, *args, **options):
+        written = refresh_all()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {written} recommendation lists."))
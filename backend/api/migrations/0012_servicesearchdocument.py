@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# FTS5 external-content index over api_servicesearchdocument, kept in sync by
+# triggers. SQLite only; other databases use the ORM fallback in api/search.py.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS api_service_fts USING fts5(
+        title,
+        description,
+        tags,
+        content='api_servicesearchdocument',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_service_fts_ai AFTER INSERT ON api_servicesearchdocument BEGIN
+        INSERT INTO api_service_fts(rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_service_fts_ad AFTER DELETE ON api_servicesearchdocument BEGIN
+        INSERT INTO api_service_fts(api_service_fts, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_service_fts_au AFTER UPDATE ON api_servicesearchdocument BEGIN
+        INSERT INTO api_service_fts(api_service_fts, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+        INSERT INTO api_service_fts(rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+    END
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS api_service_fts_ai',
+    'DROP TRIGGER IF EXISTS api_service_fts_ad',
+    'DROP TRIGGER IF EXISTS api_service_fts_au',
+    'DROP TABLE IF EXISTS api_service_fts',
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SQL:
+        schema_editor.execute(statement)
+
+
+def backfill_documents(apps, schema_editor):
+    Service = apps.get_model('api', 'Service')
+    ServiceSearchDocument = apps.get_model('api', 'ServiceSearchDocument')
+    documents = [
+        ServiceSearchDocument(
+            service=service,
+            title=service.title,
+            description=service.description,
+            tags=' '.join(tag.name for tag in service.tags.all()),
+        )
+        for service in Service.objects.prefetch_related('tags').iterator(chunk_size=500)
+    ]
+    ServiceSearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_alter_userpreference_id_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('tags', models.TextField(blank=True, default='')),
+                ('service', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='api.service')),
+            ],
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
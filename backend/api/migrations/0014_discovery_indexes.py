@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_recommendationlist'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='provider',
+            name='location',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['is_active', '-created_at'], name='api_service_is_acti_b29347_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['is_active', 'verification_status', '-created_at'], name='api_service_is_acti_afaced_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['is_active', 'service_type', 'verification_status', '-created_at'], name='api_service_is_acti_f19959_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['is_active', 'price_min'], name='api_service_is_acti_d91afb_idx'),
+        ),
+    ]
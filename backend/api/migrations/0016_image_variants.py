@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_provider_services_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='provider',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='servicemedia',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_order_list_indexes'),
+        ('chat', '0004_messagearchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='room',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='chat.room'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_order_lifecycle'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        # views.login looks users up by email, which auth.User does not index.
+        migrations.RunSQL(
+            'CREATE INDEX auth_user_email_idx ON auth_user (email);',
+            'DROP INDEX auth_user_email_idx;',
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_auth_user_email_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='servicecredential',
+            options={'ordering': ['position', 'id']},
+        ),
+        migrations.AlterModelOptions(
+            name='servicemedia',
+            options={'ordering': ['position', 'id']},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ['name']},
+        ),
+        migrations.AddField(
+            model_name='servicecredential',
+            name='position',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='servicemedia',
+            name='position',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
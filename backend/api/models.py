@@ -5,6 +5,7 @@ from uuid import uuid4
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.db.models.signals import post_save
@@ -32,11 +33,12 @@ class Provider(models.Model):
     name = models.CharField(max_length=255)
     age = models.IntegerField(null=True, blank=True)
     gender = models.CharField(max_length=10, blank=True, default='')
-    location = models.CharField(max_length=255, blank=True, default='')
+    location = models.CharField(max_length=255, blank=True, default='', db_index=True)
     phone_number = models.CharField(max_length=20, blank=True, default='')
     email = models.EmailField(max_length=255, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     profile_picture = models.ImageField(upload_to=provider_image_path, blank=True, null=True)
+    profile_picture_variants = models.JSONField(default=dict, blank=True)
     legal_id_front = models.ImageField(upload_to=provider_image_path, blank=True, null=True)
     legal_id_back = models.ImageField(upload_to=provider_image_path, blank=True, null=True)
 
@@ -64,6 +66,9 @@ class Tag(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     name = models.CharField(unique=True, max_length=100)
 
+    class Meta:
+        ordering = ['name']
+
     def save(self, *args, **kwargs):
         if self.name:
             self.name = self.name.lower()
@@ -102,6 +107,13 @@ class Service(models.Model):
             models.Index(fields=['service_type']),
             models.Index(fields=['verification_status']),
             models.Index(fields=['created_at']),
+            # Discovery listings and facet filters (always scoped to active services)
+            models.Index(fields=['is_active', '-created_at']),
+            models.Index(fields=['is_active', 'verification_status', '-created_at']),
+            models.Index(fields=['is_active', 'service_type', 'verification_status', '-created_at']),
+            models.Index(fields=['is_active', 'price_min']),
+            # Provider's own listing, paged by (created_at, uuid)
+            models.Index(fields=['provider', '-created_at']),
         ]
 
     def clean(self):
@@ -119,6 +131,13 @@ class ServiceMedia(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     service = models.ForeignKey(Service, related_name='media', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='media/services/media/')
+    # Resized copies written by api/images.py; empty until processed
+    variants = models.JSONField(default=dict, blank=True)
+    # Upload order within the service; the first image is the cover.
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['position', 'id']
 
     def __str__(self):
         return f"{self.service.title} - Media"
@@ -128,6 +147,10 @@ class ServiceCredential(models.Model):
     service = models.ForeignKey(Service, related_name='credentials', on_delete=models.CASCADE)
     file = models.FileField(upload_to='media/services/credentials/')
     name = models.CharField(max_length=255, blank=True, null=True)
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['position', 'id']
 
     def __str__(self):
         return self.name if self.name else f"Credential for {self.service.title}"
@@ -143,8 +166,9 @@ class Order(models.Model):
     ]
 
     order_id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
-    customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders_as_customer')
-    provider = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders_as_provider')
+    # Indexed by the composite indexes below, which lead with these columns.
+    customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders_as_customer', db_index=False)
+    provider = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders_as_provider', db_index=False)
     service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='orders')
     price = models.DecimalField(max_digits=10, decimal_places=2)
     discount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -152,9 +176,204 @@ class Order(models.Model):
     revisions = models.PositiveIntegerField(default=0)
     signature = models.CharField(max_length=255, null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Bumped by every status transition (api/orders.py); clients send it back to detect stale writes.
+    version = models.PositiveIntegerField(default=0)
+    # Conversation the order was agreed in; transition events are pushed there too.
+    room = models.ForeignKey('chat.Room', on_delete=models.SET_NULL, null=True, blank=True, related_name='orders')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # When the order became completed; the day its earnings count for (api/provider_stats.py).
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Order lists: one party's orders, newest first, optionally of one status
+            models.Index(fields=['customer', 'created_at']),
+            models.Index(fields=['provider', 'created_at']),
+            models.Index(fields=['customer', 'status', 'created_at']),
+            models.Index(fields=['provider', 'status', 'created_at']),
+        ]
+
+    def save(self, *args, **kwargs):
+        completed_at = (self.completed_at or timezone.now()) if self.status == 'completed' else None
+        if completed_at != self.completed_at:
+            self.completed_at = completed_at
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'completed_at'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Order {self.order_id} - {self.customer} -> {self.provider}"
 
+
+class ProviderStats(models.Model):
+    """
+    Running order totals for one provider (the Order.provider user), kept up
+    to date by api/provider_stats.py on every order write so the dashboard
+    reads one row. One ``<status>_orders`` counter per Order status.
+    """
+    provider = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='provider_stats')
+    pending_orders = models.PositiveIntegerField(default=0)
+    accepted_orders = models.PositiveIntegerField(default=0)
+    in_progress_orders = models.PositiveIntegerField(default=0)
+    completed_orders = models.PositiveIntegerField(default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+    # Sum of price - discount over completed orders
+    total_earnings = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Sum of price - discount over orders not yet completed or cancelled
+    open_order_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.provider}"
+
+
+class ProviderDailyStats(models.Model):
+    """Orders created, orders completed and earnings per provider per (local) day."""
+    provider = models.ForeignKey(User, on_delete=models.CASCADE, related_name='provider_daily_stats')
+    day = models.DateField()
+    orders_created = models.PositiveIntegerField(default=0)
+    orders_completed = models.PositiveIntegerField(default=0)
+    earnings = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'day'], name='provider_daily_stats_unique_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.day}"
+
+
+
+class CustomerStats(models.Model):
+    """
+    Dashboard totals for one customer (the Order.customer user), refreshed by
+    api/activity.py whenever one of their orders is written.
+    ``active_orders`` is a ready-to-render snapshot of their latest open orders.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='customer_stats')
+    # Sum of price - discount over orders that were not cancelled
+    total_investment = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    active_projects = models.PositiveIntegerField(default=0)
+    # Distinct providers the customer has ordered from
+    saved_experts = models.PositiveIntegerField(default=0)
+    active_orders = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.user}"
+
+
+class ActivityItem(models.Model):
+    """
+    One entry of a user's activity feed, written when something happens
+    (fan-out on write) and capped per user; see api/activity.py.
+    """
+    KIND_CHOICES = [
+        ('message', 'Message'),
+        ('order', 'Order'),
+        ('payment', 'Payment'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    content = models.CharField(max_length=500)
+    # Entries with the same key close together in time are merged (e.g. "room:<id>").
+    group_key = models.CharField(max_length=64, blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user}: {self.content[:30]}"
+
+
+class ServiceSearchDocument(models.Model):
+    """
+    Denormalized search text for one Service (title, description, tag names).
+    Its integer id is the rowid of the api_service_fts FTS5 index on SQLite,
+    kept in sync by triggers; api/search.py refreshes rows on service writes.
+    """
+    service = models.OneToOneField(Service, on_delete=models.CASCADE, related_name='search_document')
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    tags = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return self.title
+
+
+class RecommendationList(models.Model):
+    """
+    Precomputed, ranked service candidates.
+    ``key`` is "user:<id>" for a personal list or "segment:<name>" for a shared
+    one (e.g. the cold-start "segment:popular" list). See api/recommendations.py.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    service_ids = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.key
+
+
+class ChunkedUpload(models.Model):
+    """
+    A file uploaded in pieces (see api/uploads.py). Chunks are appended to a
+    temporary file; on completion the sha256 is checked and the file moves to
+    ``file`` under the same path a direct upload of that kind would use.
+    """
+    KIND_CHOICES = [
+        ('image', 'Service image'),
+        ('credential', 'Service credential'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('complete', 'Complete'),
+        ('consumed', 'Consumed'),
+        ('failed', 'Failed'),
+    ]
+    UPLOAD_TO = {
+        'image': 'media/services/media/',
+        'credential': 'media/services/credentials/',
+    }
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    received = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    file = models.FileField(upload_to='media/uploads/', max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+
+class StoredBlob(models.Model):
+    """
+    One content-addressed file in media storage (see api/storage.py).
+    ``refcount`` is how many file-field values point at ``name``; the file
+    is removed when the last of them is deleted.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount})"
@@ -0,0 +1,195 @@
+"""
+Order lifecycle.
+
+    pending ──> accepted ──> in_progress ──> completed
+       │            │             │
+       └────────────┴─────────────┴──────> cancelled
+
+The provider moves an order forward; either party may cancel it until it is
+completed. A transition is one conditional UPDATE on (order_id, status,
+version) that bumps ``version``, so of two concurrent writers exactly one
+wins and the other gets a 409 with the current state instead of silently
+overwriting it. Clients may send the version they last saw to have stale
+requests rejected the same way.
+
+After the transaction commits, an ``order_event`` is sent in the background
+on the channel layer to both parties' order groups (OrderEventsConsumer,
+ws/orders/) and to the order's chat room group (ChatConsumer), so open
+dashboards and conversations update without polling.
+
+New orders are placed by the provider in a conversation: ``resolve_new_order``
+finds the customer (the room's other participant) and the service in one
+query that locks the service row.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.fields import DateTimeField
+
+from .activity import display_name, record_order_event, refresh_customer_stats
+from .models import Order, Service
+from .provider_stats import apply_order_change, order_state
+from .tasks import run_in_background
+
+logger = logging.getLogger(__name__)
+
+TRANSITIONS = {
+    'pending': {'accepted', 'cancelled'},
+    'accepted': {'in_progress', 'cancelled'},
+    'in_progress': {'completed', 'cancelled'},
+    'completed': set(),
+    'cancelled': set(),
+}
+# Target status -> which party may move an order into it
+ACTORS = {
+    'accepted': {'provider'},
+    'in_progress': {'provider'},
+    'completed': {'provider'},
+    'cancelled': {'provider', 'customer'},
+}
+
+
+class OrderError(ValueError):
+    """The request cannot be applied; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class TransitionError(OrderError):
+    """A rejected transition; ``order`` is set when its current state is worth reporting."""
+
+    def __init__(self, message, status=400, order=None):
+        super().__init__(message, status)
+        self.order = order
+
+
+def user_group(user_id):
+    """Channel layer group of one user's order events."""
+    return f'orders_user_{user_id}'
+
+
+def order_event(order, previous_status):
+    return {
+        'type': 'order_event',
+        'order_id': str(order.order_id),
+        'status': order.status,
+        'previous_status': previous_status,
+        'version': order.version,
+        'updated_at': DateTimeField().to_representation(order.updated_at),
+    }
+
+
+def publish_event(order, event):
+    """Send ``event`` to both parties and the order's chat room. Never raises."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    groups = [user_group(order.customer_id), user_group(order.provider_id)]
+    if order.room_id:
+        groups.append(f'chat_{order.room.name}')
+    for group in groups:
+        try:
+            async_to_sync(channel_layer.group_send)(group, event)
+        except Exception:
+            # Real-time delivery is best effort; the order itself is saved.
+            logger.warning("Could not publish order event to %s", group, exc_info=True)
+
+
+def resolve_new_order(provider, room_name, service_id=None):
+    """
+    Return (service, room_id, customer) for an order ``provider`` (a Provider)
+    places in chat room ``room_name``: the service is ``service_id``, or the
+    provider's newest service when it is omitted (as order_create always
+    did), and the customer is the room's other participant. One query,
+    locking the service row; call it inside the transaction that creates the
+    order. Raises OrderError.
+    """
+    room = 'provider__user__chat_rooms'
+    services = (
+        Service.objects.select_for_update(of=('self',))
+        .filter(provider=provider, **{f'{room}__name': room_name})
+        .annotate(
+            room_pk=F(f'{room}__pk'),
+            customer_pk=F(f'{room}__participants'),
+            customer_username=F(f'{room}__participants__username'),
+            customer_first_name=F(f'{room}__participants__first_name'),
+            customer_last_name=F(f'{room}__participants__last_name'),
+        )
+        .exclude(customer_pk=provider.user_id)
+        # Newest service first; one row per other participant of the room.
+        .order_by('-created_at', 'uuid')
+    )
+    if service_id is not None:
+        services = services.filter(uuid=service_id)
+    rows = list(services[:2])
+
+    if not rows:
+        if service_id is not None:
+            raise OrderError("Service or conversation not found.", status=404)
+        raise OrderError("Conversation not found, or you have no service to order.", status=404)
+    if len(rows) > 1 and rows[0].pk == rows[1].pk:
+        raise OrderError("The conversation has more than one other participant.")
+    service = rows[0]
+    customer = User(
+        pk=service.customer_pk, username=service.customer_username,
+        first_name=service.customer_first_name, last_name=service.customer_last_name,
+    )
+    return service, service.room_pk, customer
+
+
+def transition(order_id, user, to_status, expected_version=None):
+    """
+    Move order ``order_id`` to ``to_status`` on behalf of ``user`` and
+    return the updated Order. Raises TransitionError (404, 403, 409, 400).
+    """
+    if to_status not in TRANSITIONS:
+        raise TransitionError(f"Unknown status '{to_status}'.")
+
+    with transaction.atomic():
+        order = (
+            Order.objects.select_related('service', 'room', 'customer', 'provider__provider_profile')
+            .filter(pk=order_id).first()
+        )
+        if order is None or user.pk not in (order.customer_id, order.provider_id):
+            raise TransitionError("Order not found.", status=404)
+        role = 'provider' if user.pk == order.provider_id else 'customer'
+        if expected_version is not None and expected_version != order.version:
+            raise TransitionError("Order has changed since it was read.", status=409, order=order)
+        previous_status = order.status
+        if to_status not in TRANSITIONS[previous_status]:
+            raise TransitionError(
+                f"Cannot move an order from '{previous_status}' to '{to_status}'.", status=409, order=order
+            )
+        if role not in ACTORS[to_status]:
+            raise TransitionError(f"Only the {' or '.join(sorted(ACTORS[to_status]))} can do that.", status=403)
+
+        old_state = order_state(order)
+        now = timezone.now()
+        completed_at = now if to_status == 'completed' else None
+        updated = Order.objects.filter(pk=order.pk, status=previous_status, version=order.version).update(
+            status=to_status, version=F('version') + 1, updated_at=now, completed_at=completed_at,
+        )
+        if not updated:
+            order.refresh_from_db(fields=['status', 'version', 'updated_at'])
+            raise TransitionError("Order was changed by someone else.", status=409, order=order)
+        order.status, order.version, order.updated_at = to_status, order.version + 1, now
+        order.completed_at = completed_at
+
+        # QuerySet.update() sends no signals: keep the dashboards' numbers current here.
+        apply_order_change(old_state, order_state(order))
+        refresh_customer_stats(order.customer_id)
+        provider_profile = getattr(order.provider, 'provider_profile', None)
+        record_order_event(
+            order, customer_name=display_name(order.customer),
+            provider_name=provider_profile.name if provider_profile else display_name(order.provider),
+        )
+        event = order_event(order, previous_status)
+        transaction.on_commit(lambda: run_in_background(publish_event, order, event))
+    return order
@@ -0,0 +1,89 @@
+"""
+Keyset ("cursor") pagination helpers.
+
+A cursor is the opaque, URL-safe encoding of the sort key of the last row of
+a page. The next page is "rows strictly after that key" in the same order,
+which an index on the sort columns answers directly, however deep the page.
+
+List endpoints that still answer without ``?limit=`` (older clients expect a
+plain list) cut that list at PAGINATION['UNPAGINATED_LIMIT'] rows.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+_DEFAULTS = {
+    'UNPAGINATED_LIMIT': 500,
+}
+
+
+def conf(name):
+    return getattr(settings, 'PAGINATION', {}).get(name, _DEFAULTS[name])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps([str(v) for v in values], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """Decode ``cursor`` into one value per model field in ``fields``, converted with ``to_python()``."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor('Malformed cursor.') from exc
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor('Malformed cursor.')
+    try:
+        values = [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValidationError, ValueError, TypeError) as exc:
+        raise InvalidCursor('Malformed cursor.') from exc
+    if None in values:
+        raise InvalidCursor('Malformed cursor.')
+    return values
+
+
+def _after(ordering, values):
+    """Q selecting rows that sort strictly after ``values`` under ``ordering``."""
+    q = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        term = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            term &= Q(**{prev_field.lstrip('-'): prev_value})
+        q |= term
+    # Redundant, but a plain range on the leading column lets the planner walk
+    # the index in order and stop at the limit instead of OR-ing index
+    # lookups and sorting everything after the cursor.
+    first = ordering[0]
+    return Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]}) & q
+
+
+def keyset_page(queryset, ordering, limit, cursor=None):
+    """
+    Return (rows, next_cursor) for one page of ``queryset`` ordered by
+    ``ordering`` (field names, '-' for descending; the last one must be
+    unique). ``queryset`` may be a .values() queryset that includes the
+    ordering fields. Raises InvalidCursor for a cursor that cannot be decoded.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        fields = [queryset.model._meta.get_field(field.lstrip('-')) for field in ordering]
+        queryset = queryset.filter(_after(ordering, decode_cursor(cursor, fields)))
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    if isinstance(last, dict):
+        return rows, encode_cursor(last[field.lstrip('-')] for field in ordering)
+    return rows, encode_cursor(getattr(last, field.lstrip('-')) for field in ordering)
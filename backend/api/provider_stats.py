@@ -0,0 +1,227 @@
+"""
+Maintained provider order statistics.
+
+Every Order write adjusts the provider's ProviderStats row and the
+ProviderDailyStats buckets for the days involved by the difference between
+the order's state before and after the write, in the same transaction. The
+dashboard then reads one stats row and about two months of buckets, however
+many orders the provider has.
+
+Signals cover save() and delete(). They read the order's previous state from
+its row, so an instance loaded before another write still adjusts by what
+the database held. Code that changes orders with
+QuerySet.update() must call ``apply_order_change(old, new)`` itself with
+``order_state()`` snapshots. `manage.py rebuild_provider_stats` recomputes
+everything from the orders.
+"""
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Order, ProviderDailyStats, ProviderStats
+
+OPEN_STATUSES = ('pending', 'accepted', 'in_progress')
+BARS_PER_MONTH = 7
+
+
+def order_state(order):
+    """
+    What an order contributes to the statistics: (provider_id, status,
+    amount, created day, completed day), or None for an unsaved order.
+    """
+    values = order.__dict__
+    if values.get('status') is None or values.get('created_at') is None:
+        return None
+    amount = (values.get('price') or Decimal('0')) - (values.get('discount') or Decimal('0'))
+    completed_day = (
+        timezone.localdate(values['completed_at'])
+        if values['status'] == 'completed' and values.get('completed_at') else None
+    )
+    return (values['provider_id'], values['status'], amount, timezone.localdate(values['created_at']), completed_day)
+
+
+def _contribution(state, sign):
+    """(stats deltas, {day: bucket deltas}) of one order state, negated for sign=-1."""
+    provider_id, status, amount, created_day, completed_day = state
+    totals = {f'{status}_orders': sign}
+    days = defaultdict(dict)
+    days[created_day]['orders_created'] = sign
+    if status == 'completed':
+        totals['total_earnings'] = sign * amount
+        if completed_day:
+            days[completed_day]['orders_completed'] = sign
+            days[completed_day]['earnings'] = sign * amount
+    elif status in OPEN_STATUSES:
+        totals['open_order_value'] = sign * amount
+    return totals, days
+
+
+def _merge(into, deltas):
+    for key, value in deltas.items():
+        into[key] = into.get(key, 0) + value
+
+
+def apply_order_change(old, new):
+    """Adjust the statistics from order state ``old`` to ``new`` (either may be None)."""
+    changes = defaultdict(lambda: ({}, defaultdict(dict)))
+    for state, sign in ((old, -1), (new, 1)):
+        if state is None:
+            continue
+        totals, days = _contribution(state, sign)
+        provider_totals, provider_days = changes[state[0]]
+        _merge(provider_totals, totals)
+        for day, deltas in days.items():
+            _merge(provider_days[day], deltas)
+
+    with transaction.atomic():
+        for provider_id, (totals, days) in changes.items():
+            totals = {key: value for key, value in totals.items() if value}
+            if totals:
+                ProviderStats.objects.get_or_create(provider_id=provider_id)
+                ProviderStats.objects.filter(provider_id=provider_id).update(
+                    updated_at=timezone.now(),
+                    **{key: F(key) + value for key, value in totals.items()},
+                )
+            for day, deltas in days.items():
+                deltas = {key: value for key, value in deltas.items() if value}
+                if deltas:
+                    ProviderDailyStats.objects.get_or_create(provider_id=provider_id, day=day)
+                    ProviderDailyStats.objects.filter(provider_id=provider_id, day=day).update(
+                        **{key: F(key) + value for key, value in deltas.items()}
+                    )
+
+
+def _stored_state(order):
+    stored = Order.objects.filter(pk=order.pk).first()
+    return order_state(stored) if stored else None
+
+
+@receiver(pre_save, sender=Order)
+def _order_saving(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # From the row, not the instance: it may have been loaded before a transition().
+        instance._stats_state = None if instance._state.adding else _stored_state(instance)
+
+
+@receiver(post_save, sender=Order)
+def _order_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new = order_state(instance)
+    if new is None:
+        # Saved from a load that deferred some of the fields: read them back.
+        new = _stored_state(instance)
+    apply_order_change(None if created else instance._stats_state, new)
+
+
+@receiver(pre_delete, sender=Order)
+def _order_deleting(sender, instance, **kwargs):
+    instance._stats_state = _stored_state(instance)
+
+
+@receiver(post_delete, sender=Order)
+def _order_deleted(sender, instance, **kwargs):
+    apply_order_change(instance._stats_state, None)
+
+
+def rebuild_provider_stats():
+    """Recompute every provider's stats and daily buckets from the orders. Returns the provider count."""
+    amount = F('price') - F('discount')
+    totals = Order.objects.values('provider_id').annotate(
+        total_earnings=Sum(amount, filter=Q(status='completed'), default=Decimal('0')),
+        open_order_value=Sum(amount, filter=Q(status__in=OPEN_STATUSES), default=Decimal('0')),
+        **{
+            f'{status}_orders': Count('pk', filter=Q(status=status))
+            for status, _ in Order.STATUS_CHOICES
+        },
+    )
+    stats = [ProviderStats(provider_id=row.pop('provider_id'), **row) for row in totals]
+
+    tz = timezone.get_current_timezone()
+    days = defaultdict(lambda: {'orders_created': 0, 'orders_completed': 0, 'earnings': Decimal('0')})
+    for row in Order.objects.annotate(day=TruncDate('created_at', tzinfo=tz)).values(
+        'provider_id', 'day'
+    ).annotate(count=Count('pk')):
+        days[row['provider_id'], row['day']]['orders_created'] = row['count']
+    for row in Order.objects.filter(status='completed', completed_at__isnull=False).annotate(
+        day=TruncDate('completed_at', tzinfo=tz)
+    ).values('provider_id', 'day').annotate(count=Count('pk'), earnings=Sum(amount)):
+        bucket = days[row['provider_id'], row['day']]
+        bucket['orders_completed'] = row['count']
+        bucket['earnings'] = row['earnings']
+
+    with transaction.atomic():
+        ProviderStats.objects.all().delete()
+        ProviderDailyStats.objects.all().delete()
+        ProviderStats.objects.bulk_create(stats, batch_size=500)
+        ProviderDailyStats.objects.bulk_create([
+            ProviderDailyStats(provider_id=provider_id, day=day, **bucket)
+            for (provider_id, day), bucket in days.items()
+        ], batch_size=500)
+    return len(stats)
+
+
+def _month_bars(earnings_by_day, year, month):
+    """Earnings of one month split into BARS_PER_MONTH consecutive runs of days."""
+    days_in_month = calendar.monthrange(year, month)[1]
+    bars = [Decimal('0')] * BARS_PER_MONTH
+    for day, earnings in earnings_by_day.items():
+        if (day.year, day.month) == (year, month):
+            bars[(day.day - 1) * BARS_PER_MONTH // days_in_month] += earnings
+    return bars
+
+
+def earnings_statistics(provider_id, today=None):
+    """
+    ``{"this_month": [...], "last_month": [...]}``: BARS_PER_MONTH bar
+    heights each, as percentages of the largest bar of the two months.
+    """
+    today = today or timezone.localdate()
+    this_month = today.replace(day=1)
+    last_month = (this_month - timedelta(days=1)).replace(day=1)
+    earnings_by_day = dict(
+        ProviderDailyStats.objects.filter(provider_id=provider_id, day__gte=last_month, day__lte=today)
+        .values_list('day', 'earnings')
+    )
+    current = _month_bars(earnings_by_day, this_month.year, this_month.month)
+    previous = _month_bars(earnings_by_day, last_month.year, last_month.month)
+    peak = max(current + previous)
+    if not peak:
+        return {'this_month': [0] * BARS_PER_MONTH, 'last_month': [0] * BARS_PER_MONTH}
+    return {
+        'this_month': [round(value * 100 / peak) for value in current],
+        'last_month': [round(value * 100 / peak) for value in previous],
+    }
+
+
+def success_rate(stats):
+    """Completed orders as a percentage of finished (completed or cancelled) ones."""
+    finished = stats.completed_orders + stats.cancelled_orders
+    return round(stats.completed_orders * 100 / finished, 1) if finished else 0.0
+
+
+def trust_badge(stats):
+    rate = success_rate(stats)
+    if stats.completed_orders >= 10 and rate >= 90:
+        badge = "Top Rated"
+    elif stats.completed_orders:
+        badge = "Rising Talent"
+    else:
+        return "New Provider", "Complete your first order to start building your track record."
+    return badge, (
+        f"Based on your {rate:g}% job success rate over "
+        f"{stats.completed_orders} completed order{'s' if stats.completed_orders != 1 else ''}."
+    )
+
+
+def provider_stats(provider_id):
+    """The provider's stats row, or an unsaved all-zero one for a provider without orders."""
+    return ProviderStats.objects.filter(provider_id=provider_id).first() or ProviderStats(provider_id=provider_id)
@@ -0,0 +1,154 @@
+"""
+Precomputed service recommendations.
+
+Lists are computed off the request path (background pool or the
+``refresh_recommendations`` command) and stored in RecommendationList rows, so
+serving one is a single unique-key lookup:
+
+  * personal list – active services sharing tags with what the customer has
+    ordered, weighted by how often each tag appears in their history
+  * "popular" segment – most-ordered active services, newest first on ties;
+    used for cold start and to pad short personal lists
+
+Serving samples from the stored candidates, so the dashboard still varies
+without ORDER BY RANDOM().
+
+A request that finds a list missing or stale schedules its refresh at most
+once per REFRESH_GUARD seconds across all workers (a cache.add() guard in
+the shared cache). The background pool is in-process, so a restart can drop
+a queued refresh; the guard then lapses and a later request retries. Run
+``refresh_recommendations`` periodically to keep every list fresh anyway.
+"""
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Order, RecommendationList, Service
+from .tasks import run_in_background
+
+_DEFAULTS = {
+    'LIST_SIZE': 30,       # candidates stored per customer
+    'POPULAR_SIZE': 100,   # candidates stored in the cold-start segment
+    'MAX_AGE': 60 * 60,    # seconds before a stored list is refreshed in the background
+    'REFRESH_GUARD': 5 * 60,  # seconds in which a list's refresh is scheduled only once
+    'CACHE_ALIAS': 'default',
+}
+
+POPULAR_KEY = 'segment:popular'
+
+
+def conf(name):
+    return getattr(settings, 'RECOMMENDATIONS', {}).get(name, _DEFAULTS[name])
+
+
+def user_key(user_id):
+    return f'user:{user_id}'
+
+
+def _store(key, service_ids):
+    RecommendationList.objects.update_or_create(
+        key=key, defaults={'service_ids': [str(pk) for pk in service_ids]}
+    )
+
+
+def compute_popular():
+    return list(
+        Service.objects.filter(is_active=True)
+        .annotate(order_count=Count('orders'))
+        .order_by('-order_count', '-created_at')
+        .values_list('uuid', flat=True)[:conf('POPULAR_SIZE')]
+    )
+
+
+def compute_for_user(user_id):
+    """Rank active services by tag overlap with the user's order history."""
+    through = Service.tags.through
+    ordered = set(Order.objects.filter(customer_id=user_id).values_list('service_id', flat=True))
+    if not ordered:
+        return []
+
+    profile = Counter(
+        through.objects.filter(service_id__in=ordered).values_list('tag_id', flat=True)
+    )
+    if not profile:
+        return []
+
+    scores = Counter()
+    candidates = (
+        through.objects
+        .filter(tag_id__in=profile.keys(), service__is_active=True)
+        .exclude(service_id__in=ordered)
+        .exclude(service__provider__user_id=user_id)
+        .values_list('service_id', 'tag_id')
+    )
+    for service_id, tag_id in candidates.iterator():
+        scores[service_id] += profile[tag_id]
+    return [service_id for service_id, _ in scores.most_common(conf('LIST_SIZE'))]
+
+
+def refresh_popular():
+    _store(POPULAR_KEY, compute_popular())
+
+
+def refresh_user(user_id):
+    _store(user_key(user_id), compute_for_user(user_id))
+
+
+def refresh_all():
+    """Rebuild the popular segment and every customer's list. Returns lists written."""
+    refresh_popular()
+    customer_ids = Order.objects.values_list('customer_id', flat=True).distinct()
+    count = 1
+    for user_id in customer_ids.iterator():
+        refresh_user(user_id)
+        count += 1
+    return count
+
+
+def _schedule(fn, *args, key):
+    """Run ``fn`` in the background unless some worker already scheduled ``key`` within REFRESH_GUARD."""
+    key = f'recommendations:{key}'
+    if caches[conf('CACHE_ALIAS')].add(f'{key}:scheduled', 1, conf('REFRESH_GUARD')):
+        run_in_background(fn, *args, key=key)
+
+
+def schedule_refresh(user_id):
+    """Refresh after something that changes the user's list (a new order), guard or not."""
+    run_in_background(refresh_user, user_id, key=f'recommendations:{user_key(user_id)}')
+
+
+def recommended_service_ids(user, count=3, seed=None):
+    """
+    Pick ``count`` service uuids for ``user`` from the stored lists.
+    Never computes inline: missing or stale lists are refreshed in the
+    background and the popular segment is served meanwhile. A ``seed`` makes
+    the pick repeatable (e.g. per catalog generation, so responses can be
+    revalidated with an ETag).
+    """
+    rng = random.Random(seed) if seed is not None else random
+    lists = {
+        row.key: row for row in RecommendationList.objects.filter(key__in=[user_key(user.id), POPULAR_KEY])
+    }
+    stale_before = timezone.now() - timedelta(seconds=conf('MAX_AGE'))
+
+    personal = lists.get(user_key(user.id))
+    if personal is None or personal.computed_at < stale_before:
+        _schedule(refresh_user, user.id, key=user_key(user.id))
+    popular = lists.get(POPULAR_KEY)
+    if popular is None or popular.computed_at < stale_before:
+        _schedule(refresh_popular, key=POPULAR_KEY)
+
+    # Sample from the best few personal candidates, then pad from popular.
+    chosen = []
+    if personal and personal.service_ids:
+        top = personal.service_ids[:count * 3]
+        chosen = rng.sample(top, min(count, len(top)))
+    if len(chosen) < count and popular:
+        pool = [pk for pk in popular.service_ids if pk not in chosen]
+        chosen += rng.sample(pool, min(count - len(chosen), len(pool)))
+    return chosen
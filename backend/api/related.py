@@ -0,0 +1,104 @@
+"""
+"Related services" from tag similarity.
+
+A rebuild turns the Service.tags M2M into a sparse service × tag matrix,
+TF-IDF weights and L2-normalises it, and takes the cosine top-k of every row.
+The result is stored per service in RecommendationList under
+"service:<uuid>", so serving related services is one unique-key lookup.
+
+Rebuild periodically with ``manage.py rebuild_related_services`` (cron);
+NumPy/SciPy are only imported there, never on the web path.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RecommendationList, Service
+
+_DEFAULTS = {
+    'TOP_K': 12,
+    'BLOCK_SIZE': 512,   # rows multiplied at a time, bounds memory on large catalogs
+}
+
+
+def conf(name):
+    return getattr(settings, 'RELATED_SERVICES', {}).get(name, _DEFAULTS[name])
+
+
+def service_key(service_id):
+    return f'service:{service_id}'
+
+
+def compute_related(top_k=None):
+    """Return {service_uuid: [related uuids, best first]} for all active tagged services."""
+    import numpy as np
+    from scipy import sparse
+
+    top_k = top_k or conf('TOP_K')
+    pairs = list(
+        Service.tags.through.objects
+        .filter(service__is_active=True)
+        .values_list('service_id', 'tag_id')
+    )
+    if not pairs:
+        return {}
+
+    service_ids = sorted({s for s, _ in pairs})
+    tag_ids = sorted({t for _, t in pairs})
+    row_of = {pk: i for i, pk in enumerate(service_ids)}
+    col_of = {pk: i for i, pk in enumerate(tag_ids)}
+    rows = np.fromiter((row_of[s] for s, _ in pairs), dtype=np.int32, count=len(pairs))
+    cols = np.fromiter((col_of[t] for _, t in pairs), dtype=np.int32, count=len(pairs))
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, cols)),
+        shape=(len(service_ids), len(tag_ids)),
+    )
+    matrix.data[:] = 1.0  # collapse accidental duplicate (service, tag) rows
+
+    # Smoothed IDF, as in scikit-learn: rare tags say more about a service.
+    doc_freq = np.bincount(matrix.indices, minlength=len(tag_ids))
+    idf = np.log((1 + len(service_ids)) / (1 + doc_freq)) + 1.0
+    matrix = matrix.multiply(idf.astype(np.float32)).tocsr()
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    norms[norms == 0] = 1.0
+    matrix = sparse.diags(1.0 / norms).dot(matrix).tocsr()
+
+    related = {}
+    transposed = matrix.T.tocsr()
+    block = conf('BLOCK_SIZE')
+    for start in range(0, len(service_ids), block):
+        scores = matrix[start:start + block].dot(transposed).tocsr()
+        for offset in range(scores.shape[0]):
+            i = start + offset
+            lo, hi = scores.indptr[offset], scores.indptr[offset + 1]
+            cols_i, vals_i = scores.indices[lo:hi], scores.data[lo:hi]
+            keep = cols_i != i
+            cols_i, vals_i = cols_i[keep], vals_i[keep]
+            if len(vals_i) > top_k:
+                best = np.argpartition(-vals_i, top_k)[:top_k]
+                cols_i, vals_i = cols_i[best], vals_i[best]
+            order = np.argsort(-vals_i, kind='stable')
+            related[service_ids[i]] = [service_ids[j] for j in cols_i[order]]
+    return related
+
+
+def rebuild_related(top_k=None):
+    """Recompute and store every related list. Returns the number of services written."""
+    started = timezone.now()
+    related = compute_related(top_k)
+    rows = [
+        RecommendationList(key=service_key(pk), service_ids=[str(other) for other in others])
+        for pk, others in related.items()
+    ]
+    RecommendationList.objects.bulk_create(
+        rows, batch_size=500,
+        update_conflicts=True, unique_fields=['key'], update_fields=['service_ids', 'computed_at'],
+    )
+    # Lists not rewritten above belong to services that lost their tags or were deactivated.
+    RecommendationList.objects.filter(key__startswith='service:', computed_at__lt=started).delete()
+    return len(rows)
+
+
+def related_service_ids(service_id):
+    """Stored related uuids for one service ([] until the next rebuild covers it)."""
+    row = RecommendationList.objects.filter(key=service_key(service_id)).only('service_ids').first()
+    return row.service_ids if row else []
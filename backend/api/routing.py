@@ -3,4 +3,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     path("ws/transcribe/", consumers.TranscribeConsumer.as_asgi()),
+    path("ws/orders/", consumers.OrderEventsConsumer.as_asgi()),
 ]
@@ -0,0 +1,156 @@
+"""
+Full-text search over services (title, description and tag names).
+
+Each Service has a ServiceSearchDocument row refreshed by the signal handlers
+below whenever the service or its tags change. On SQLite the documents are
+indexed by the ``api_service_fts`` FTS5 table (migration 0012, kept in sync
+by triggers); other databases use an ORM fallback unless
+``settings.SERVICE_SEARCH_BACKEND`` names a dedicated backend.
+"""
+import uuid
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, m2m_changed
+from django.dispatch import receiver
+
+from core.search import build_fts5_query, get_search_backend
+from .models import Service, ServiceSearchDocument, Tag
+
+FTS_TABLE = 'api_service_fts'
+# bm25 column weights for (title, description, tags)
+FTS_WEIGHTS = (10.0, 1.0, 5.0)
+
+
+def index_service(service):
+    """Create or refresh the search document of ``service``."""
+    tags = ' '.join(Tag.objects.filter(services=service).values_list('name', flat=True))
+    ServiceSearchDocument.objects.update_or_create(
+        service_id=service.pk,
+        defaults={'title': service.title, 'description': service.description, 'tags': tags},
+    )
+
+
+def reindex_all():
+    """Rebuild every search document from scratch."""
+    ServiceSearchDocument.objects.all().delete()
+    for service in Service.objects.iterator(chunk_size=500):
+        index_service(service)
+
+
+# Indexing waits for commit so a service created together with its tags (or
+# tags attached by bulk insert, which sends no signal) is indexed once, complete.
+
+@receiver(post_save, sender=Service)
+def _service_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: index_service(instance))
+
+
+@receiver(m2m_changed, sender=Service.tags.through)
+def _service_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        transaction.on_commit(lambda: index_service(instance))
+        return
+    # tag.services.add(...) etc.: pk_set holds service ids (None for clear).
+    service_ids = list(pk_set) if pk_set else list(instance.services.values_list('pk', flat=True))
+
+    def reindex():
+        for service in Service.objects.filter(pk__in=service_ids):
+            index_service(service)
+    transaction.on_commit(reindex)
+
+
+class ServiceSearchBackend:
+    """Interface: return ranked service uuids matching ``query`` and ``filters``."""
+
+    def search(self, query, filters, limit=20, offset=0):
+        raise NotImplementedError
+
+
+class SQLiteFTSServiceSearch(ServiceSearchBackend):
+
+    def search(self, query, filters, limit=20, offset=0):
+        match = build_fts5_query(query)
+        if not match:
+            return []
+
+        where = [f'{FTS_TABLE} MATCH %s', 's.is_active = 1']
+        params = [match]
+        if filters.get('service_type'):
+            where.append('s.service_type = %s')
+            params.append(filters['service_type'])
+        if filters.get('verification_status'):
+            where.append('s.verification_status = %s')
+            params.append(filters['verification_status'])
+        # Price filters select services whose range overlaps [min_price, max_price].
+        if filters.get('min_price') is not None:
+            where.append('CAST(s.price_max AS REAL) >= %s')
+            params.append(float(filters['min_price']))
+        if filters.get('max_price') is not None:
+            where.append('CAST(s.price_min AS REAL) <= %s')
+            params.append(float(filters['max_price']))
+
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        sql = (
+            f'SELECT d.service_id FROM {FTS_TABLE} '
+            f'JOIN {ServiceSearchDocument._meta.db_table} d ON d.id = {FTS_TABLE}.rowid '
+            f'JOIN {Service._meta.db_table} s ON s.uuid = d.service_id '
+            f'WHERE {" AND ".join(where)} '
+            f'ORDER BY bm25({FTS_TABLE}, {weights}), s.created_at DESC '
+            f'LIMIT %s OFFSET %s'
+        )
+        params += [limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [uuid.UUID(row[0]) for row in cursor.fetchall()]
+
+
+class ORMServiceSearch(ServiceSearchBackend):
+    """Unindexed fallback: every word must appear in title, description or tags."""
+
+    def search(self, query, filters, limit=20, offset=0):
+        words = (query or '').split()
+        if not words:
+            return []
+        queryset = apply_filters(Service.objects.filter(is_active=True), filters)
+        for word in words:
+            queryset = queryset.filter(
+                Q(search_document__title__icontains=word)
+                | Q(search_document__description__icontains=word)
+                | Q(search_document__tags__icontains=word)
+            )
+        return list(queryset.order_by('-created_at').values_list('uuid', flat=True)[offset:offset + limit])
+
+
+def apply_filters(queryset, filters):
+    """ORM equivalent of the SQL filters above."""
+    if filters.get('service_type'):
+        queryset = queryset.filter(service_type=filters['service_type'])
+    if filters.get('verification_status'):
+        queryset = queryset.filter(verification_status=filters['verification_status'])
+    if filters.get('min_price') is not None:
+        queryset = queryset.filter(price_max__gte=filters['min_price'])
+    if filters.get('max_price') is not None:
+        queryset = queryset.filter(price_min__lte=filters['max_price'])
+    return queryset
+
+
+def get_backend():
+    return get_search_backend('SERVICE_SEARCH_BACKEND', connection, {
+        'sqlite': 'api.search.SQLiteFTSServiceSearch',
+        '*': 'api.search.ORMServiceSearch',
+    })
+
+
+def search_services(query, filters=None, limit=20, offset=0):
+    """Return Service objects in rank order, ready for ServiceReadSerializer."""
+    uuids = get_backend().search(query, filters or {}, limit=limit, offset=offset)
+    by_uuid = (
+        Service.objects.select_related('provider')
+        .prefetch_related('tags', 'media', 'credentials')
+        .in_bulk(uuids)
+    )
+    return [by_uuid[pk] for pk in uuids if pk in by_uuid]
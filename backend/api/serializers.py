@@ -1,9 +1,28 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Provider, Customer, Service, Order
+from .models import Provider, Customer, Service, ServiceMedia, ServiceCredential, Order, ChunkedUpload
+from .facets import PRICE_BUCKETS
+from core.media_urls import media_urls
+from .images import srcset
 import json
 import uuid
 import json
+from collections import defaultdict
+from datetime import timedelta
+
+_datetime_field = serializers.DateTimeField()
+
+
+def _list_datetime_field():
+    """
+    DateTimeField with the current time zone resolved once, for flat-mode
+    lists: the stock field looks it up again for every value it renders.
+    """
+    if not settings.USE_TZ:
+        return _datetime_field
+    return serializers.DateTimeField(default_timezone=timezone.get_current_timezone())
 
 class ProviderCreateSerializer(serializers.ModelSerializer):
     """Handles text data for provider creation (JSON).
@@ -226,6 +245,9 @@ class ServiceCreateSerializer(serializers.Serializer):
     service_type = serializers.ChoiceField(choices=[("remote", "Remote"), ("visit", "Visit")])
     price_min = serializers.DecimalField(max_digits=10, decimal_places=2)
     price_max = serializers.DecimalField(max_digits=10, decimal_places=2)
+    # Completed chunked uploads (api/uploads.py), as an alternative to file fields
+    service_image_uploads = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+    certification_uploads = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
 
     def validate(self, data):
         if data['price_min'] > data['price_max']:
@@ -233,6 +255,79 @@ class ServiceCreateSerializer(serializers.Serializer):
         return data
 
 
+class ChunkedUploadStartSerializer(serializers.Serializer):
+    """Validates the declaration that opens a chunked upload."""
+    filename = serializers.CharField(max_length=200)
+    size = serializers.IntegerField(min_value=1)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$')
+    kind = serializers.ChoiceField(choices=ChunkedUpload.KIND_CHOICES)
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    """Progress of a chunked upload."""
+    upload_id = serializers.UUIDField(source='id', read_only=True)
+
+    class Meta:
+        model = ChunkedUpload
+        fields = ['upload_id', 'kind', 'filename', 'size', 'received', 'status']
+
+
+class ServiceSearchQuerySerializer(serializers.Serializer):
+    """Validates query parameters of the service search endpoint."""
+    q = serializers.CharField(max_length=200)
+    service_type = serializers.ChoiceField(choices=Service.SERVICE_TYPE_CHOICES, required=False)
+    verification_status = serializers.ChoiceField(choices=Service.VERIFICATION_STATUS_CHOICES, required=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    page = serializers.IntegerField(min_value=1, default=1)
+    page_size = serializers.IntegerField(min_value=1, max_value=50, default=20)
+
+
+class ProviderServicesQuerySerializer(serializers.Serializer):
+    """Validates query parameters of the provider services list."""
+    limit = serializers.IntegerField(min_value=1, max_value=100, required=False)
+    cursor = serializers.CharField(max_length=200, required=False)
+    fields = serializers.CharField(max_length=500, required=False)
+
+    def validate_fields(self, value):
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = sorted(set(names) - set(ServiceReadSerializer.Meta.fields))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown fields: {', '.join(unknown)}.")
+        return names
+
+
+class OrderListQuerySerializer(serializers.Serializer):
+    """Validates query parameters of the customer and provider order lists."""
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, required=False)
+    cursor = serializers.CharField(max_length=200, required=False)
+
+
+class OrderPlacementSerializer(serializers.Serializer):
+    """Where an order placed with POST /api/orders/create/ belongs."""
+    room_name = serializers.CharField(max_length=100)
+    service = serializers.UUIDField(required=False)
+
+
+class OrderTransitionSerializer(serializers.Serializer):
+    """Body of POST /api/orders/<order_id>/transition/."""
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    version = serializers.IntegerField(min_value=0, required=False)
+
+
+class ServiceFacetQuerySerializer(serializers.Serializer):
+    """Validates query parameters of the faceted discovery listing."""
+    service_type = serializers.ChoiceField(choices=Service.SERVICE_TYPE_CHOICES, required=False)
+    verification_status = serializers.ChoiceField(choices=Service.VERIFICATION_STATUS_CHOICES, required=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    price_bucket = serializers.ChoiceField(choices=[bucket for bucket, _, _ in PRICE_BUCKETS], required=False)
+    location = serializers.CharField(max_length=255, required=False)
+    page = serializers.IntegerField(min_value=1, default=1)
+    page_size = serializers.IntegerField(min_value=1, max_value=50, default=20)
+
+
 class ServiceReadSerializer(serializers.ModelSerializer):
     """Handles data for service display."""
     id = serializers.UUIDField(source='uuid', read_only=True)
@@ -243,6 +338,8 @@ class ServiceReadSerializer(serializers.ModelSerializer):
     provider_id = serializers.UUIDField(source='provider.uuid')
     provider_name = serializers.CharField(source='provider.name', read_only=True)
     provider_image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    provider_image_variants = serializers.SerializerMethodField()
     location = serializers.CharField(source='provider.location', read_only=True)
 
     class Meta:
@@ -261,38 +358,179 @@ class ServiceReadSerializer(serializers.ModelSerializer):
             'provider_id',
             'provider_name',
             'provider_image',
-            'location'
+            'location',
+            'image_variants',
+            'provider_image_variants',
         ]
 
+    # Related data each field reads: (select_related, prefetch_related)
+    RELATED_LOOKUPS = {
+        'tags': ((), ('tags',)),
+        'images': ((), ('media',)),
+        'credentials': ((), ('credentials',)),
+        'provider_id': (('provider',), ()),
+        'provider_name': (('provider',), ()),
+        'provider_image': (('provider',), ()),
+        'image_variants': ((), ('media',)),
+        'provider_image_variants': (('provider',), ()),
+        'location': (('provider',), ()),
+    }
+
+    def __init__(self, *args, fields=None, **kwargs):
+        """``fields``: optional iterable of field names to keep (sparse fieldset)."""
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields=None):
+        """Add exactly the joins and prefetches ``fields`` (default: all) need."""
+        select, prefetch = set(), set()
+        for name in fields if fields is not None else cls.Meta.fields:
+            joins, prefetches = cls.RELATED_LOOKUPS.get(name, ((), ()))
+            select.update(joins)
+            prefetch.update(prefetches)
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
+
     def get_tags(self, obj):
         return [tag.name for tag in obj.tags.all()]
 
     def get_images(self, obj):
-        request = self.context.get('request')
-        return [
-            request.build_absolute_uri(media.image.url)
-            for media in obj.media.all()
-        ] if request else []
+        urls = media_urls(self.context.get('request'))
+        return [urls.url(media.image.name, media.image.storage) for media in obj.media.all()] if urls else []
 
     def get_credentials(self, obj):
-        request = self.context.get('request')
+        urls = media_urls(self.context.get('request'))
         return [
             {
                 "name": cert.name,
-                "url": request.build_absolute_uri(cert.file.url)
+                "url": urls.url(cert.file.name, cert.file.storage)
             }
             for cert in obj.credentials.all()
-        ] if request else []
+        ] if urls else []
 
     def get_provider_image(self, obj):
-        request = self.context.get('request')
-        if not obj.provider.profile_picture:
+        urls = media_urls(self.context.get('request'))
+        if not obj.provider.profile_picture or urls is None:
+            return None
+        return urls.url(obj.provider.profile_picture.name, obj.provider.profile_picture.storage)
+
+    def get_image_variants(self, obj):
+        """One srcset description per entry of ``images`` (see api/images.py)."""
+        urls = media_urls(self.context.get('request'))
+        return [
+            srcset(media.variants, urls, urls.url(media.image.name, media.image.storage))
+            for media in obj.media.all()
+        ] if urls else []
+
+    def get_provider_image_variants(self, obj):
+        urls = media_urls(self.context.get('request'))
+        picture = obj.provider.profile_picture
+        if not picture or urls is None:
             return None
-        return request.build_absolute_uri(obj.provider.profile_picture.url) if request else None
+        return srcset(obj.provider.profile_picture_variants, urls, urls.url(picture.name, picture.storage))
 
     def get_price_range(self, obj):
         return f"₹{obj.price_min} - ₹{obj.price_max}"
 
+    # Flat mode: .values() columns each field needs (to-many fields are loaded
+    # separately, one query each).
+    VALUE_COLUMNS = {
+        'id': ('uuid',),
+        'uuid': ('uuid',),
+        'title': ('title',),
+        'description': ('description',),
+        'verification_status': ('verification_status',),
+        'price_range': ('price_min', 'price_max'),
+        'created_at': ('created_at',),
+        'provider_id': ('provider_id',),
+        'provider_name': ('provider__name',),
+        'provider_image': ('provider__profile_picture',),
+        'location': ('provider__location',),
+        'provider_image_variants': ('provider__profile_picture', 'provider__profile_picture_variants'),
+    }
+
+    @classmethod
+    def values_data(cls, queryset, request=None, fields=None):
+        """
+        Same output as ``ServiceReadSerializer(queryset, many=True).data``,
+        built from .values() rows instead of model instances. ``fields``
+        limits the output like the constructor argument does.
+        """
+        names = [name for name in cls.Meta.fields if fields is None or name in fields]
+        columns = {'uuid'}
+        for name in names:
+            columns.update(cls.VALUE_COLUMNS.get(name, ()))
+        rows = list(queryset.values(*sorted(columns)))
+        ids = [row['uuid'] for row in rows]
+
+        urls = media_urls(request)
+
+        tags, images, credentials = defaultdict(list), defaultdict(list), defaultdict(list)
+        image_variants = defaultdict(list)
+        if 'tags' in names and ids:
+            for service_id, tag in (
+                Service.tags.through.objects.filter(service_id__in=ids)
+                .order_by('tag__name').values_list('service_id', 'tag__name')
+            ):
+                tags[service_id].append(tag)
+        if ('images' in names or 'image_variants' in names) and ids and urls:
+            storage = ServiceMedia._meta.get_field('image').storage
+            for service_id, image, variants in (
+                # Same order as obj.media.all() (Meta.ordering): images[0] is the cover.
+                ServiceMedia.objects.filter(service_id__in=ids)
+                .values_list('service_id', 'image', 'variants')
+            ):
+                images[service_id].append(urls.url(image, storage))
+                image_variants[service_id].append(srcset(variants, urls, images[service_id][-1]))
+        if 'credentials' in names and ids and urls:
+            storage = ServiceCredential._meta.get_field('file').storage
+            for service_id, name, file in (
+                ServiceCredential.objects.filter(service_id__in=ids)
+                .values_list('service_id', 'name', 'file')
+            ):
+                credentials[service_id].append({"name": name, "url": urls.url(file, storage)})
+        picture_storage = Provider._meta.get_field('profile_picture').storage
+
+        datetime_field = _list_datetime_field()
+        data = []
+        for row in rows:
+            pk = row['uuid']
+            values = {
+                'id': str(pk),
+                'uuid': str(pk),
+                'title': row.get('title'),
+                'description': row.get('description'),
+                'tags': tags[pk],
+                'images': images[pk],
+                'credentials': credentials[pk],
+                'verification_status': row.get('verification_status'),
+                'price_range': f"₹{row.get('price_min')} - ₹{row.get('price_max')}",
+                'created_at': datetime_field.to_representation(row['created_at']) if 'created_at' in row else None,
+                'provider_id': str(row['provider_id']) if 'provider_id' in row else None,
+                'provider_name': row.get('provider__name'),
+                'provider_image': (
+                    urls.url(row['provider__profile_picture'], picture_storage)
+                    if urls and row.get('provider__profile_picture') else None
+                ),
+                'location': row.get('provider__location'),
+                'image_variants': image_variants[pk],
+                'provider_image_variants': (
+                    srcset(
+                        row['provider__profile_picture_variants'], urls,
+                        urls.url(row['provider__profile_picture'], picture_storage),
+                    )
+                    if urls and row.get('provider__profile_picture') else None
+                ),
+            }
+            data.append({name: values[name] for name in names})
+        return data
+
 class CustomerOrderSerializer(serializers.Serializer):
     """Serializer for active orders in the customer dashboard."""
     id = serializers.CharField()
@@ -363,16 +601,76 @@ class OrderSerializer(serializers.ModelSerializer):
             'order_id', 'customer', 'provider',
             'service', 'price', 'discount',
             'delivery_days', 'revisions', 'signature',
-            'status', 'created_at', 'updated_at',
+            'status', 'version', 'created_at', 'updated_at',
             'service_title', 'provider_name', 'customer_name', 'delivery_date',
         ]
-        read_only_fields = ['order_id', 'customer', 'provider', 'service', 'status', 'created_at', 'updated_at']
+        read_only_fields = [
+            'order_id', 'customer', 'provider', 'service', 'status', 'version', 'created_at', 'updated_at',
+        ]
 
     def get_delivery_date(self, obj):
-        from datetime import timedelta
-        if obj.created_at and obj.delivery_days:
-            delivery_dt = obj.created_at + timedelta(days=obj.delivery_days)
+        return self._delivery_date(obj.created_at, obj.delivery_days)
+
+    @staticmethod
+    def _delivery_date(created_at, delivery_days):
+        if created_at and delivery_days:
+            delivery_dt = created_at + timedelta(days=delivery_days)
             return delivery_dt.strftime('%b %d, %Y')
         return None
 
+    @classmethod
+    def _delivery_dates(cls):
+        """_delivery_date memoised by (day, delivery_days): one strftime per distinct date in a list."""
+        memo = {}
+
+        def delivery_date(created_at, delivery_days):
+            if not created_at:
+                return None
+            key = (created_at.date(), delivery_days)
+            if key not in memo:
+                memo[key] = cls._delivery_date(created_at, delivery_days)
+            return memo[key]
+        return delivery_date
+
+    # Flat mode: same output as .data, built from these .values() columns.
+    VALUES = (
+        'order_id', 'customer_id', 'provider_id', 'service_id', 'price', 'discount',
+        'delivery_days', 'revisions', 'signature', 'status', 'version', 'created_at', 'updated_at',
+        'service__title', 'provider__username', 'customer__username',
+    )
+
+    @classmethod
+    def values_data(cls, queryset):
+        return cls.rows_data(queryset.values(*cls.VALUES))
+
+    @classmethod
+    def rows_data(cls, rows):
+        """Flat-mode output for rows already fetched with ``.values(*VALUES)``."""
+        fields = cls().fields
+        price, discount = fields['price'], fields['discount']
+        delivery_date = cls._delivery_dates()
+        datetime_field = _list_datetime_field()
+        return [
+            {
+                'order_id': str(row['order_id']),
+                'customer': row['customer_id'],
+                'provider': row['provider_id'],
+                'service': row['service_id'],
+                'price': price.to_representation(row['price']),
+                'discount': discount.to_representation(row['discount']),
+                'delivery_days': row['delivery_days'],
+                'revisions': row['revisions'],
+                'signature': row['signature'],
+                'status': row['status'],
+                'version': row['version'],
+                'created_at': datetime_field.to_representation(row['created_at']),
+                'updated_at': datetime_field.to_representation(row['updated_at']),
+                'service_title': row['service__title'],
+                'provider_name': row['provider__username'],
+                'customer_name': row['customer__username'],
+                'delivery_date': delivery_date(row['created_at'], row['delivery_days']),
+            }
+            for row in rows
+        ]
+
 
@@ -0,0 +1,332 @@
+"""
+Content-addressed media storage.
+
+Files are stored under the directory their ``upload_to`` gives, but named by
+content: ``<upload_to dir>/<first 40 hex chars of sha256><ext>``. Identical
+uploads to the same kind of field therefore share one file, and a stored name
+never changes content, so core/views.serve_file can send it with immutable
+cache headers.
+
+Each stored name has a StoredBlob row counting the field values that point
+at it. Saving adds a reference and ``delete()`` drops one. Both lock the row
+in the caller's transaction, so a rolled back save leaves no reference
+behind. The file is removed, after commit, only by the transaction that
+deletes a row still at zero. A save of the same content that runs at the
+same time waits for that lock. It still holds its own copy of the bytes, and
+puts the file back if it is gone.
+
+Deleting a row that refers to files, or saving it with a different file,
+drops those references (the replaced file once the save commits). A name
+stored before content addressing has no StoredBlob row: it is not shared,
+so deleting or replacing it removes the file.
+
+Inside ``deferred_blob_refs()`` the increments of all files saved in the
+block are written with one upsert when it ends.
+api/ingest.create_service uses it so its query count does not grow with the
+number of files.
+`manage.py rebuild_blob_refs` recounts from the database if they drift.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from django.core.files.storage import FileSystemStorage
+from django.db import connections, models, router, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, pre_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# 160 bits of sha256 keeps the longest upload_to path within a
+# default 100-character FileField.
+HASH_LENGTH = 40
+MAX_EXT_LENGTH = 10
+
+_batch = threading.local()
+
+
+def _remove_temp(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def deferred_blob_refs():
+    """
+    Buffer the reference increments of files saved inside the block and
+    write them in one statement at its end. Use it inside the transaction
+    that attaches the files. Nested blocks join the outermost one.
+    """
+    if getattr(_batch, 'refs', None) is not None:
+        yield
+        return
+    _batch.refs = {}
+    try:
+        yield
+        _add_refs(_batch.refs)
+    finally:
+        refs, _batch.refs = _batch.refs, None
+        # Left over if the block failed before the references were written.
+        for _, _, _, temp_path, _ in refs.values():
+            _remove_temp(temp_path)
+
+
+def _add_refs(refs):
+    """
+    Write ``refs`` ({name: (sha256, size, count, temp_path, storage)}) in one
+    upsert, then put each file in place from its temporary copy unless it is
+    already there. The upsert locks the rows until the transaction ends, so
+    no delete can remove a file between this check and the commit.
+    """
+    from .models import StoredBlob
+
+    if not refs:
+        return
+    connection = connections[router.db_for_write(StoredBlob)]
+    table = connection.ops.quote_name(StoredBlob._meta.db_table)
+    now = timezone.now()
+    values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(refs))
+    params = [
+        value for name, (sha256, size, count, _, _) in refs.items()
+        for value in (name, sha256, size, count, now)
+    ]
+    if connection.vendor == 'mysql':
+        conflict = 'ON DUPLICATE KEY UPDATE refcount = refcount + VALUES(refcount)'
+    else:
+        # SQLite >= 3.24 and PostgreSQL
+        conflict = f'ON CONFLICT (name) DO UPDATE SET refcount = {table}.refcount + excluded.refcount'
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (name, sha256, size, refcount, created_at) VALUES {values} {conflict}',
+                params,
+            )
+        for name, (_, _, _, temp_path, storage) in refs.items():
+            full_path = storage.path(name)
+            if os.path.exists(full_path):
+                _remove_temp(temp_path)
+            else:
+                if storage.file_permissions_mode is not None:
+                    os.chmod(temp_path, storage.file_permissions_mode)
+                os.replace(temp_path, full_path)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is chosen from the content in _save(); equal names mean equal files.
+        return name
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+        if len(ext) > MAX_EXT_LENGTH:
+            ext = ''
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+
+        # Hash while writing to a temporary file next to the destination, so
+        # the final step is a rename on the same filesystem.
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=full_directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    size += len(chunk)
+                    temp.write(chunk)
+            sha256 = digest.hexdigest()
+            blob_name = os.path.join(directory, sha256[:HASH_LENGTH] + ext).replace('\\', '/')
+
+            refs = getattr(_batch, 'refs', None)
+            if refs is None:
+                _add_refs({blob_name: (sha256, size, 1, temp_path, self)})
+            elif blob_name in refs:
+                _remove_temp(temp_path)
+                sha256, size, count, first_temp, storage = refs[blob_name]
+                refs[blob_name] = (sha256, size, count + 1, first_temp, storage)
+            else:
+                refs[blob_name] = (sha256, size, 1, temp_path, self)
+        except BaseException:
+            _remove_temp(temp_path)
+            raise
+        return blob_name
+
+    def delete(self, name):
+        """Drop one reference to ``name``; remove the file once nothing refers to it."""
+        from .models import StoredBlob
+
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                # Stored before content addressing (or by another storage): not shared.
+                super().delete(name)
+                return
+            StoredBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1 if blob.refcount else 0)
+        if blob.refcount <= 1:
+            transaction.on_commit(lambda: self._remove_unreferenced(name))
+
+    def _remove_unreferenced(self, name):
+        from .models import StoredBlob
+
+        with transaction.atomic():
+            # The DELETE holds the row until commit: a save of the same
+            # content waits for it, then finds the file gone and restores it.
+            deleted, _ = StoredBlob.objects.filter(name=name, refcount=0).delete()
+            if deleted:
+                try:
+                    super().delete(name)
+                except OSError:
+                    logger.exception("Could not delete stored file %s", name)
+                    raise
+
+
+def release_files(*names):
+    """Drop one reference to each stored name (empty names are skipped)."""
+    from django.core.files.storage import default_storage
+
+    if not isinstance(default_storage, ContentAddressedStorage):
+        # Other storages keep their files when rows are deleted, as before.
+        return
+    for name in names:
+        if name:
+            try:
+                default_storage.delete(name)
+            except OSError:
+                logger.exception("Could not delete stored file %s", name)
+
+
+def variant_names(variants):
+    """Stored names in an api/images.py variants dict."""
+    return [entry[ext] for entry in (variants or {}).values() for ext in ('webp', 'jpeg') if entry.get(ext)]
+
+
+def referenced_names():
+    """Every stored name the database refers to, once per reference."""
+    from .models import ChunkedUpload, Customer, Provider, ServiceCredential, ServiceMedia
+
+    for image, variants in ServiceMedia.objects.values_list('image', 'variants').iterator():
+        yield image
+        yield from variant_names(variants)
+    yield from ServiceCredential.objects.values_list('file', flat=True).iterator()
+    for row in Provider.objects.values_list(
+        'profile_picture', 'legal_id_front', 'legal_id_back', 'profile_picture_variants'
+    ).iterator():
+        yield from row[:3]
+        yield from variant_names(row[3])
+    yield from Customer.objects.values_list('profile_picture', flat=True).iterator()
+    yield from ChunkedUpload.objects.values_list('file', flat=True).iterator()
+
+
+def _is_blob_name(name):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return len(stem) == HASH_LENGTH and all(char in '0123456789abcdef' for char in stem)
+
+
+def rebuild_refcounts(delete_unreferenced=False):
+    """
+    Recount every blob's references from the database. Blobs nothing refers
+    to are kept at zero, or removed with their files when
+    ``delete_unreferenced``. Returns (updated, created, removed).
+    """
+    from django.core.files.storage import default_storage
+    from .models import StoredBlob
+
+    counts = {}
+    for name in referenced_names():
+        if name and _is_blob_name(name):
+            counts[name] = counts.get(name, 0) + 1
+
+    updated, removed = [], 0
+    for blob in StoredBlob.objects.iterator():
+        refcount = counts.pop(blob.name, 0)
+        if refcount == 0 and delete_unreferenced:
+            blob.delete()
+            FileSystemStorage.delete(default_storage, blob.name)
+            removed += 1
+        elif blob.refcount != refcount:
+            blob.refcount = refcount
+            updated.append(blob)
+    StoredBlob.objects.bulk_update(updated, ['refcount'], batch_size=500)
+
+    # Referenced blobs without a row (e.g. restored from a backup without the table).
+    created = []
+    for name, refcount in counts.items():
+        if not default_storage.exists(name):
+            continue
+        digest = hashlib.sha256()
+        with default_storage.open(name, 'rb') as stored:
+            for chunk in stored.chunks():
+                digest.update(chunk)
+        created.append(StoredBlob(
+            name=name, sha256=digest.hexdigest(), size=default_storage.size(name), refcount=refcount,
+        ))
+    StoredBlob.objects.bulk_create(created, batch_size=500)
+    return len(updated), len(created), removed
+
+
+def _release_service_media(sender, instance, **kwargs):
+    release_files(instance.image.name, *variant_names(instance.variants))
+
+
+def _release_service_credential(sender, instance, **kwargs):
+    release_files(instance.file.name)
+
+
+def _release_provider(sender, instance, **kwargs):
+    release_files(
+        instance.profile_picture.name, instance.legal_id_front.name, instance.legal_id_back.name,
+        *variant_names(instance.profile_picture_variants),
+    )
+
+
+def _release_customer(sender, instance, **kwargs):
+    release_files(instance.profile_picture.name)
+
+
+def _release_chunked_upload(sender, instance, **kwargs):
+    release_files(instance.file.name)
+
+
+def _release_replaced_files(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Drop the references of the files a save is about to replace, once it commits."""
+    if raw or instance._state.adding:
+        return
+    names = [
+        field.attname for field in sender._meta.concrete_fields
+        if isinstance(field, models.FileField) and (update_fields is None or field.name in update_fields)
+    ]
+    if not names:
+        return
+    stored = sender._base_manager.filter(pk=instance.pk).values(*names).first()
+    if stored is None:
+        return
+    # Variant fields are not FileFields: api/images.py releases those itself.
+    replaced = [stored[name] for name in names if stored[name] and stored[name] != getattr(instance, name).name]
+    if replaced:
+        transaction.on_commit(lambda: release_files(*replaced))
+
+
+def connect_signals():
+    from .models import ChunkedUpload, Customer, Provider, ServiceCredential, ServiceMedia
+
+    for model in (ServiceMedia, ServiceCredential, Provider, Customer, ChunkedUpload):
+        pre_save.connect(_release_replaced_files, sender=model, dispatch_uid=f'storage_replace_{model._meta.model_name}')
+    post_delete.connect(_release_service_media, sender=ServiceMedia, dispatch_uid='storage_service_media')
+    post_delete.connect(_release_service_credential, sender=ServiceCredential, dispatch_uid='storage_credential')
+    post_delete.connect(_release_provider, sender=Provider, dispatch_uid='storage_provider')
+    post_delete.connect(_release_customer, sender=Customer, dispatch_uid='storage_customer')
+    post_delete.connect(_release_chunked_upload, sender=ChunkedUpload, dispatch_uid='storage_chunked_upload')
@@ -0,0 +1,58 @@
+"""
+Minimal in-process background execution.
+
+Work is run on a shared thread pool so request handlers can return right away.
+Jobs submitted under a key are de-duplicated while one is queued or running,
+which keeps bursts of identical refresh requests from piling up.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                thread_name_prefix='bg',
+            )
+        return _executor
+
+
+def _run(key, fn, args, kwargs):
+    close_old_connections()
+    try:
+        fn(*args, **kwargs)
+    except Exception:
+        logger.exception("Background job %s failed", key or fn.__name__)
+    finally:
+        if key is not None:
+            with _pending_lock:
+                _pending.discard(key)
+        close_old_connections()
+
+
+def run_in_background(fn, *args, key=None, **kwargs):
+    """
+    Schedule ``fn(*args, **kwargs)`` on the worker pool.
+    Returns False if a job with the same ``key`` is already pending.
+    """
+    if key is not None:
+        with _pending_lock:
+            if key in _pending:
+                return False
+            _pending.add(key)
+    _get_executor().submit(_run, key, fn, args, kwargs)
+    return True
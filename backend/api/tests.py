@@ -1,3 +1,1103 @@
-from django.test import TestCase
+import base64
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .activity import publish, recent_activity
+from .authentication import _local, get_user_for_token
+from .bulk import import_services
+from .catalog_cache import GENERATION_KEY, bump_catalog_generation, catalog_generation
+from .facets import PRICE_BUCKETS
+from .ingest import create_services_bulk
+from chat.models import Room
+
+from .models import (
+    ActivityItem, ChunkedUpload, Customer, CustomerStats, Order, Provider, ProviderDailyStats, ProviderStats, RecommendationList, Service,
+    ServiceSearchDocument, StoredBlob, Tag, UserPreference,
+)
+from .serializers import ServiceReadSerializer
+from .orders import transition, user_group
+from .provider_stats import rebuild_provider_stats
+from .related import rebuild_related, related_service_ids, service_key
+from .search import search_services
+from .recommendations import (
+    POPULAR_KEY, compute_for_user, recommended_service_ids, refresh_popular, refresh_user, user_key,
+)
+from .storage import ContentAddressedStorage, deferred_blob_refs
+from .uploads import temp_path
+
+
+# The suite runs without Redis: the shared cache is process-local here.
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ServiceCreateTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        user = User.objects.create_user(username='provider', password='x')
+        Provider.objects.create(user=user, name='Provider', onboarding_type='manual')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+
+    def create(self, tags, images=0, certs=0):
+        data = {
+            'service_title': 'Logo design',
+            'service_description': 'Vector logos',
+            'service_type': 'remote',
+            'price_min': '10.00',
+            'price_max': '20.00',
+            'tags': json.dumps(tags),
+            'service_images': [
+                SimpleUploadedFile(f'img{i}.gif', b'GIF89a', content_type='image/gif') for i in range(images)
+            ],
+            'certifications': [
+                SimpleUploadedFile(f'cert{i}.pdf', b'%PDF-1.4', content_type='application/pdf') for i in range(certs)
+            ],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/services/create/', data, **self.auth)
+        self.assertEqual(response.status_code, 201, response.content)
+        return Service.objects.get(uuid=response.json()['service_id']), len(queries)
+
+    def test_query_count_does_not_grow_with_tags_or_files(self):
+        self.create([])  # warm the token cache so both measured requests see it
+        _, baseline = self.create(['design'], images=1, certs=1)
+        Tag.objects.create(name='existing')
+        service, queries = self.create(
+            [f'tag{i}' for i in range(20)] + ['existing'], images=5, certs=5
+        )
+        self.assertEqual(queries, baseline)
+        self.assertEqual(service.tags.count(), 21)
+        self.assertEqual(service.media.count(), 5)
+        self.assertEqual(service.credentials.count(), 5)
+
+    def test_flat_read_matches_serializer(self):
+        data = {
+            'service_title': 'Logo design', 'service_description': 'Vector logos', 'service_type': 'remote',
+            'price_min': '10.00', 'price_max': '20.00', 'tags': json.dumps(['zeta', 'alpha', 'mid']),
+            # Distinct contents: identical files would share one stored name.
+            'service_images': [
+                SimpleUploadedFile(f'img{i}.gif', b'GIF89a' + bytes([i]), content_type='image/gif')
+                for i in range(6)
+            ],
+            'certifications': [
+                SimpleUploadedFile(f'cert{i}.pdf', b'%PDF-1.4' + bytes([i]), content_type='application/pdf')
+                for i in range(3)
+            ],
+        }
+        self.assertEqual(self.client.post('/api/services/create/', data, **self.auth).status_code, 201)
+        request = RequestFactory().get('/')
+        services = Service.objects.all()
+        regular = ServiceReadSerializer(
+            ServiceReadSerializer.optimize_queryset(services), many=True, context={'request': request}
+        ).data
+        self.assertEqual(ServiceReadSerializer.values_data(services, request=request), regular)
+        cover = hashlib.sha256(b'GIF89a' + bytes([0])).hexdigest()[:40]
+        self.assertIn(cover, regular[0]['images'][0])
+        self.assertEqual(regular[0]['credentials'][0]['name'], 'cert0.pdf')
+        self.assertEqual(regular[0]['tags'], ['alpha', 'mid', 'zeta'])
+
+    def test_tags_are_normalized_and_deduplicated(self):
+        Tag.objects.create(name='logo')
+        service, _ = self.create([' Logo ', 'LOGO', 'Branding', '', 7])
+        self.assertEqual(sorted(service.tags.values_list('name', flat=True)), ['branding', 'logo'])
+        self.assertEqual(Tag.objects.filter(name='logo').count(), 1)
+
+
+def tampered_cursor(*values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ProviderServicesListTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='provider')
+        profile = Provider.objects.create(user=user, name='Provider', onboarding_type='manual')
+        for i in range(3):
+            Service.objects.create(
+                provider=profile, title=f'Service {i}', description='d', service_type='remote',
+                price_min=1, price_max=2,
+            )
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+
+    def get(self, **params):
+        return self.client.get('/api/services/', params, **self.auth)
+
+    def test_pages_follow_the_cursor(self):
+        first = self.get(limit=2, fields='id').json()
+        second = self.get(limit=2, fields='id', cursor=first['next_cursor']).json()
+        self.assertEqual((len(first['results']), len(second['results']), second['next_cursor']), (2, 1, None))
+
+    def test_tampered_cursor_is_rejected(self):
+        for cursor in (tampered_cursor('garbage', 'x'), tampered_cursor('2026-01-01T00:00:00Z', 'x'), 'not-base64!'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.get(limit=2, cursor=cursor).status_code, 400)
+
+    @override_settings(PAGINATION={'UNPAGINATED_LIMIT': 2})
+    def test_unpaginated_list_is_capped(self):
+        response = self.get(fields='id,title')
+        self.assertEqual([row['title'] for row in response.json()], ['Service 2', 'Service 1'])
+
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class FacetTests(TestCase):
+
+    def setUp(self):
+        self.services = []
+        for i, location in enumerate(('berlin', 'paris', '')):
+            user = User.objects.create_user(username=f'provider{i}')
+            profile = Provider.objects.create(user=user, name='Provider', onboarding_type='manual', location=location)
+            # Each provider gets a shifted slice of these rows; the second one is inactive.
+            for j, (service_type, status, price) in enumerate([
+                ('remote', 'verified', 100), ('visit', 'verified', 800), ('remote', 'pending', 2500),
+                ('visit', 'rejected', 20000), ('remote', 'verified', 900 + i),
+            ][i:]):
+                self.services.append(Service.objects.create(
+                    provider=profile, title=f'Service {i}.{j}', description='d', service_type=service_type,
+                    verification_status=status, price_min=price, price_max=price * 2, is_active=j != 1,
+                ))
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+
+    def browse(self, **params):
+        response = self.client.get('/api/customer/discover-services/browse/', {**params, 'page_size': 50}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def naive_matches(self, service, params, skip=None):
+        """The filters of ``params`` applied one by one in Python, except facet ``skip``."""
+        checks = {
+            'service_type': lambda: service.service_type == params['service_type'],
+            'verification_status': lambda: service.verification_status == params['verification_status'],
+            'location': lambda: service.provider.location == params['location'],
+            'min_price': lambda: service.price_max >= params['min_price'],
+            'max_price': lambda: service.price_min <= params['max_price'],
+            'price_bucket': lambda: self.bucket(service) == params['price_bucket'],
+        }
+        facet_of = {'min_price': 'price', 'max_price': 'price', 'price_bucket': 'price'}
+        return service.is_active and all(
+            checks[name]() for name in params if facet_of.get(name, name) != skip
+        )
+
+    def bucket(self, service):
+        for bucket, low, high in PRICE_BUCKETS:
+            if service.price_min >= low and (high is None or service.price_min < high):
+                return bucket
+
+    def naive_facets(self, params):
+        counts = {'service_type': {}, 'verification_status': {}, 'price_bucket': {}, 'location': {}}
+        values = {
+            'service_type': ('service_type', lambda s: s.service_type, [v for v, _ in Service.SERVICE_TYPE_CHOICES]),
+            'verification_status': (
+                'verification_status', lambda s: s.verification_status,
+                [v for v, _ in Service.VERIFICATION_STATUS_CHOICES],
+            ),
+            'price_bucket': ('price', self.bucket, [bucket for bucket, _, _ in PRICE_BUCKETS]),
+            'location': ('location', lambda s: s.provider.location, ['berlin', 'paris']),
+        }
+        for facet, (skip, value_of, choices) in values.items():
+            for value in choices:
+                count = sum(
+                    1 for service in self.services
+                    if value_of(service) == value and self.naive_matches(service, params, skip)
+                )
+                if count or facet != 'location':
+                    counts[facet][value] = count
+        return counts
+
+    def test_results_match_the_filters(self):
+        params = {'service_type': 'remote', 'verification_status': 'verified'}
+        expected = {str(s.pk) for s in self.services if self.naive_matches(s, params)}
+        self.assertEqual({row['id'] for row in self.browse(**params)['results']}, expected)
+        self.assertEqual(len(expected), 4)
+
+    def test_facet_ignores_its_own_filter_only(self):
+        facets = self.browse(service_type='remote', location='berlin')['facets']
+        # Both types are counted within berlin, not just the selected one ...
+        self.assertEqual(facets['service_type'], {'remote': 3, 'visit': 1})
+        # ... while the other facets only see berlin's remote services.
+        self.assertEqual(facets['verification_status'], {'verified': 2, 'pending': 1, 'rejected': 0})
+        self.assertEqual(facets['location'], {'berlin': 3, 'paris': 1})
+
+    def test_counts_match_naive_per_facet_counts(self):
+        for params in (
+            {},
+            {'service_type': 'visit'},
+            {'verification_status': 'verified', 'price_bucket': '500_2000'},
+            {'location': 'paris', 'min_price': '1000', 'max_price': '3000'},
+            {'service_type': 'remote', 'verification_status': 'pending', 'location': 'berlin'},
+        ):
+            with self.subTest(params=params):
+                naive = {
+                    name: Decimal(value) if name.endswith('_price') else value for name, value in params.items()
+                }
+                self.assertEqual(self.browse(**params)['facets'], self.naive_facets(naive))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class BulkServiceTests(TestCase):
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.user = User.objects.create_user(username='provider')
+        self.profile = Provider.objects.create(user=self.user, name='Provider', onboarding_type='manual')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=self.user).key}'}
+
+    def row(self, i, **fields):
+        return {
+            'service_title': f'Service {i}', 'service_description': 'Work', 'service_type': 'remote',
+            'price_min': '10.00', 'price_max': '20.00', 'tags': ['logo', f'tag{i}'], **fields,
+        }
+
+    def import_file(self, name, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/services/import/', {'file': SimpleUploadedFile(name, content.encode())}, **self.auth
+            )
+        return response
+
+    def ndjson(self, rows):
+        return ''.join(line if isinstance(line, str) else json.dumps(line) + '\n' for line in rows)
+
+    def export(self, fmt):
+        response = self.client.get('/api/services/export/', {'type': fmt}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def snapshot(self):
+        return sorted(
+            (s.title, s.description, s.service_type, s.price_min, s.price_max, tuple(t.name for t in s.tags.all()))
+            for s in Service.objects.filter(provider=self.profile)
+        )
+
+    def test_bad_rows_are_reported_and_the_rest_imported(self):
+        content = self.ndjson([
+            self.row(1),
+            'not json\n',
+            self.row(3, price_min='30.00'),  # above price_max
+            self.row(4, service_type=None),
+            self.row(5),
+        ])
+        response = self.import_file('services.ndjson', content)
+        self.assertEqual(response.status_code, 201)
+        summary = response.json()
+        self.assertEqual((summary['created'], summary['failed']), (2, 3))
+        self.assertEqual([error['line'] for error in summary['errors']], [2, 3, 4])
+        self.assertEqual(
+            sorted(Service.objects.values_list('title', flat=True)), ['Service 1', 'Service 5'],
+        )
+
+    @override_settings(SERVICE_BULK={'CHUNK_SIZE': 2})
+    def test_rows_are_inserted_per_chunk(self):
+        content = self.ndjson([self.row(i) for i in range(5)])
+        sizes = []
+
+        def insert(provider, rows):
+            sizes.append(len(rows))  # the chunk list is reused after the call
+            return create_services_bulk(provider, rows)
+
+        with mock.patch('api.bulk.create_services_bulk', side_effect=insert):
+            summary = import_services(self.profile, io.BytesIO(content.encode()), 'ndjson')
+        self.assertEqual(summary['created'], 5)
+        self.assertEqual(sizes, [2, 2, 1])
+        self.assertEqual(Service.objects.count(), 5)
+
+    @override_settings(SERVICE_BULK={'MAX_ROWS': 2})
+    def test_rows_beyond_the_limit_are_dropped(self):
+        summary = self.import_file('services.ndjson', self.ndjson([self.row(i) for i in range(3)])).json()
+        self.assertEqual((summary['created'], summary['truncated']), (2, True))
+
+    def test_import_indexes_and_bumps_the_generation(self):
+        before = catalog_generation()
+        self.import_file('services.ndjson', self.ndjson([self.row(1), self.row(2)]))
+        self.assertGreater(catalog_generation(), before)
+        self.assertEqual(
+            sorted(ServiceSearchDocument.objects.values_list('title', 'tags')),
+            [('Service 1', 'logo tag1'), ('Service 2', 'logo tag2')],
+        )
+        self.assertEqual([s.title for s in search_services('tag2')], ['Service 2'])
+
+    def test_export_round_trips_through_import(self):
+        self.import_file('services.ndjson', self.ndjson([
+            self.row(1), self.row(2, service_type='visit', service_description='Line one\nline "two", three'),
+        ]))
+        original = self.snapshot()
+        for fmt in ('ndjson', 'csv'):
+            with self.subTest(fmt=fmt):
+                exported = self.export(fmt)
+                Service.objects.all().delete()
+                summary = self.import_file(f'services.{fmt}', exported).json()
+                self.assertEqual((summary['created'], summary['failed']), (2, 0))
+                self.assertEqual(self.snapshot(), original)
+
+@override_settings(CACHES=LOCAL_CACHES)
+class LoginTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='both', email='both@example.com', password='secret')
+        Customer.objects.create(user=self.user, name='Both', email='both@example.com')
+        Provider.objects.create(user=self.user, name='Both', onboarding_type='manual')
+
+    def login(self, password='secret'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/login/', {'email': 'both@example.com', 'password': password}, content_type='application/json'
+            )
+        return response, len(queries)
+
+    def test_returning_user_logs_in_with_one_query(self):
+        UserPreference.objects.create(user=self.user, last_active_role='customer')
+        Token.objects.create(user=self.user)
+        response, queries = self.login()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(queries, 1)
+        self.assertEqual(response.json()['role'], 'provider')
+        self.assertEqual(response.json()['available_roles'], ['customer', 'provider'])
+        self.assertEqual(response.json()['last_active_role'], 'customer')
+
+    def test_first_login_creates_preference_and_primes_token(self):
+        response, _ = self.login()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['last_active_role'], 'provider')
+        self.assertEqual(Token.objects.get(user=self.user).key, response.json()['token'])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_for_token(response.json()['token']).pk, self.user.pk)
+
+    def test_wrong_password_is_rejected(self):
+        response, _ = self.login(password='wrong')
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class OrderCreateTests(TestCase):
+
+    def setUp(self):
+        self.provider = User.objects.create_user(username='provider')
+        self.customer = User.objects.create_user(username='customer')
+        profile = Provider.objects.create(user=self.provider, name='Provider', onboarding_type='manual')
+        self.services = [
+            Service.objects.create(
+                provider=profile, title=f'Service {i}', description='d', service_type='remote',
+                price_min=1, price_max=2,
+            )
+            for i in range(3)
+        ]
+        self.room, _ = Room.get_or_create_for_pair(self.provider.pk, self.customer.pk)
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=self.provider).key}'}
+
+    def create(self, **data):
+        return self.client.post(
+            '/api/orders/create/', {'price': '100.00', 'delivery_days': 3, 'room_name': self.room.name, **data},
+            content_type='application/json', **self.auth,
+        )
+
+    def test_explicit_service(self):
+        response = self.create(service=str(self.services[0].pk))
+        self.assertEqual(response.status_code, 201, response.content)
+        order = Order.objects.get(pk=response.json()['order_id'])
+        self.assertEqual(
+            (order.service_id, order.customer_id, order.room_id),
+            (self.services[0].pk, self.customer.pk, self.room.pk),
+        )
+
+    def test_without_service_uses_the_newest(self):
+        response = self.create()
+        self.assertEqual(response.status_code, 201, response.content)
+        newest = Service.objects.filter(provider__user=self.provider).order_by('-created_at', 'uuid').first()
+        self.assertEqual(Order.objects.get(pk=response.json()['order_id']).service_id, newest.pk)
+
+    def test_room_the_provider_is_not_in(self):
+        Room.objects.create(name='elsewhere').participants.add(self.customer)
+        self.assertEqual(self.create(room_name='elsewhere').status_code, 404)
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES,
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+)
+class OrderTransitionTests(TestCase):
+
+    def setUp(self):
+        self.provider = User.objects.create_user(username='provider')
+        self.customer = User.objects.create_user(username='customer')
+        profile = Provider.objects.create(user=self.provider, name='Provider', onboarding_type='manual')
+        service = Service.objects.create(
+            provider=profile, title='Service', description='d', service_type='remote', price_min=1, price_max=2,
+        )
+        self.order = Order.objects.create(
+            customer=self.customer, provider=self.provider, service=service, price=100, delivery_days=3,
+        )
+
+    def move(self, user, status, **data):
+        token, _ = Token.objects.get_or_create(user=user)
+        return self.client.post(
+            f'/api/orders/{self.order.pk}/transition/', {'status': status, **data},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Token {token.key}',
+        )
+
+    def test_provider_moves_the_order_forward(self):
+        for version, status in enumerate(['accepted', 'in_progress', 'completed'], start=1):
+            response = self.move(self.provider, status)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual((response.json()['status'], response.json()['version']), (status, version))
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.version), ('completed', 3))
+
+    def test_forbidden_transitions(self):
+        self.assertEqual(self.move(self.provider, 'completed').status_code, 409)
+        self.assertEqual(self.move(self.provider, 'shipped').status_code, 400)
+        self.assertEqual(self.move(self.provider, 'cancelled').status_code, 200)
+        response = self.move(self.provider, 'accepted')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['status'], 'cancelled')
+
+    def test_who_may_transition(self):
+        self.assertEqual(self.move(self.customer, 'accepted').status_code, 403)
+        stranger = User.objects.create_user(username='stranger')
+        self.assertEqual(self.move(stranger, 'cancelled').status_code, 404)
+        self.assertEqual(self.move(self.customer, 'cancelled').status_code, 200)
+
+    def test_stale_version_is_rejected(self):
+        self.assertEqual(self.move(self.provider, 'accepted', version=0).status_code, 200)
+        response = self.move(self.customer, 'cancelled', version=0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual((response.json()['status'], response.json()['version']), ('accepted', 1))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'accepted')
+
+    def test_event_is_published_after_commit(self):
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(user_group(self.customer.pk), channel)
+        # Publish inline rather than on the worker pool, so the test can wait for it.
+        with mock.patch('api.orders.run_in_background', side_effect=lambda fn, *args: fn(*args)) as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.assertEqual(self.move(self.provider, 'accepted').status_code, 200)
+            publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+        publish.assert_called_once()
+        event = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(
+            (event['type'], event['order_id'], event['status'], event['previous_status'], event['version']),
+            ('order_event', str(self.order.pk), 'accepted', 'pending', 1),
+        )
+
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ActivityFeedTests(TestCase):
+
+    def setUp(self):
+        self.start = timezone.now()
+        self.provider = User.objects.create_user(username='provider')
+        self.customer = User.objects.create_user(username='customer')
+        profile = Provider.objects.create(user=self.provider, name='Provider', onboarding_type='manual')
+        service = Service.objects.create(
+            provider=profile, title='Logo', description='d', service_type='remote', price_min=1, price_max=2,
+        )
+        self.order = Order.objects.create(
+            customer=self.customer, provider=self.provider, service=service, price=100, discount=10, delivery_days=3,
+        )
+
+    def at(self, minutes):
+        return mock.patch('django.utils.timezone.now', return_value=self.start + timedelta(minutes=minutes))
+
+    def move(self, status, minutes, user=None):
+        with self.at(minutes), mock.patch('api.orders.run_in_background'):
+            transition(self.order.pk, user or self.provider, status)
+
+    def feed(self, user):
+        return list(
+            ActivityItem.objects.filter(user=user).order_by('-created_at', '-id').values_list('content', flat=True)
+        )
+
+    def test_transition_refreshes_customer_stats(self):
+        stats = CustomerStats.objects.get(user=self.customer)
+        self.assertEqual((stats.total_investment, stats.active_projects, stats.saved_experts), (90, 1, 1))
+        self.move('accepted', 1)
+        stats.refresh_from_db()
+        self.assertEqual([row['status'] for row in stats.active_orders], ['ACCEPTED'])
+        self.move('cancelled', 2, user=self.customer)
+        stats.refresh_from_db()
+        self.assertEqual((stats.total_investment, stats.active_projects, stats.active_orders), (0, 0, []))
+
+    def test_transitions_reach_both_feeds(self):
+        self.move('accepted', 1)
+        self.move('in_progress', 2)
+        self.assertEqual(self.feed(self.customer), [
+            "Order Update: 'Logo' with Provider is now In Progress.",
+            "Order Update: 'Logo' with Provider is now Accepted.",
+        ])
+        self.assertEqual(self.feed(self.provider)[0], "Order Update: 'Logo' with customer is now In Progress.")
+
+    @override_settings(ACTIVITY_FEED={'MAX_ITEMS': 2})
+    def test_feed_is_trimmed_per_user(self):
+        other = User.objects.create_user(username='other')
+        with self.at(0):
+            publish({other.pk: 'Untouched'}, 'message')
+        self.move('accepted', 1)
+        self.move('in_progress', 2)
+        self.move('completed', 3)
+        for user in (self.customer, self.provider):
+            feed = self.feed(user)
+            self.assertEqual(len(feed), 2)
+            self.assertTrue(feed[0].startswith('Order Completed'))
+        self.assertEqual(self.feed(other), ['Untouched'])
+
+    @override_settings(ACTIVITY_FEED={'MERGE_MESSAGES_WITHIN': 10 * 60})
+    def test_grouped_entries_merge_within_the_window(self):
+        with self.at(0):
+            publish({self.customer.pk: 'First message'}, 'message', group_key='room:1')
+        self.move('accepted', 1)
+        with self.at(5):
+            publish({self.customer.pk: 'Second message'}, 'message', group_key='room:1')
+        # Rewritten in place and moved above the order event ...
+        self.assertEqual(self.feed(self.customer), [
+            'Second message', "Order Update: 'Logo' with Provider is now Accepted.",
+        ])
+        with self.at(5):
+            self.assertEqual(recent_activity(self.customer.pk)[0]['time_ago'], 'JUST NOW')
+        # ... but another room, or the same room after the window, adds a new entry.
+        with self.at(6):
+            publish({self.customer.pk: 'Elsewhere'}, 'message', group_key='room:2')
+        with self.at(16):
+            publish({self.customer.pk: 'Much later'}, 'message', group_key='room:1')
+        self.assertEqual(self.feed(self.customer)[:3], ['Much later', 'Elsewhere', 'Second message'])
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ProviderStatsTests(TestCase):
+
+    def setUp(self):
+        self.customer = User.objects.create_user(username='customer')
+        self.services = []
+        for i in range(2):
+            user = User.objects.create_user(username=f'provider{i}')
+            profile = Provider.objects.create(user=user, name=f'Provider {i}', onboarding_type='manual')
+            self.services.append(Service.objects.create(
+                provider=profile, title='Service', description='d', service_type='remote', price_min=1, price_max=2,
+            ))
+
+    def order(self, service, price, days_ago=0):
+        order = Order.objects.create(
+            customer=self.customer, provider=service.provider.user, service=service,
+            price=price, discount=1, delivery_days=3,
+        )
+        if days_ago:
+            order.created_at -= timedelta(days=days_ago)
+            order.save()
+        return order
+
+    def snapshot(self):
+        """Both tables as comparable rows, leaving out rows that only hold zeros."""
+        stats = {
+            row.pop('provider_id'): row
+            for row in ProviderStats.objects.values().order_by('provider_id')
+            if any(value for key, value in row.items() if key not in ('provider_id', 'updated_at'))
+        }
+        for row in stats.values():
+            del row['updated_at']
+        daily = {
+            (row['provider_id'], row['day']): (row['orders_created'], row['orders_completed'], row['earnings'])
+            for row in ProviderDailyStats.objects.values()
+            if row['orders_created'] or row['orders_completed'] or row['earnings']
+        }
+        return stats, daily
+
+    def assertMatchesRebuild(self):
+        incremental = self.snapshot()
+        rebuild_provider_stats()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_incremental_stats_match_a_rebuild(self):
+        first, second = self.services
+        provider = first.provider.user
+        orders = [self.order(first, 100 + i, days_ago=i * 20) for i in range(4)] + [self.order(second, 50)]
+        self.assertMatchesRebuild()
+
+        for status in ('accepted', 'in_progress', 'completed'):
+            transition(orders[0].pk, provider, status)
+        transition(orders[1].pk, self.customer, 'cancelled')
+        transition(orders[4].pk, second.provider.user, 'accepted')
+        self.assertMatchesRebuild()
+
+        # save() goes through the signals rather than apply_order_change().
+        orders[2].status = 'completed'
+        orders[2].price = 300
+        orders[2].save()
+        orders[3].provider, orders[3].service = second.provider.user, second
+        orders[3].save()
+        self.assertMatchesRebuild()
+
+        orders[0].delete()
+        orders[2].delete()
+        Order.objects.filter(pk=orders[1].pk).get().delete()
+        self.assertMatchesRebuild()
+
+    def test_later_saves_keep_the_completion_day(self):
+        service = self.services[0]
+        provider = service.provider.user
+        order = self.order(service, 100)
+        for status in ('accepted', 'in_progress', 'completed'):
+            transition(order.pk, provider, status)
+        completed = ProviderDailyStats.objects.filter(provider=provider, orders_completed=1).values_list('day', 'earnings')
+        before = list(completed)
+        later = timezone.now() + timedelta(days=5)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            order.refresh_from_db()
+            order.revisions = 1
+            order.save()
+        self.assertEqual(list(completed), before)
+        self.assertMatchesRebuild()
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class OrderListTests(TestCase):
+
+    def setUp(self):
+        self.provider = User.objects.create_user(username='provider')
+        self.customer = User.objects.create_user(username='customer')
+        profile = Provider.objects.create(user=self.provider, name='Provider', onboarding_type='manual')
+        service = Service.objects.create(
+            provider=profile, title='Service', description='d', service_type='remote', price_min=1, price_max=2,
+        )
+        self.orders = [
+            Order.objects.create(
+                customer=self.customer, provider=self.provider, service=service, price=10 + i, delivery_days=3,
+            )
+            for i in range(3)
+        ]
+
+    def get(self, user, party, **params):
+        token, _ = Token.objects.get_or_create(user=user)
+        return self.client.get(f'/api/{party}/orders/', params, HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_pages_follow_the_cursor(self):
+        first = self.get(self.customer, 'customer', limit=2).json()
+        second = self.get(self.customer, 'customer', limit=2, cursor=first['next_cursor']).json()
+        self.assertEqual(
+            [row['order_id'] for row in first['results'] + second['results']],
+            [str(order.pk) for order in reversed(self.orders)],
+        )
+        self.assertIsNone(second['next_cursor'])
+
+    def test_tampered_cursor_is_rejected(self):
+        for user, party in ((self.customer, 'customer'), (self.provider, 'provider')):
+            for cursor in (tampered_cursor('garbage', 'x'), tampered_cursor('2026-01-01T00:00:00Z', 'x')):
+                with self.subTest(party=party, cursor=cursor):
+                    self.assertEqual(self.get(user, party, limit=2, cursor=cursor).status_code, 400)
+
+    @override_settings(PAGINATION={'UNPAGINATED_LIMIT': 2})
+    def test_unpaginated_list_is_capped(self):
+        response = self.get(self.provider, 'provider')
+        self.assertEqual([row['order_id'] for row in response.json()], [str(o.pk) for o in self.orders[:0:-1]])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class TokenCacheTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', first_name='Ada')
+        self.key = Token.objects.create(user=self.user).key
+
+    def test_repeated_lookups_hit_the_cache(self):
+        with self.assertNumQueries(1):
+            get_user_for_token(self.key)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_for_token(self.key).pk, self.user.pk)
+        _local.clear()
+        with self.assertNumQueries(0):
+            # Shared tier, as another worker would see it
+            self.assertEqual(get_user_for_token(self.key).pk, self.user.pk)
+
+    def test_deleted_token_is_rejected(self):
+        self.assertIsNotNone(get_user_for_token(self.key))
+        Token.objects.filter(key=self.key).delete()
+        self.assertIsNone(get_user_for_token(self.key))
+        response = self.client.get('/api/customer/dashboard/', HTTP_AUTHORIZATION=f'Token {self.key}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_inactive_user_is_rejected(self):
+        self.assertIsNotNone(get_user_for_token(self.key))
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(get_user_for_token(self.key))
+
+    def test_lookups_do_not_share_instances(self):
+        first = get_user_for_token(self.key)
+        first.first_name = 'Changed'
+        second = get_user_for_token(self.key)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.first_name, 'Ada')
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class CatalogGenerationTests(TestCase):
+
+    def test_generation_never_goes_back_after_eviction(self):
+        first = catalog_generation()
+        bump_catalog_generation()
+        bumped = catalog_generation()
+        self.assertGreater(bumped, first)
+        caches['shared'].delete(GENERATION_KEY)
+        bump_catalog_generation()
+        self.assertGreater(catalog_generation(), bumped)
+        caches['shared'].delete(GENERATION_KEY)
+        self.assertGreater(catalog_generation(), bumped)
+
+    def test_service_write_bumps_the_generation_after_commit(self):
+        before = catalog_generation()
+        provider = Provider.objects.create(user=User.objects.create_user(username='p'), name='P', onboarding_type='m')
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.create(
+                provider=provider, title='New', description='d', service_type='remote', price_min=1, price_max=2,
+            )
+            # Not before commit: a render now must not be cached under the new generation.
+            self.assertEqual(catalog_generation(), before)
+        self.assertGreater(catalog_generation(), before)
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def refcount(self, name):
+        return StoredBlob.objects.filter(name=name).values_list('refcount', flat=True).first()
+
+    def test_identical_content_is_stored_once(self):
+        first = self.storage.save('docs/a.pdf', ContentFile(b'%PDF-1.4 same'))
+        second = self.storage.save('docs/b.pdf', ContentFile(b'%PDF-1.4 same'))
+        self.assertEqual(first, second)
+        self.assertEqual(self.refcount(first), 2)
+        self.assertEqual([n for n in os.listdir(self.storage.path('docs'))], [os.path.basename(first)])
+
+    def test_file_is_removed_after_the_last_reference_is_deleted(self):
+        name = self.storage.save('docs/a.pdf', ContentFile(b'%PDF-1.4 shared'))
+        self.storage.save('docs/b.pdf', ContentFile(b'%PDF-1.4 shared'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(name)
+        self.assertEqual(self.refcount(name), 1)
+        self.assertTrue(self.storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(name)
+        self.assertIsNone(self.refcount(name))
+        self.assertFalse(self.storage.exists(name))
+
+    def test_rolled_back_save_adds_no_reference(self):
+        for batched in (False, True):
+            with self.subTest(batched=batched):
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    if batched:
+                        with deferred_blob_refs():
+                            name = self.storage.save('docs/a.pdf', ContentFile(b'%PDF-1.4 rollback'))
+                            raise RuntimeError
+                    name = self.storage.save('docs/a.pdf', ContentFile(b'%PDF-1.4 rollback'))
+                    raise RuntimeError
+                self.assertIsNone(self.refcount(name))
+        name = self.storage.save('docs/a.pdf', ContentFile(b'%PDF-1.4 rollback'))
+        self.assertEqual(self.refcount(name), 1)
+        self.assertEqual(os.listdir(self.storage.path('docs')), [os.path.basename(name)])
+
+    def test_batched_saves_write_one_reference_row_per_file(self):
+        with transaction.atomic(), deferred_blob_refs():
+            names = [self.storage.save(f'docs/{i}.pdf', ContentFile(b'%PDF-1.4 batch')) for i in range(3)]
+            self.assertFalse(StoredBlob.objects.exists())
+        self.assertEqual(len(set(names)), 1)
+        self.assertEqual(self.refcount(names[0]), 3)
+        self.assertTrue(self.storage.exists(names[0]))
+
+
+class FileReleaseTests(TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.customer = Customer.objects.create(name='Ada', email='ada@example.com', phone_number='1')
+
+    def picture(self, content):
+        return SimpleUploadedFile('me.gif', b'GIF89a' + content, content_type='image/gif')
+
+    def test_replaced_file_is_released_after_commit(self):
+        self.customer.profile_picture = self.picture(b'old')
+        self.customer.save()
+        old = self.customer.profile_picture.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.save()  # same file: nothing to release
+        self.assertEqual(StoredBlob.objects.get(name=old).refcount, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.profile_picture = self.picture(b'new')
+            self.customer.save(update_fields=['profile_picture'])
+            self.assertTrue(default_storage.exists(old))
+        self.assertFalse(StoredBlob.objects.filter(name=old).exists())
+        self.assertFalse(default_storage.exists(old))
+        self.assertEqual(StoredBlob.objects.get(name=self.customer.profile_picture.name).refcount, 1)
+
+    def test_legacy_file_is_removed_with_its_row(self):
+        # Stored before content addressing: no StoredBlob row, one owner.
+        name = FileSystemStorage().save('media/customers/legacy.gif', ContentFile(b'GIF89a legacy'))
+        Customer.objects.filter(pk=self.customer.pk).update(profile_picture=name)
+        self.customer.refresh_from_db()
+        self.customer.delete()
+        self.assertFalse(default_storage.exists(name))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ChunkedUploadTests(TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.temp_dir = os.path.join(root, 'tmp')
+        settings = override_settings(MEDIA_ROOT=root, CHUNKED_UPLOADS={'TEMP_DIR': self.temp_dir})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        user = User.objects.create_user(username='provider')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+
+    def start(self, data, kind='image'):
+        response = self.client.post('/api/uploads/', {
+            'filename': 'a.gif', 'size': len(data), 'sha256': hashlib.sha256(data).hexdigest(), 'kind': kind,
+        }, content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 201, response.content)
+        return ChunkedUpload.objects.get(pk=response.json()['upload_id'])
+
+    def put(self, upload, offset, data):
+        return self.client.put(
+            f'/api/uploads/{upload.pk}/?offset={offset}', data, content_type='application/octet-stream', **self.auth,
+        )
+
+    def complete(self, upload):
+        return self.client.post(f'/api/uploads/{upload.pk}/complete/', **self.auth)
+
+    def test_chunks_are_appended_in_order(self):
+        data = b'%PDF-1.4 ' + b'x' * 100
+        upload = self.start(data, kind='credential')
+        self.assertEqual(self.put(upload, 0, data[:50]).status_code, 200)
+        response = self.put(upload, 0, data[:50])  # a retry of an accepted chunk
+        self.assertEqual((response.status_code, response.json()['received']), (409, 50))
+        self.assertEqual(self.put(upload, 50, data[50:]).status_code, 200)
+        self.assertEqual(self.complete(upload).status_code, 200)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'complete')
+        with upload.file.open('rb') as stored:
+            self.assertEqual(stored.read(), data)
+        # Neither the part file nor any per-request chunk file is left behind.
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_invalid_image_fails_the_upload(self):
+        data = b'GIF89a not really'
+        upload = self.start(data)
+        self.assertEqual(self.put(upload, 0, data).status_code, 200)
+        self.assertEqual(self.complete(upload).status_code, 400)
+        upload.refresh_from_db()
+        self.assertEqual((upload.status, upload.file.name), ('failed', ''))
+        self.assertFalse(os.path.exists(temp_path(upload)))
+        self.assertEqual(self.complete(upload).status_code, 400)
+        self.assertEqual(self.put(upload, 0, data).status_code, 409)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RecommendationTests(TestCase):
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.customer = User.objects.create_user(username='customer')
+        provider = User.objects.create_user(username='provider')
+        self.profile = Provider.objects.create(user=provider, name='Provider', onboarding_type='manual')
+        self.tags = {name: Tag.objects.create(name=name) for name in ('logo', 'vector', 'video')}
+
+    def service(self, *tags, active=True):
+        service = Service.objects.create(
+            provider=self.profile, title='Service', description='d', service_type='remote',
+            price_min=1, price_max=2, is_active=active,
+        )
+        service.tags.add(*(self.tags[name] for name in tags))
+        return service
+
+    def test_personal_list_ranks_by_tag_overlap(self):
+        ordered = [self.service('logo', 'vector'), self.service('logo')]
+        for service in ordered:
+            Order.objects.create(
+                customer=self.customer, provider=self.profile.user, service=service, price=1, delivery_days=1,
+            )
+        both = self.service('logo', 'vector')   # logo weighs 2, vector 1
+        logo = self.service('logo')
+        vector = self.service('vector')
+        self.service('video')
+        self.service('logo', active=False)
+        self.assertEqual(compute_for_user(self.customer.pk), [both.pk, logo.pk, vector.pk])
+        self.assertEqual(compute_for_user(User.objects.create_user(username='new').pk), [])
+
+    def test_seeded_pick_is_repeatable_and_padded_from_popular(self):
+        personal = [self.service('logo') for _ in range(2)]
+        popular = [self.service('video') for _ in range(5)]
+        RecommendationList.objects.create(key=user_key(self.customer.pk), service_ids=[str(s.pk) for s in personal])
+        RecommendationList.objects.create(key=POPULAR_KEY, service_ids=[str(s.pk) for s in popular])
+        with mock.patch('api.recommendations.run_in_background') as background:
+            picks = [recommended_service_ids(self.customer, count=4, seed=7) for _ in range(3)]
+        background.assert_not_called()  # both lists are fresh
+        self.assertEqual(picks[0], picks[1])
+        self.assertEqual(picks[0], picks[2])
+        self.assertEqual(set(picks[0][:2]), {str(s.pk) for s in personal})
+        self.assertLessEqual(set(picks[0][2:]), {str(s.pk) for s in popular})
+
+    def test_stale_lists_are_scheduled_once(self):
+        with mock.patch('api.recommendations.run_in_background') as background:
+            for _ in range(3):
+                self.assertEqual(recommended_service_ids(self.customer), [])
+        self.assertEqual(
+            sorted(call.kwargs['key'] for call in background.call_args_list),
+            [f'recommendations:{POPULAR_KEY}', f'recommendations:{user_key(self.customer.pk)}'],
+        )
+        refresh_popular()
+        refresh_user(self.customer.pk)
+        self.assertEqual(RecommendationList.objects.count(), 2)
+
+
+
+class RelatedServiceTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='provider')
+        self.profile = Provider.objects.create(user=user, name='Provider', onboarding_type='manual')
+        self.tags = {name: Tag.objects.create(name=name) for name in ('logo', 'vector', 'print', 'video')}
+
+    def service(self, *tags, active=True):
+        service = Service.objects.create(
+            provider=self.profile, title='Service', description='d', service_type='remote',
+            price_min=1, price_max=2, is_active=active,
+        )
+        service.tags.add(*(self.tags[name] for name in tags))
+        return service
+
+    def related(self, service):
+        return related_service_ids(service.pk)
+
+    @override_settings(RELATED_SERVICES={'BLOCK_SIZE': 2})  # several blocks for five rows
+    def test_related_services_are_ordered_by_similarity(self):
+        source = self.service('logo', 'vector', 'print')
+        same = self.service('logo', 'vector', 'print')
+        two_shared = self.service('logo', 'vector')
+        one_shared = self.service('logo')
+        unrelated = self.service('video')
+        self.service('logo', 'vector', 'print', active=False)
+
+        self.assertEqual(rebuild_related(), 5)
+        expected = [same.pk, two_shared.pk, one_shared.pk]
+        self.assertEqual(self.related(source), [str(pk) for pk in expected])
+        self.assertEqual(self.related(unrelated), [])
+        self.assertEqual(rebuild_related(top_k=1), 5)
+        self.assertEqual(self.related(source), [str(same.pk)])
+
+    def test_rebuild_overwrites_stale_lists(self):
+        source = self.service('logo')
+        other = self.service('logo')
+        untagged = Service.objects.create(
+            provider=self.profile, title='Service', description='d', service_type='remote',
+            price_min=1, price_max=2,
+        )
+        RecommendationList.objects.create(key=service_key(source.pk), service_ids=[str(untagged.pk)])
+        RecommendationList.objects.create(key=service_key(untagged.pk), service_ids=[str(source.pk)])
+        RecommendationList.objects.create(key=user_key(1), service_ids=[str(source.pk)])
+
+        rebuild_related()
+        rebuild_related()
+        self.assertEqual(self.related(source), [str(other.pk)])
+        self.assertEqual(self.related(other), [str(source.pk)])
+        self.assertEqual(self.related(untagged), [])
+        self.assertEqual(
+            sorted(RecommendationList.objects.values_list('key', flat=True)),
+            sorted([service_key(source.pk), service_key(other.pk), user_key(1)]),
+        )
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ServiceSearchTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='provider')
+        self.profile = Provider.objects.create(user=user, name='Provider', onboarding_type='manual')
+
+    def service(self, title, description='Work'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Service.objects.create(
+                provider=self.profile, title=title, description=description, service_type='remote',
+                price_min=1, price_max=2,
+            )
+
+    def found(self, query):
+        return [service.pk for service in search_services(query)]
+
+    def test_document_follows_service_writes(self):
+        service = self.service('Logo design')
+        self.assertEqual(ServiceSearchDocument.objects.get(service=service).title, 'Logo design')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            service.title = 'Brand identity'
+            service.save()
+            service.tags.add(Tag.objects.create(name='vector'))
+        document = ServiceSearchDocument.objects.get(service=service)
+        self.assertEqual((document.title, document.tags), ('Brand identity', 'vector'))
+        self.assertEqual(self.found('vector'), [service.pk])
+        self.assertEqual(self.found('logo'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            service.delete()
+        self.assertFalse(ServiceSearchDocument.objects.exists())
+        self.assertEqual(self.found('brand'), [])
+
+    def test_title_matches_rank_above_description_matches(self):
+        in_title = self.service('Logo design')
+        in_description = self.service('Branding', 'Includes a logo')  # newer
+        self.assertEqual(self.found('logo'), [in_title.pk, in_description.pk])
+
+    @override_settings(SERVICE_SEARCH_BACKEND='api.search.ORMServiceSearch')
+    def test_orm_fallback(self):
+        older = self.service('Logo design')
+        newer = self.service('Branding', 'Includes a logo')
+        self.service('Video editing')
+        self.assertEqual(self.found('logo'), [newer.pk, older.pk])
+        self.assertEqual(self.found('logo brand'), [newer.pk])
+        self.assertEqual(self.found('   '), [])
@@ -0,0 +1,219 @@
+"""
+Resumable chunked uploads.
+
+    POST /api/uploads/                      {filename, size, sha256, kind}
+    PUT  /api/uploads/<id>/?offset=<n>      raw chunk bytes
+    GET  /api/uploads/<id>/                 how much has been received
+    POST /api/uploads/<id>/complete/        verify and store
+
+Each chunk is copied from the request stream to a file of its own in small
+blocks, so memory use does not depend on chunk or file size, and no lock is
+held while a slow client sends it. Only then is the upload row locked to
+check the offset, append the chunk to the upload's temporary file and
+advance ``received``. A client whose connection drops asks for
+``received`` and resumes from there. Completion re-hashes the temporary
+file, checks it against the declared sha256 and moves it into storage; the
+upload id can then be passed to services/create/. An image that does not
+decode marks the upload failed and its bytes are deleted.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChunkedUpload
+
+_DEFAULTS = {
+    'TEMP_DIR': os.path.join(settings.BASE_DIR, 'tmp_uploads'),
+    'MAX_SIZE': 100 * 1024 * 1024,      # bytes per file
+    'MAX_CHUNK_SIZE': 8 * 1024 * 1024,  # bytes per PUT
+    'EXPIRE_AFTER': 24 * 60 * 60,       # seconds before an unfinished upload is purged
+}
+BLOCK_SIZE = 64 * 1024
+
+
+def conf(name):
+    return getattr(settings, 'CHUNKED_UPLOADS', {}).get(name, _DEFAULTS[name])
+
+
+class UploadError(ValueError):
+    """The request cannot be applied to the upload; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def temp_path(upload):
+    return os.path.join(conf('TEMP_DIR'), f'{upload.pk}.part')
+
+
+def start_upload(owner, kind, filename, size, sha256):
+    if size > conf('MAX_SIZE'):
+        raise UploadError(f"File is larger than {conf('MAX_SIZE')} bytes.", status=413)
+    upload = ChunkedUpload.objects.create(
+        owner=owner, kind=kind, filename=os.path.basename(filename), size=size, sha256=sha256.lower(),
+    )
+    os.makedirs(conf('TEMP_DIR'), exist_ok=True)
+    open(temp_path(upload), 'wb').close()
+    return upload
+
+
+def _check_chunk(upload, offset, length):
+    if upload is None:
+        raise UploadError("Upload not found.", status=404)
+    if upload.status != 'pending':
+        raise UploadError(f"Upload is already {upload.status}.", status=409)
+    if offset != upload.received:
+        raise UploadError(f"Expected offset {upload.received}.", status=409)
+    if offset + length > upload.size:
+        raise UploadError("Chunk extends past the declared size.")
+
+
+def append_chunk(upload_id, owner, offset, length, stream):
+    """
+    Write ``length`` bytes from ``stream`` at ``offset``. Only the next
+    expected offset is accepted (409 otherwise, with the current ``received``
+    in the upload row), which makes a retried chunk safe to resend.
+    """
+    if length > conf('MAX_CHUNK_SIZE'):
+        raise UploadError(f"Chunks are limited to {conf('MAX_CHUNK_SIZE')} bytes.", status=413)
+    # Fail fast before reading the body; checked again under the lock below.
+    _check_chunk(ChunkedUpload.objects.filter(pk=upload_id, owner=owner).first(), offset, length)
+
+    fd, chunk_path = tempfile.mkstemp(dir=conf('TEMP_DIR'), prefix=f'{upload_id}.', suffix='.chunk')
+    try:
+        written = 0
+        with os.fdopen(fd, 'wb') as chunk:
+            while written < length:
+                block = stream.read(min(BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                chunk.write(block)
+                written += len(block)
+        if written != length:
+            raise UploadError("Request body is shorter than Content-Length.")
+
+        with transaction.atomic():
+            upload = ChunkedUpload.objects.select_for_update().filter(pk=upload_id, owner=owner).first()
+            _check_chunk(upload, offset, length)
+            with open(temp_path(upload), 'r+b') as part, open(chunk_path, 'rb') as chunk:
+                # Drop whatever a previously interrupted write left past ``received``.
+                part.seek(offset)
+                part.truncate()
+                shutil.copyfileobj(chunk, part, BLOCK_SIZE)
+            upload.received = offset + written
+            upload.save(update_fields=['received', 'updated_at'])
+    finally:
+        os.remove(chunk_path)
+    return upload
+
+
+def _sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for block in iter(lambda: part.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_image(path):
+    from PIL import Image
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        return False
+    return True
+
+
+def complete_upload(upload_id, owner):
+    """Verify the received bytes and move them into storage. Idempotent once complete."""
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().filter(pk=upload_id, owner=owner).first()
+        if upload is None:
+            raise UploadError("Upload not found.", status=404)
+        if upload.status == 'failed':
+            raise UploadError("Upload is not a valid image.")
+        if upload.status != 'pending':
+            return upload
+        if upload.received != upload.size:
+            raise UploadError(f"Received {upload.received} of {upload.size} bytes.", status=409)
+
+        path = temp_path(upload)
+        if _sha256_of(path) != upload.sha256:
+            # Start over: the client re-sends from offset 0.
+            open(path, 'wb').close()
+            upload.received = 0
+            upload.save(update_fields=['received', 'updated_at'])
+        elif upload.kind == 'image' and not _is_image(path):
+            # Resending the same bytes cannot help: the upload is finished, unusable.
+            upload.status = 'failed'
+            upload.save(update_fields=['status', 'updated_at'])
+        else:
+            with open(path, 'rb') as part:
+                # Straight to storage: the file lives where a direct upload of this kind would.
+                upload.file.name = upload.file.storage.save(
+                    ChunkedUpload.UPLOAD_TO[upload.kind] + upload.filename, File(part)
+                )
+            upload.status = 'complete'
+            upload.save(update_fields=['file', 'status', 'updated_at'])
+
+    if upload.status == 'failed':
+        os.remove(path)
+        raise UploadError("Upload is not a valid image.")
+    if upload.status != 'complete':
+        raise UploadError("Checksum mismatch; upload restarted from offset 0.", status=422)
+    os.remove(path)
+    return upload
+
+
+def claim_uploads(owner, image_ids=(), credential_ids=()):
+    """
+    Lock and return (images, credentials) completed uploads of ``owner`` for
+    attaching to a new service. Call inside the transaction that attaches them.
+    """
+    ids = {str(pk) for pk in image_ids} | {str(pk) for pk in credential_ids}
+    if not ids:
+        return [], []
+    uploads = {
+        str(upload.pk): upload
+        for upload in ChunkedUpload.objects.select_for_update().filter(pk__in=ids, owner=owner, status='complete')
+    }
+    images = [uploads.get(str(pk)) for pk in image_ids]
+    credentials = [uploads.get(str(pk)) for pk in credential_ids]
+    if (
+        None in images or None in credentials
+        or any(upload.kind != 'image' for upload in images)
+        or any(upload.kind != 'credential' for upload in credentials)
+    ):
+        raise UploadError("Unknown, unfinished or already used upload id.")
+    return images, credentials
+
+
+def purge_expired():
+    """
+    Delete uploads idle for longer than EXPIRE_AFTER that were never attached
+    to a service (unfinished, failed, or complete but unused), with their
+    files. Returns how many were removed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=conf('EXPIRE_AFTER'))
+    expired = ChunkedUpload.objects.filter(status__in=['pending', 'failed', 'complete'], updated_at__lt=cutoff)
+    count = 0
+    for upload in expired.iterator():
+        if upload.status == 'pending':
+            try:
+                os.remove(temp_path(upload))
+            except FileNotFoundError:
+                pass
+        elif upload.file:
+            upload.file.delete(save=False)
+        upload.delete()
+        count += 1
+    return count
@@ -15,7 +15,14 @@ urlpatterns = [
     path("login/", views.login, name="login"),
     path("services/create/", views.service_create, name="service-create"),
     path("services/", views.provider_services_list, name="provider-services-list"),
+    path("services/search/", views.service_search, name="service-search"),
+    path("services/import/", views.service_import, name="service-import"),
+    path("uploads/", views.upload_start, name="upload-start"),
+    path("uploads/<uuid:upload_id>/", views.upload_detail, name="upload-detail"),
+    path("uploads/<uuid:upload_id>/complete/", views.upload_complete, name="upload-complete"),
+    path("services/export/", views.service_export, name="service-export"),
     path("services/<uuid:uuid>/", views.service_detail, name="service-detail"),
+    path("services/<uuid:uuid>/related/", views.service_related, name="service-related"),
     
     # Customer Dashboard
     path("customer/dashboard/", views.customer_dashboard_summary, name="customer-dashboard-summary"),
@@ -23,10 +30,12 @@ urlpatterns = [
     path("customer/transactions/", views.customer_transactions_list, name="customer-transactions-list"),
     path("customer/messages/", views.customer_messages_list, name="customer-messages-list"),
     path("customer/discover-services/", views.customer_discover_services_list, name="customer-discover-services-list"),
+    path("customer/discover-services/browse/", views.customer_discover_services_browse, name="customer-discover-services-browse"),
 
     # Provider Dashboard
     path("provider/orders/", views.provider_orders_list, name="provider-orders-list"),
 
     # Orders
     path("orders/create/", views.order_create, name="order-create"),
+    path("orders/<uuid:order_id>/transition/", views.order_transition, name="order-transition"),
 ]
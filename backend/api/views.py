@@ -2,9 +2,8 @@ from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from .models import Provider, Customer, Tag, Service, ServiceMedia, ServiceCredential, UserPreference, Order
+from .models import Provider, Customer, Tag, Service, ServiceMedia, ServiceCredential, UserPreference, Order, ChunkedUpload
 import json
 from .serializers import (
     ProviderCreateSerializer, ProviderImageUploadSerializer, 
@@ -12,10 +11,31 @@ from .serializers import (
     ServiceCreateSerializer, ServiceReadSerializer,
     CustomerDashboardSerializer, CustomerOrderSerializer,
     CustomerTransactionSerializer, CustomerMessageSerializer,
-    DiscoverServicesSerializer, OrderSerializer
+    OrderSerializer, OrderListQuerySerializer, OrderPlacementSerializer, OrderTransitionSerializer,
+    ServiceSearchQuerySerializer, ServiceFacetQuerySerializer,
+    ProviderServicesQuerySerializer, ChunkedUploadStartSerializer, ChunkedUploadSerializer
 )
+from .facets import build_filters, facet_counts
+from .pagination import InvalidCursor, keyset_page, conf as pagination_conf
+from .ingest import create_service
+from .images import schedule_provider_picture
+from .uploads import UploadError, append_chunk, complete_upload, start_upload, conf as upload_conf
+from .bulk import FORMATS, detect_format, export_services, import_services
+from .catalog_cache import catalog_generation, get_sections, make_etag
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from core.renderers import FastJSONRenderer
+from .search import search_services
+from .recommendations import recommended_service_ids, schedule_refresh
+from .related import related_service_ids
+from .provider_stats import earnings_statistics, provider_stats, success_rate, trust_badge
+from .activity import customer_stats, display_name, recent_activity, record_order_event
+from .orders import OrderError, TransitionError, resolve_new_order, transition
+from uuid import UUID
+from django.db import transaction
 from rest_framework.authtoken.models import Token # type: ignore
-from rest_framework.authentication import SessionAuthentication, TokenAuthentication # type: ignore
+from rest_framework.authentication import SessionAuthentication # type: ignore
+from .authentication import CachedTokenAuthentication, prime_token
 from rest_framework.permissions import IsAuthenticated # type: ignore
 from rest_framework.decorators import authentication_classes, permission_classes, parser_classes # type: ignore
 
@@ -78,6 +98,7 @@ def provider_upload_images(request):
         provider.legal_id_front = serializer.validated_data['legal_id_front']
         provider.legal_id_back = serializer.validated_data['legal_id_back']
         provider.save(update_fields=['profile_picture', 'legal_id_front', 'legal_id_back'])
+        schedule_provider_picture(provider.pk)
         token = Token.objects.create(user=provider.user)  # type: ignore
         return Response(
             {"message": "Images uploaded and registration complete.", "token": token.key},
@@ -88,7 +109,7 @@ def provider_upload_images(request):
 
 
 @api_view(['GET'])
-@authentication_classes([SessionAuthentication, TokenAuthentication])
+@authentication_classes([SessionAuthentication, CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def logout(request):
     """
@@ -103,7 +124,7 @@ def logout(request):
     return Response({}, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
-@authentication_classes([SessionAuthentication, TokenAuthentication])
+@authentication_classes([SessionAuthentication, CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def test_token(request):
 	return Response({'detail': 'Token is valid'}, status=status.HTTP_200_OK)
@@ -233,6 +254,9 @@ def provider_ai_onboarding(request):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+        if provider.profile_picture:
+            schedule_provider_picture(provider.pk)
+
         print(f"[AI ONBOARDING] Provider CREATED successfully!")
         print(f"[AI ONBOARDING]   uuid: {provider.uuid}")
         print(f"[AI ONBOARDING]   name: {provider.name}")
@@ -269,55 +293,53 @@ def provider_ai_onboarding(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def provider_dashboard_summary(request):
     """
     GET /api/provider-dashboard/summary/
     Returns a structured summary object for the provider dashboard.
+    Totals come from the maintained ProviderStats row (api/provider_stats.py),
+    not from aggregating the provider's orders.
     """
-    # In a real app, we would fetch the current authenticated provider
-    # For now, we return mock stats based on the UI design requirements.
-    
+    stats = provider_stats(request.user.pk)
+    badge, badge_detail = trust_badge(stats)
+    recent = (
+        Order.objects.filter(provider=request.user)
+        .select_related('service', 'customer')
+        .only('order_id', 'price', 'discount', 'status', 'service__title',
+              'customer__username', 'customer__first_name', 'customer__last_name')
+        .order_by('-created_at')[:3]
+    )
+    verified = Service.objects.filter(
+        provider__user=request.user, verification_status='verified'
+    ).exists()
+
     summary_data = {
         "user_name": request.user.first_name or request.user.username,
-        "verification_status": "In Progress",
-        "trust_badge": "Rising Talent",
-        "trust_badge_detail": "Based on your 98% job success rate and excellent client feedback over the last 2 weeks.",
-        "total_earnings": 12840.00,
-        "active_orders": 24,
-        "provider_rating": 4.92,
-        "job_success_rate": 98.4,
+        "verification_status": "Verified" if verified else "In Progress",
+        "trust_badge": badge,
+        "trust_badge_detail": badge_detail,
+        "total_earnings": float(stats.total_earnings),
+        "active_orders": stats.pending_orders + stats.accepted_orders + stats.in_progress_orders,
+        # There are no reviews yet to rate providers from.
+        "provider_rating": None,
+        "job_success_rate": success_rate(stats),
         "recent_orders": [
             {
-                "id": 1,
-                "title": "Corporate Logo Design",
-                "client": "GreenTech Solutions",
-                "amount": 450.00,
-                "status": "In Progress"
-            },
-            {
-                "id": 2,
-                "title": "UI/UX Audit",
-                "client": "SwiftPay App",
-                "amount": 1200.00,
-                "status": "Pending Review"
-            },
-            {
-                "id": 3,
-                "title": "Mobile Landing Page",
-                "client": "Fitness Hub",
-                "amount": 320.00,
-                "status": "Completed"
+                "id": str(order.order_id),
+                "title": order.service.title,
+                "client": order.customer.get_full_name() or order.customer.username,
+                "amount": float(order.price - order.discount),
+                "status": order.get_status_display(),
             }
+            for order in recent
         ],
-        "earnings_statistics": {
-            "this_month": [30, 45, 35, 90, 40, 60, 35],
-            "last_month": [20, 30, 40, 30, 50, 40, 30]
-        },
-        "pending_payout": 2140.50
+        "earnings_statistics": earnings_statistics(request.user.pk),
+        # Value of accepted work not yet completed
+        "pending_payout": float(stats.open_order_value),
     }
-    
+
     return Response(summary_data, status=status.HTTP_200_OK)
 
 
@@ -338,16 +360,16 @@ def login(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
-        return Response(
-            {"detail": "Invalid email or password."},
-            status=status.HTTP_401_UNAUTHORIZED
-        )
-
-    user = authenticate(username=user.username, password=password)
+    # User, both profiles, preference and token in one indexed, joined query.
+    user = (
+        User.objects.select_related('customer_profile', 'provider_profile', 'preferences', 'auth_token')
+        .filter(email=email).order_by('pk').first()
+    )
+    # Same checks as authenticate() with ModelBackend, minus its second lookup by username.
     if user is None:
+        # Hash anyway so unknown emails take as long as wrong passwords.
+        User().set_password(password)
+    if user is None or not user.check_password(password) or not user.is_active:
         return Response(
             {"detail": "Invalid email or password."},
             status=status.HTTP_401_UNAUTHORIZED
@@ -376,13 +398,18 @@ def login(request):
         )
 
     # Dashboard Preference Tracking
-    pref, created = UserPreference.objects.get_or_create(user=user)
-    if created:
+    pref = getattr(user, 'preferences', None)
+    if pref is None:
         # Initial fallback: provider if exists, else customer
-        pref.last_active_role = 'provider' if hasattr(user, 'provider_profile') else 'customer'
-        pref.save()
+        pref, _ = UserPreference.objects.get_or_create(
+            user=user, defaults={'last_active_role': 'provider' if hasattr(user, 'provider_profile') else 'customer'}
+        )
 
-    token, _ = Token.objects.get_or_create(user=user)
+    token = getattr(user, 'auth_token', None)
+    if token is None:
+        token, _ = Token.objects.get_or_create(user=user)
+    # The client's next requests authenticate with this token: skip their database lookup.
+    prime_token(token.key, user)
     
     return Response(
         {
@@ -399,7 +426,7 @@ def login(request):
     )
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def switch_role(request):
     """
@@ -440,7 +467,7 @@ def switch_role(request):
     }, status=status.HTTP_200_OK)
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def service_create(request):
     """
@@ -448,8 +475,12 @@ def service_create(request):
     1. Validates fields via Serializer.
     2. Extracts data: title, description, service_type, price_min, price_max, tags.
     3. Get provider from current authenticated user.
-    4. Creates Service, Tags, Media and Credentials record in DB.
+    4. Creates Service, Tags, Media and Credentials records in one transaction
+       with a fixed number of queries (see api/ingest.py).
     5. Returns success with real service UUID.
+    Files come either as multipart fields (service_images, certifications)
+    or as ids of completed chunked uploads (service_image_uploads,
+    certification_uploads; see POST /api/uploads/).
     """
     serializer = ServiceCreateSerializer(data=request.data)
     if serializer.is_valid():
@@ -478,38 +509,21 @@ def service_create(request):
             
             provider = request.user.provider_profile
 
-            # 3. Create Service
-            service = Service.objects.create(
-                provider=provider,
+            # 3. Create Service, Tags, Media and Credentials in one transaction
+            service = create_service(
+                provider,
                 title=title,
                 description=description,
                 service_type=service_type,
                 price_min=price_min,
-                price_max=price_max
+                price_max=price_max,
+                tags=tags_list if isinstance(tags_list, list) else [],
+                images=request.FILES.getlist('service_images'),
+                certifications=request.FILES.getlist('certifications'),
+                image_upload_ids=serializer.validated_data['service_image_uploads'],
+                credential_upload_ids=serializer.validated_data['certification_uploads'],
             )
 
-            # 4. Handle Tags
-            for tag_name in tags_list:
-                tag_obj, _ = Tag.objects.get_or_create(name=tag_name.lower())
-                service.tags.add(tag_obj)
-
-            # 5. Handle Service Media (Images)
-            images = request.FILES.getlist('service_images')
-            for image in images:
-                ServiceMedia.objects.create(
-                    service=service,
-                    image=image
-                )
-
-            # 6. Handle Service Credentials (Certs)
-            certs = request.FILES.getlist('certifications')
-            for cert in certs:
-                ServiceCredential.objects.create(
-                    service=service,
-                    file=cert,
-                    name=cert.name
-                )
-
             return Response(
                 {
                     "message": "Service created successfully",
@@ -518,8 +532,10 @@ def service_create(request):
                 status=status.HTTP_201_CREATED
             )
 
+        except UploadError as e:
+            return Response({"detail": str(e)}, status=e.status)
         except Exception as e:
-            # Cleanup optionally or just error out
+            # create_service() is atomic, so no partial Service rows are left behind
             return Response(
                 {"detail": f"Failed to create service: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -528,12 +544,17 @@ def service_create(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def provider_services_list(request):
     """
     GET /api/services/
-    Returns all services for the current provider.
+    Returns the current provider's services, newest first, as a plain list of
+    at most PAGINATION['UNPAGINATED_LIMIT'] (api/pagination.py).
+
+    Optional:
+      fields=id,title,price_range  only these fields; joins/prefetches follow
+      limit=<n>[&cursor=<c>]       one page, newest first, as {results, next_cursor}
     """
     try:
         provider = request.user.provider_profile
@@ -543,18 +564,191 @@ def provider_services_list(request):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    services = Service.objects.filter(provider=provider).prefetch_related('tags', 'media')
-    
+    params = ProviderServicesQuerySerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    fields = params.validated_data.get('fields')
+    limit = params.validated_data.get('limit')
+
+    services = Service.objects.filter(provider=provider)
+    if limit is None:
+        # Flat mode straight from .values() rows, capped for clients that do not page.
+        services = services.order_by('-created_at', 'uuid')[:pagination_conf('UNPAGINATED_LIMIT')]
+        return Response(
+            ServiceReadSerializer.values_data(services, request=request, fields=fields),
+            status=status.HTTP_200_OK
+        )
+
+    try:
+        page, next_cursor = keyset_page(
+            ServiceReadSerializer.optimize_queryset(services, fields),
+            ('-created_at', 'uuid'), limit, params.validated_data.get('cursor')
+        )
+    except InvalidCursor as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
     serializer = ServiceReadSerializer(
-        services,
+        page,
         many=True,
+        fields=fields,
         context={'request': request}
     )
-    
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response({"results": serializer.data, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def upload_start(request):
+    """
+    POST /api/uploads/ {filename, size, sha256, kind: image|credential}
+    Opens a resumable upload; send the bytes with PUT /api/uploads/<id>/.
+    """
+    serializer = ChunkedUploadStartSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        upload = start_upload(request.user, **serializer.validated_data)
+    except UploadError as e:
+        return Response({"detail": str(e)}, status=e.status)
+    data = ChunkedUploadSerializer(upload).data
+    data['max_chunk_size'] = upload_conf('MAX_CHUNK_SIZE')
+    return Response(data, status=status.HTTP_201_CREATED)
+
+@api_view(['GET', 'PUT'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+@parser_classes([])
+def upload_detail(request, upload_id):
+    """
+    GET /api/uploads/<id>/                 progress; resume from ``received``
+    PUT /api/uploads/<id>/?offset=<n>      raw chunk body (application/octet-stream)
+    """
+    if request.method == 'GET':
+        upload = get_object_or_404(ChunkedUpload, pk=upload_id, owner=request.user)
+        return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_200_OK)
+
+    try:
+        offset = int(request.query_params.get('offset', ''))
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return Response({"detail": "offset query parameter and Content-Length are required."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if length <= 0:
+        return Response({"detail": "Empty chunk."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        # Read the body as a stream; it is never parsed or buffered whole.
+        upload = append_chunk(upload_id, request.user, offset, length, request.stream)
+    except UploadError as e:
+        current = ChunkedUpload.objects.filter(pk=upload_id, owner=request.user).values('received').first()
+        return Response({"detail": str(e), "received": current and current['received']}, status=e.status)
+    return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def upload_complete(request, upload_id):
+    """
+    POST /api/uploads/<id>/complete/
+    Checks size and sha256, stores the file and returns the upload id to pass
+    to services/create/.
+    """
+    try:
+        upload = complete_upload(upload_id, request.user)
+    except UploadError as e:
+        return Response({"detail": str(e)}, status=e.status)
+    return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def service_import(request):
+    """
+    POST /api/services/import/ (Multipart: file, optional type=ndjson|csv)
+    Creates one service per row using the services/create/ field names.
+    Rows are validated with ServiceCreateSerializer and inserted in batches;
+    invalid rows are reported by line and do not block the others.
+    """
+    try:
+        provider = request.user.provider_profile
+    except Provider.DoesNotExist:
+        return Response(
+            {"detail": "User is not a registered provider."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"detail": "Upload a file in the 'file' field."}, status=status.HTTP_400_BAD_REQUEST)
+    fmt = detect_format(upload, request.data.get('type'))
+    if fmt is None:
+        return Response(
+            {"detail": f"Unknown format; pass type as one of: {', '.join(FORMATS)}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    summary = import_services(provider, upload, fmt)
+    return Response(
+        summary,
+        status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_400_BAD_REQUEST
+    )
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def service_export(request):
+    """
+    GET /api/services/export/?type=ndjson|csv
+    Streams all of the provider's services in the import format.
+    """
+    try:
+        provider = request.user.provider_profile
+    except Provider.DoesNotExist:
+        return Response(
+            {"detail": "User is not a registered provider."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    # "type" rather than "format": DRF reserves ?format= for renderer selection.
+    fmt = request.query_params.get('type', 'ndjson')
+    if fmt not in FORMATS:
+        return Response(
+            {"detail": f"type must be one of: {', '.join(FORMATS)}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(export_services(provider, fmt), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="services.{fmt}"'
+    return response
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def service_search(request):
+    """
+    GET /api/services/search/?q=<text>
+    Optional: service_type, verification_status, min_price, max_price, page, page_size.
+    Returns active services ranked by relevance (title > tags > description).
+    """
+    params = ServiceSearchQuerySerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    filters = params.validated_data
+    page, page_size = filters['page'], filters['page_size']
+    # Fetch one extra hit to know whether another page exists.
+    services = search_services(
+        filters['q'], filters, limit=page_size + 1, offset=(page - 1) * page_size
+    )
+    serializer = ServiceReadSerializer(services[:page_size], many=True, context={'request': request})
+    return Response({
+        "results": serializer.data,
+        "page": page,
+        "next_page": page + 1 if len(services) > page_size else None,
+    }, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def service_detail(request, uuid):
     """
@@ -603,142 +797,220 @@ def service_detail(request, uuid):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def service_related(request, uuid):
+    """
+    GET /api/services/<uuid>/related/
+    Active services most similar by tags, best first (precomputed, see api/related.py).
+    """
+    related_ids = related_service_ids(uuid)
+    by_uuid = (
+        Service.objects.filter(is_active=True)
+        .select_related('provider')
+        .prefetch_related('tags', 'media', 'credentials')
+        .in_bulk(related_ids)
+    )
+    services = [by_uuid[pk] for pk in map(UUID, related_ids) if pk in by_uuid]
+    serializer = ServiceReadSerializer(services, many=True, context={'request': request})
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def customer_dashboard_summary(request):
     """
     GET /api/customer/dashboard/
-    Returns summary stats for the customer dashboard.
+    Returns summary stats for the customer dashboard: the maintained
+    CustomerStats row and the newest activity feed entries (api/activity.py).
     """
-    # In a real app, fetch from DB
-    # customer = request.user.customer_profile
-    
+    stats = customer_stats(request.user.pk)
     data = {
-        "user_name": request.user.first_name or "Alex",
+        "user_name": request.user.first_name or request.user.username,
         "greeting": "Your digital artisan ecosystem is thriving today.",
-        "active_orders": [
-            {
-                "id": "1",
-                "service_title": "Quantum System Audit",
-                "provider_name": "Neural Logic Labs",
-                "status": "IN PROGRESS",
-                "amount": 1240.00,
-                "status_color": "emerald" # for UI hints
-            },
-            {
-                "id": "2",
-                "service_title": "Brand Identity Overhaul",
-                "provider_name": "Studio Zenith",
-                "status": "AWAITING CONFIRMATION",
-                "amount": 3500.00,
-                "status_color": "zinc"
-            },
-            {
-                "id": "3",
-                "service_title": "Strategic Tax Planning",
-                "provider_name": "Global FinTech",
-                "status": "IN PROGRESS",
-                "amount": 850.00,
-                "status_color": "emerald"
-            }
-        ],
-        "recent_activity": [
-            {
-                "id": "1",
-                "type": "message",
-                "content": "New message from Studio Zenith: 'The initial wireframes for the identity overhaul are ready...'",
-                "time_ago": "12M AGO",
-                "icon_type": "message"
-            },
-            {
-                "id": "2",
-                "type": "payment",
-                "content": "Payment Verified: Milestone 1 payment for 'Strategic Tax Planning' has been successfully processed.",
-                "time_ago": "2H AGO",
-                "icon_type": "payment"
-            },
-            {
-                "id": "3",
-                "type": "order",
-                "content": "Order Completed: 'Quarterly Performance Review' with Alex Artisan was marked as complete.",
-                "time_ago": "YESTERDAY",
-                "icon_type": "check"
-            }
-        ],
+        "active_orders": stats.active_orders,
+        "recent_activity": recent_activity(request.user.pk),
         "stats": {
-            "total_investment": 5590.00,
-            "active_projects": 4,
-            "saved_experts": 12
+            "total_investment": stats.total_investment,
+            "active_projects": stats.active_projects,
+            "saved_experts": stats.saved_experts,
         }
     }
-    
+
     serializer = CustomerDashboardSerializer(data)
     return Response(serializer.data)
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def customer_orders_list(request):
-    """GET /api/customer/orders/"""
-    orders = Order.objects.filter(customer=request.user).select_related('service', 'provider')
-    serializer = OrderSerializer(orders, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    """
+    GET /api/customer/orders/
+    Optional: status=<status>, limit=<n>[&cursor=<c>] (see _order_list).
+    """
+    return _order_list(request, Order.objects.filter(customer=request.user))
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def provider_orders_list(request):
-    """GET /api/provider/orders/"""
-    orders = Order.objects.filter(provider=request.user).select_related('service', 'customer')
-    serializer = OrderSerializer(orders, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    """
+    GET /api/provider/orders/
+    Optional: status=<status>, limit=<n>[&cursor=<c>] (see _order_list).
+    """
+    return _order_list(request, Order.objects.filter(provider=request.user))
+
+
+def _order_list(request, orders):
+    """
+    Newest-first orders of one party, answered from the (party, status,
+    created_at) indexes. status=<status> filters; limit=<n>[&cursor=<c>]
+    returns one page as {results, next_cursor}, otherwise a plain list of
+    at most PAGINATION['UNPAGINATED_LIMIT'] orders (the dashboards' format).
+    """
+    params = OrderListQuerySerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    if 'status' in params.validated_data:
+        orders = orders.filter(status=params.validated_data['status'])
+    limit = params.validated_data.get('limit')
+    if limit is None:
+        return Response(
+            OrderSerializer.values_data(
+                orders.order_by('-created_at', '-order_id')[:pagination_conf('UNPAGINATED_LIMIT')]
+            ),
+            status=status.HTTP_200_OK
+        )
+
+    try:
+        page, next_cursor = keyset_page(
+            orders.values(*OrderSerializer.VALUES),
+            ('-created_at', '-order_id'), limit, params.validated_data.get('cursor')
+        )
+    except InvalidCursor as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(
+        {"results": OrderSerializer.rows_data(page), "next_cursor": next_cursor},
+        status=status.HTTP_200_OK
+    )
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def customer_transactions_list(request):
     """GET /api/customer/transactions/"""
     return Response([])
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def customer_messages_list(request):
     """GET /api/customer/messages/"""
     return Response([])
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def customer_discover_services_list(request):
-    """GET /api/customer/discover-services/"""
-    # Categorise services for better discovery experience
-    all_active = Service.objects.filter(is_active=True).select_related('provider').prefetch_related('tags', 'media')
-    
-    featured = all_active.filter(verification_status='verified').order_by('-created_at')[:3]
-    trending = all_active.order_by('-created_at')[:4]
-    recommended = all_active.order_by('?')[:3] # Random fallback for now
-    
-    data = {
-        "featured": featured,
-        "trending": trending,
-        "recommended": recommended
-    }
-    
-    serializer = DiscoverServicesSerializer(data, context={'request': request})
-    return Response(serializer.data)
+    """
+    GET /api/customer/discover-services/
+    Featured and trending sections are the same for every customer, so they
+    are rendered once per catalog generation (api/catalog_cache.py) and reused
+    as JSON bytes; only the recommended section is rendered per request.
+    Supports If-None-Match revalidation.
+    """
+    generation = catalog_generation()
+    base_url = request.build_absolute_uri(request.path)
+    # Precomputed per-customer candidates (api/recommendations.py), picked
+    # deterministically for this generation so the ETag stays stable.
+    recommended_ids = recommended_service_ids(
+        request.user, count=3, seed=f"{request.user.id}:{generation}"
+    )
+
+    etag = make_etag(generation, base_url, *recommended_ids)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        all_active = Service.objects.filter(is_active=True).select_related('provider').prefetch_related('tags', 'media')
+        context = {'request': request}
+
+        def render_sections():
+            featured = all_active.filter(verification_status='verified').order_by('-created_at')[:3]
+            trending = all_active.order_by('-created_at')[:4]
+            return FastJSONRenderer().render({
+                "featured": ServiceReadSerializer(featured, many=True, context=context).data,
+                "trending": ServiceReadSerializer(trending, many=True, context=context).data,
+            })
+
+        if recommended_ids:
+            by_uuid = all_active.in_bulk(recommended_ids)
+            recommended = [by_uuid[pk] for pk in map(UUID, recommended_ids) if pk in by_uuid]
+        else:
+            # Newest services stand in until the first lists have been built.
+            recommended = all_active.order_by('-created_at')[:3]
+
+        sections = get_sections(generation, base_url, render_sections)
+        body = b''.join([
+            sections[:-1],
+            b',"recommended":',
+            FastJSONRenderer().render(ServiceReadSerializer(recommended, many=True, context=context).data),
+            b'}',
+        ])
+        response = HttpResponse(body, content_type='application/json')
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    response['Vary'] = 'Authorization'
+    return response
+
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def customer_discover_services_browse(request):
+    """
+    GET /api/customer/discover-services/browse/
+    Optional: service_type, verification_status, min_price, max_price,
+    price_bucket, location, page, page_size.
+    Returns one page of matching active services plus per-facet counts.
+    """
+    params = ServiceFacetQuerySerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    page, page_size = params.validated_data['page'], params.validated_data['page_size']
+    filters = build_filters(params.validated_data)
+    active = Service.objects.filter(is_active=True)
+
+    matching = active
+    for facet_q in filters.values():
+        matching = matching.filter(facet_q)
+    # Fetch one extra row to know whether another page exists.
+    start = (page - 1) * page_size
+    services = ServiceReadSerializer.values_data(
+        matching.order_by('-created_at')[start:start + page_size + 1], request=request
+    )
+
+    return Response({
+        "results": services[:page_size],
+        "facets": facet_counts(
+            active, filters, Service.SERVICE_TYPE_CHOICES, Service.VERIFICATION_STATUS_CHOICES
+        ),
+        "page": page,
+        "next_page": page + 1 if len(services) > page_size else None,
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def order_create(request):
     """
-    POST /api/orders/create/
-    Creates an Order record.
-    Provider = request.user (must have provider_profile).
-    Customer = resolved from chat room if room_name provided, else legacy fallback.
-    Service = first Service of the provider.
+    POST /api/orders/create/ {room_name, service?, price, discount, ...}
+    Creates an accepted Order. Provider = request.user (must have
+    provider_profile), customer = the other participant of chat room
+    room_name, service = the given one of the provider's services, else their
+    newest.
     """
     # 1. Ensure the user is a provider
     if not hasattr(request.user, 'provider_profile'):
@@ -748,55 +1020,70 @@ def order_create(request):
         )
     
     provider_profile = request.user.provider_profile
-    room_name = request.data.get('room_name')
-    
+    placement = OrderPlacementSerializer(data=request.data)
     serializer = OrderSerializer(data=request.data)
-    if serializer.is_valid():
-        from chat.models import Room
-        
-        customer_user = None
-        
-        # 2. Resolve Customer from Room
-        if room_name:
-            try:
-                room = Room.objects.get(name=room_name)
-                # Customer is the OTHER participant in the room
-                customer_user = room.participants.exclude(id=request.user.id).first()
-            except Room.DoesNotExist:
-                pass
-        
-        # 3. Fallback (Legacy/Safety)
-        if not customer_user:
-            customer_profile = Customer.objects.first()
-            if customer_profile:
-                customer_user = customer_profile.user
-        
-        # 4. Resolve Service (Provider's own service)
-        service = Service.objects.filter(provider=provider_profile).first()
-        if not service:
-            # Absolute fallback if provider has no services yet
-            service = Service.objects.first()
+    if not placement.is_valid():
+        return Response(placement.errors, status=status.HTTP_400_BAD_REQUEST)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        if not customer_user or not service:
-            return Response(
-                {"error": "Could not resolve customer or service for this order."},
-                status=status.HTTP_400_BAD_REQUEST
+    with transaction.atomic():
+        # 2. Resolve service, room and customer together (api/orders.py)
+        try:
+            service, room_id, customer_user = resolve_new_order(
+                provider_profile, placement.validated_data['room_name'],
+                placement.validated_data.get('service'),
             )
+        except OrderError as e:
+            return Response({"detail": str(e)}, status=e.status)
 
-        # 5. Save with Explicit Roles
+        # 3. Save with Explicit Roles
         order = serializer.save(
             provider=request.user,
             customer=customer_user,
             service=service,
-            status='accepted' if room_name else 'pending'
+            room_id=room_id,
+            status='accepted'
         )
-        return Response(
-            {
-                "message": "Order created successfully correctly mapping roles.",
-                "order_id": str(order.order_id),
-                "status": order.status,
-            },
-            status=status.HTTP_201_CREATED
+        record_order_event(
+            order, customer_name=display_name(customer_user), provider_name=provider_profile.name, created=True
         )
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    transaction.on_commit(lambda: schedule_refresh(customer_user.id))
+    return Response(
+        {
+            "message": "Order created successfully correctly mapping roles.",
+            "order_id": str(order.order_id),
+            "status": order.status,
+        },
+        status=status.HTTP_201_CREATED
+    )
 
+
+@api_view(['POST'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def order_transition(request, order_id):
+    """
+    POST /api/orders/<order_id>/transition/ {status, version?}
+    Moves the order along its lifecycle (api/orders.py). A 409 carries the
+    order's current status and version.
+    """
+    serializer = OrderTransitionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        order = transition(
+            order_id, request.user, serializer.validated_data['status'],
+            expected_version=serializer.validated_data.get('version'),
+        )
+    except TransitionError as e:
+        data = {"detail": str(e)}
+        if e.order is not None:
+            data.update(status=e.order.status, version=e.order.version)
+        return Response(data, status=e.status)
+    return Response({
+        "order_id": str(order.order_id),
+        "status": order.status,
+        "version": order.version,
+        "updated_at": OrderSerializer().fields['updated_at'].to_representation(order.updated_at),
+    }, status=status.HTTP_200_OK)
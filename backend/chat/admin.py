@@ -4,4 +4,5 @@ from django.contrib import admin
 import chat.models as chat_models
 
 admin.site.register(chat_models.Room)
-admin.site.register(chat_models.Message)
\ No newline at end of file
+admin.site.register(chat_models.Message)
+admin.site.register(chat_models.MessageArchive)
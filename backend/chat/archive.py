@@ -0,0 +1,134 @@
+"""
+Archival of old chat history.
+
+Messages older than CHAT_ARCHIVE['AFTER_DAYS'] are moved out of the hot
+``chat_message`` table into per-room MessageArchive segments (zlib-compressed
+JSON lines). ``load_history`` pages across both transparently, newest first,
+so clients never need to know where a message lives. It decompresses
+segments newest first, only until the page is full.
+
+Archiving a segment also adds its messages to the search backend's archive
+index (chat/search.py), so search keeps finding them.
+"""
+import json
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import search
+from .models import Message, MessageArchive, Room
+from .serializers import MessageSerializer
+
+_DEFAULTS = {
+    'AFTER_DAYS': 180,
+    'SEGMENT_SIZE': 500,
+    # Most messages load_history returns when no limit is given
+    'HISTORY_LIMIT': 1000,
+}
+
+
+def conf(name):
+    return getattr(settings, 'CHAT_ARCHIVE', {}).get(name, _DEFAULTS[name])
+
+
+def encode_segment(messages):
+    lines = '\n'.join(json.dumps(m, ensure_ascii=False, separators=(',', ':')) for m in messages)
+    return zlib.compress(lines.encode('utf-8'), 6)
+
+
+def decode_segment(data):
+    return [json.loads(line) for line in zlib.decompress(bytes(data)).decode('utf-8').split('\n')]
+
+
+def archive_room(room_id, cutoff, segment_size=None):
+    """Move one room's messages older than ``cutoff`` into archive segments. Returns count."""
+    segment_size = segment_size or conf('SEGMENT_SIZE')
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Message.objects
+                .filter(room_id=room_id, timestamp__lt=cutoff)
+                .order_by('id')
+                .values(*MessageSerializer.VALUES)[:segment_size]
+            )
+            if not rows:
+                return moved
+            messages = [MessageSerializer.row_to_dict(row) for row in rows]
+            MessageArchive.objects.create(
+                room_id=room_id,
+                first_message_id=rows[0]['id'],
+                last_message_id=rows[-1]['id'],
+                first_timestamp=rows[0]['timestamp'],
+                last_timestamp=rows[-1]['timestamp'],
+                message_count=len(rows),
+                data=encode_segment(messages),
+            )
+            search.get_backend().index_archived(room_id, messages)
+            Message.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+
+
+def archive_messages(older_than_days=None, segment_size=None):
+    """Archive every room's old messages. Returns the number of messages moved."""
+    days = conf('AFTER_DAYS') if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    room_ids = (
+        Message.objects.filter(timestamp__lt=cutoff)
+        .values_list('room_id', flat=True).distinct()
+    )
+    return sum(archive_room(room_id, cutoff, segment_size) for room_id in list(room_ids))
+
+
+def load_archived(ids):
+    """Return {id: serialized message} for the archived messages among ``ids``."""
+    wanted = set(ids)
+    if not wanted:
+        return {}
+    found = {}
+    covering = Q()
+    for pk in wanted:
+        covering |= Q(first_message_id__lte=pk, last_message_id__gte=pk)
+    for segment in MessageArchive.objects.filter(covering).only('data').iterator():
+        for message in decode_segment(segment.data):
+            if message['id'] in wanted:
+                found[message['id']] = message
+        if len(found) == len(wanted):
+            break
+    return found
+
+
+def load_history(room_name, before=None, limit=None):
+    """
+    Return messages for ``room_name`` in ascending order as serialized dicts.
+
+    Only the newest ``limit`` messages with id < ``before`` are returned,
+    filling from archive segments once the hot table runs out. ``limit``
+    defaults to CHAT_ARCHIVE['HISTORY_LIMIT'].
+    """
+    room = Room.objects.filter(name=room_name).only('id').first()
+    if room is None:
+        return []
+
+    hot = Message.objects.filter(room=room).order_by('-id')
+    archives = MessageArchive.objects.filter(room=room)
+    if before is not None:
+        hot = hot.filter(id__lt=before)
+        archives = archives.filter(first_message_id__lt=before)
+
+    page = limit or conf('HISTORY_LIMIT')
+    newest = MessageSerializer.values_data(hot[:page])
+    if len(newest) < page:
+        for segment in archives.order_by('-last_message_id').only('data').iterator():
+            older = decode_segment(segment.data)
+            if before is not None:
+                older = [m for m in older if m['id'] < before]
+            newest.extend(reversed(older[-(page - len(newest)):]))
+            if len(newest) >= page:
+                break
+    newest.reverse()
+    return newest
@@ -1,17 +1,34 @@
+"""
+Chat WebSocket consumer.
+
+Protocol (client → server):
+  {"message": "..."}                      – send a chat message (persisted)
+  {"type": "typing", "is_typing": true}   – typing indicator (not persisted)
+  {"type": "heartbeat"}                   – keep the presence marker alive (every 25s;
+                                            any other frame does too)
+  {"type": "presence"}                    – ask for a presence snapshot of the room
+
+Protocol (server → client):
+  {"message": "...", "sender": "...", "timestamp": "..."}              – chat message
+  {"type": "presence", "user": "...", "status": "...", "last_seen": ...}
+  {"type": "presence_state", "users": [...]}
+  {"type": "typing", "user": "...", "is_typing": true, "ttl": 6}
+  {"type": "order", "order_id": "...", "status": "...", "previous_status": "...", "version": 3, ...}
+"""
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from .models import Room, Message
+from . import presence
 from django.contrib.auth.models import AnonymousUser
-from rest_framework.authtoken.models import Token
+from api.activity import record_message
+from api.authentication import get_user_for_token
+from django.db import transaction
 from urllib.parse import parse_qs
 
 @database_sync_to_async
 def get_user_from_token(token_key):
-    try:
-        return Token.objects.get(key=token_key).user
-    except Token.DoesNotExist:
-        return AnonymousUser()
+    return get_user_for_token(token_key) or AnonymousUser()
 
 class ChatConsumer(AsyncWebsocketConsumer):
 
@@ -22,43 +39,76 @@ class ChatConsumer(AsyncWebsocketConsumer):
         # Internal Authentication from query string
         query_params = parse_qs(self.scope['query_string'].decode())
         token_key = query_params.get('token', [None])[0]
-        
+
         if token_key:
             self.scope['user'] = await get_user_from_token(token_key)
-        
+
         # Ensure user is authenticated
         user = self.scope.get('user', AnonymousUser())
         if user.is_anonymous:
             await self.close()
             return
 
-        # Check if user is a participant of the room
-        is_participant = await self.check_participation(user, self.room_name)
-        if not is_participant:
+        # Check if user is a participant of the room. The participant list is
+        # kept for presence snapshots so they never need another query.
+        self.participants = await self.get_participants(self.room_name)
+        if user.id not in dict(self.participants):
             await self.close()
             return
 
+        self.typing = presence.TypingThrottle()
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
         await self.accept()
 
+        self.presence_slot, came_online = await presence.mark_online(self.room_name, user.id)
+        if came_online:
+            await self.broadcast_presence(user, 'online', None)
+        await self.send_presence_state()
+
     async def disconnect(self, close_code):
         if hasattr(self, 'room_group_name'):
             await self.channel_layer.group_discard(
                 self.room_group_name,
                 self.channel_name
             )
+        if hasattr(self, 'typing'):
+            user = self.scope['user']
+            if self.typing.is_typing:
+                await self.broadcast_typing(user, False)
+            last_seen = await presence.mark_offline(self.room_name, user.id, getattr(self, 'presence_slot', None))
+            if last_seen is not None:
+                # Last connection of this user to the room
+                await self.broadcast_presence(user, 'offline', last_seen)
 
     async def receive(self, text_data):
         data = json.loads(text_data)
+        user = self.scope['user']
+        event_type = data.get('type')
+
+        self.presence_slot, came_online = await presence.keep_online(self.room_name, user.id, self.presence_slot)
+        if came_online:
+            await self.broadcast_presence(user, 'online', None)
+        if event_type == 'heartbeat':
+            return
+        if event_type == 'presence':
+            await self.send_presence_state()
+            return
+        if event_type == 'typing':
+            is_typing = bool(data.get('is_typing'))
+            if self.typing.should_send(is_typing):
+                await self.broadcast_typing(user, is_typing)
+            return
+
         message = data.get('message')
         if not message:
             return
-            
-        user = self.scope['user']
+
         saved = await self.save_message(user, self.room_name, message)
+        # Receivers clear the typing flag on a new message themselves.
+        self.typing.reset()
 
         await self.channel_layer.group_send(
             self.room_group_name,
@@ -70,6 +120,32 @@ class ChatConsumer(AsyncWebsocketConsumer):
             }
         )
 
+    async def broadcast_presence(self, user, status, last_seen):
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'presence_update',
+                'user': user.username,
+                'status': status,
+                'last_seen': last_seen,
+            }
+        )
+
+    async def broadcast_typing(self, user, is_typing):
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'typing_indicator',
+                'user': user.username,
+                'is_typing': is_typing,
+                'sender_channel': self.channel_name,
+            }
+        )
+
+    async def send_presence_state(self):
+        users = await presence.room_presence(self.room_name, self.participants)
+        await self.send(text_data=json.dumps({'type': 'presence_state', 'users': users}))
+
     async def chat_message(self, event):
         await self.send(text_data=json.dumps({
             'message': event['message'],
@@ -77,14 +153,41 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'timestamp': event['timestamp'],
         }))
 
+    async def order_event(self, event):
+        # Status change of an order agreed in this room (api/orders.py)
+        await self.send(text_data=json.dumps({**event, 'type': 'order'}))
+
+    async def presence_update(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'presence',
+            'user': event['user'],
+            'status': event['status'],
+            'last_seen': event['last_seen'],
+        }))
+
+    async def typing_indicator(self, event):
+        # Don't echo a user's own typing back to them.
+        if event['sender_channel'] == self.channel_name:
+            return
+        await self.send(text_data=json.dumps({
+            'type': 'typing',
+            'user': event['user'],
+            'is_typing': event['is_typing'],
+            'ttl': presence.conf('TYPING_TTL'),
+        }))
+
     @database_sync_to_async
     def save_message(self, user, room_name, message):
         room = Room.objects.get(name=room_name)
-        return Message.objects.create(room=room, sender=user, content=message)
+        with transaction.atomic():
+            saved = Message.objects.create(room=room, sender=user, content=message)
+            record_message(saved, [user_id for user_id, _ in self.participants])
+        return saved
 
     @database_sync_to_async
-    def check_participation(self, user, room_name):
-        try:
-            return Room.objects.get(name=room_name).participants.filter(id=user.id).exists()
-        except Room.DoesNotExist:
-            return False
\ No newline at end of file
+    def get_participants(self, room_name):
+        return list(
+            Room.participants.through.objects
+            .filter(room__name=room_name)
+            .values_list('user_id', 'user__username')
+        )
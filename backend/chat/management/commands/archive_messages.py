@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from chat.archive import archive_messages, conf
+
+
+class Command(BaseCommand):
+    help = "Move chat messages older than N days into compressed per-room archive segments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help=f"Archive messages older than this many days (default {conf('AFTER_DAYS')}).")
+        parser.add_argument('--segment-size', type=int, default=None,
+                            help=f"Messages per archive segment (default {conf('SEGMENT_SIZE')}).")
+
+    def handle(self, *args, **options):
+        moved = archive_messages(options['days'], options['segment_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} messages."))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:56
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_pair_keys(apps, schema_editor):
+    Room = apps.get_model('chat', 'Room')
+    Participant = Room.participants.through
+    two_party = Room.objects.annotate(n=Count('participants')).filter(n=2).values_list('id', flat=True)
+    members = {}
+    for room_id, user_id in Participant.objects.filter(room_id__in=two_party).values_list('room_id', 'user_id'):
+        members.setdefault(room_id, []).append(user_id)
+
+    seen = set()
+    rooms = []
+    for room_id, user_ids in sorted(members.items()):
+        low, high = sorted(user_ids)
+        key = f"{low}:{high}"
+        # Older code could create duplicate rooms for a pair; keep the first.
+        if key in seen:
+            continue
+        seen.add(key)
+        rooms.append(Room(id=room_id, pair_key=key))
+    Room.objects.bulk_update(rooms, ['pair_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_message_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='pair_key',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_pair_keys, migrations.RunPython.noop),
+    ]
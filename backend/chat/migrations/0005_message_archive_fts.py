@@ -0,0 +1,50 @@
+import json
+import zlib
+
+from django.db import migrations
+
+# FTS5 index over archived messages (chat/archive.py), which no longer have a
+# chat_message row. archive_room() inserts into it directly. The table stores
+# its own copy of the text plus the room, so search can check membership.
+# SQLite only, like 0002.
+CREATE_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chat_message_archive_fts USING fts5(
+        content,
+        room_id UNINDEXED,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+DROP_SQL = 'DROP TABLE IF EXISTS chat_message_archive_fts'
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    # Segments archived before this index existed.
+    MessageArchive = apps.get_model('chat', 'MessageArchive')
+    with schema_editor.connection.cursor() as cursor:
+        for segment in MessageArchive.objects.only('room_id', 'data').iterator():
+            lines = zlib.decompress(bytes(segment.data)).decode('utf-8').split('\n')
+            cursor.executemany(
+                'INSERT INTO chat_message_archive_fts(rowid, content, room_id) VALUES (%s, %s, %s)',
+                [(message['id'], message['content'], segment.room_id) for message in map(json.loads, lines)],
+            )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0004_messagearchive"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
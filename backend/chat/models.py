@@ -1,7 +1,7 @@
 from django.db import models
 
 # Create your models here.
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -9,11 +9,59 @@ User = get_user_model()
 class Room(models.Model):
     name = models.CharField(max_length=100, unique=True)
     participants = models.ManyToManyField(User, related_name='chat_rooms', blank=True)
+    # "<low user id>:<high user id>" for 1:1 conversations, NULL for anything else.
+    pair_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def pair_key_for(user_a_id, user_b_id):
+        low, high = sorted((user_a_id, user_b_id))
+        return f"{low}:{high}"
+
+    @classmethod
+    def get_or_create_for_pair(cls, user_a_id, user_b_id):
+        """
+        Return (room, created) for the 1:1 conversation between two users.
+        Lookup is a single query on the unique pair_key index; concurrent
+        creators race on that same unique constraint and the loser reads the
+        winner's row. A room created before pair_key existed under the same
+        name is adopted: its pair_key is filled in. Raises ValueError when
+        both ids are the same user.
+        """
+        if user_a_id == user_b_id:
+            raise ValueError("A conversation needs two different users.")
+        key = cls.pair_key_for(user_a_id, user_b_id)
+        room = cls.objects.filter(pair_key=key).first()
+        if room:
+            return room, False
+
+        low, high = sorted((user_a_id, user_b_id))
+        name = f"chat_{low}_{high}"
+        try:
+            with transaction.atomic():
+                room = cls.objects.create(name=name, pair_key=key)
+                room.participants.add(user_a_id, user_b_id)
+        except IntegrityError:
+            # Lost the race, or a legacy room already uses the generated name.
+            room = cls.objects.filter(pair_key=key).first()
+            if room:
+                return room, False
+            try:
+                with transaction.atomic():
+                    room = cls.objects.select_for_update().get(name=name)
+                    if room.pair_key is None:
+                        room.pair_key = key
+                        room.save(update_fields=['pair_key'])
+                        room.participants.add(user_a_id, user_b_id)
+            except IntegrityError:
+                # Another request adopted it first.
+                room = cls.objects.get(pair_key=key)
+            return room, False
+        return room, True
+
 
 class Message(models.Model):
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='messages')
@@ -25,4 +73,28 @@ class Message(models.Model):
         ordering = ['timestamp']
 
     def __str__(self):
-        return f"{self.sender.username}: {self.content[:30]}"
\ No newline at end of file
+        return f"{self.sender.username}: {self.content[:30]}"
+
+class MessageArchive(models.Model):
+    """
+    A compressed, immutable segment of old messages from one room.
+    ``data`` holds zlib-compressed JSON lines, one serialized message per line,
+    in ascending id order (see chat/archive.py).
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='archives')
+    first_message_id = models.BigIntegerField()
+    last_message_id = models.BigIntegerField()
+    first_timestamp = models.DateTimeField()
+    last_timestamp = models.DateTimeField()
+    message_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['room', 'first_message_id']
+        indexes = [
+            models.Index(fields=['room', 'last_message_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.room.name}: {self.first_message_id}-{self.last_message_id}"
@@ -0,0 +1,131 @@
+"""
+Presence and typing state for chat rooms.
+
+Nothing here touches the database. Each open connection of a user to a room
+(one per tab) claims a slot key of its own, with cache.add() so two
+connections never share one. A user is online while any of their slots is
+live, so closing one of two tabs keeps them online. Every slot has a TTL
+that its connection keeps alive through heartbeats, so a connection that
+vanishes without a disconnect (a crashed worker) stops counting once its own
+slot lapses, whatever the other connections do. "Last seen" is written only
+when a user goes offline. CHAT_PRESENCE['CACHE_ALIAS']
+must be shared (Redis) so every ASGI worker sees the same state.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+_DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'ONLINE_TTL': 60,                  # heartbeat must arrive within this window
+    'MAX_CONNECTIONS': 8,              # slots per user and room; more connections go uncounted
+    'LAST_SEEN_TTL': 60 * 60 * 24 * 30,
+    'TYPING_INTERVAL': 2.0,            # min seconds between typing broadcasts per user
+    'TYPING_TTL': 6,                   # clients drop a typing flag after this long
+}
+
+
+def conf(name):
+    return getattr(settings, 'CHAT_PRESENCE', {}).get(name, _DEFAULTS[name])
+
+
+def _cache():
+    return caches[conf('CACHE_ALIAS')]
+
+
+def _slot_keys(room_name, user_id):
+    return [f'chat:online:{room_name}:{user_id}:{slot}' for slot in range(conf('MAX_CONNECTIONS'))]
+
+
+def _last_seen_key(user_id):
+    return f'chat:last_seen:{user_id}'
+
+
+async def _is_online(room_name, user_id):
+    return bool(await _cache().aget_many(_slot_keys(room_name, user_id)))
+
+
+async def _claim_slot(room_name, user_id):
+    """Return the number of a free slot, now held for ONLINE_TTL, or None if all are taken."""
+    for slot, key in enumerate(_slot_keys(room_name, user_id)):
+        if await _cache().aadd(key, 1, conf('ONLINE_TTL')):
+            return slot
+    return None
+
+
+async def mark_online(room_name, user_id):
+    """
+    Count a new connection. Returns (slot, came_online): the slot the
+    connection passes to keep_online() and mark_offline(), and whether the
+    user was offline before.
+    """
+    was_online = await _is_online(room_name, user_id)
+    return await _claim_slot(room_name, user_id), not was_online
+
+
+async def keep_online(room_name, user_id, slot):
+    """
+    Heartbeat: extend the connection's slot. Returns (slot, came_online); a
+    slot that had lapsed is claimed afresh, and came_online is True if no
+    other connection kept the user online meanwhile.
+    """
+    if slot is not None and await _cache().atouch(_slot_keys(room_name, user_id)[slot], conf('ONLINE_TTL')):
+        return slot, False
+    return await mark_online(room_name, user_id)
+
+
+async def mark_offline(room_name, user_id, slot):
+    """
+    Count a closed connection. Returns the last-seen timestamp if that was
+    the user's last live one in the room, else None.
+    """
+    if slot is not None:
+        await _cache().adelete(_slot_keys(room_name, user_id)[slot])
+    if await _is_online(room_name, user_id):
+        return None
+    now = time.time()
+    await _cache().aset(_last_seen_key(user_id), now, conf('LAST_SEEN_TTL'))
+    return now
+
+
+async def room_presence(room_name, users):
+    """
+    Snapshot presence for ``users`` (iterable of (id, username)) in one cache round trip.
+    """
+    users = list(users)
+    slots = {uid: _slot_keys(room_name, uid) for uid, _ in users}
+    keys = [key for uid, _ in users for key in slots[uid]]
+    keys += [_last_seen_key(uid) for uid, _ in users]
+    found = await _cache().aget_many(keys)
+    result = []
+    for uid, username in users:
+        online = any(key in found for key in slots[uid])
+        result.append({
+            'user': username,
+            'status': 'online' if online else 'offline',
+            'last_seen': None if online else found.get(_last_seen_key(uid)),
+        })
+    return result
+
+
+class TypingThrottle:
+    """
+    Per-connection coalescing of typing signals: state changes go out at once,
+    repeated "still typing" pings at most once per TYPING_INTERVAL.
+    """
+
+    def __init__(self):
+        self.is_typing = False
+        self.sent_at = 0.0
+
+    def should_send(self, is_typing):
+        now = time.monotonic()
+        if is_typing == self.is_typing and (not is_typing or now - self.sent_at < conf('TYPING_INTERVAL')):
+            return False
+        self.is_typing = is_typing
+        self.sent_at = now
+        return True
+
+    def reset(self):
+        self.is_typing = False
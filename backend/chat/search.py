@@ -0,0 +1,127 @@
+"""
+Full-text search over chat messages.
+
+On SQLite the index is the ``chat_message_fts`` FTS5 table created in
+migration 0002; triggers on ``chat_message`` keep it in sync on every insert,
+update and delete, so saving a Message is all it takes to index it.
+Messages moved into archive segments (chat/archive.py) are indexed in
+``chat_message_archive_fts`` (migration 0005) when they are archived, and
+searches cover both tables. Other databases fall back to a plain ORM scan,
+which also decompresses the segments, until a dedicated backend is plugged
+in through ``settings.CHAT_SEARCH_BACKEND``.
+"""
+from django.db import connection
+
+from core.search import build_fts5_query, get_search_backend
+from . import archive
+from .models import Message, MessageArchive, Room
+from .serializers import MessageSerializer
+
+FTS_TABLE = 'chat_message_fts'
+ARCHIVE_FTS_TABLE = 'chat_message_archive_fts'
+
+
+class MessageSearchBackend:
+    """Interface: return ranked message ids visible to ``user``."""
+
+    def search(self, user, query, room_name=None, limit=20, offset=0):
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Re-index everything (after restores, bulk loads, etc.)."""
+
+    def index_archived(self, room_id, messages):
+        """Keep ``messages`` (serialized dicts) searchable once archived out of chat_message."""
+
+
+class SQLiteFTSMessageSearch(MessageSearchBackend):
+
+    def search(self, user, query, room_name=None, limit=20, offset=0):
+        match = build_fts5_query(query)
+        if not match:
+            return []
+
+        participants = Room.participants.through._meta.db_table
+        room_join = f'JOIN {Room._meta.db_table} r ON r.id = {{}} AND r.name = %s' if room_name else ''
+        hot = ' '.join([
+            f'SELECT m.id AS id, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE}',
+            f'JOIN {Message._meta.db_table} m ON m.id = {FTS_TABLE}.rowid',
+            f'JOIN {participants} p ON p.room_id = m.room_id AND p.user_id = %s',
+            room_join.format('m.room_id'),
+            f'WHERE {FTS_TABLE} MATCH %s',
+        ])
+        archived = ' '.join([
+            f'SELECT {ARCHIVE_FTS_TABLE}.rowid AS id, bm25({ARCHIVE_FTS_TABLE}) AS rank FROM {ARCHIVE_FTS_TABLE}',
+            f'JOIN {participants} p ON p.room_id = {ARCHIVE_FTS_TABLE}.room_id AND p.user_id = %s',
+            room_join.format(f'{ARCHIVE_FTS_TABLE}.room_id'),
+            f'WHERE {ARCHIVE_FTS_TABLE} MATCH %s',
+        ])
+        params = [user.id] + ([room_name] if room_name else []) + [match]
+        sql = f'SELECT id FROM ({hot} UNION ALL {archived}) ORDER BY rank, id DESC LIMIT %s OFFSET %s'
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params * 2 + [limit, offset])
+            return [row[0] for row in cursor.fetchall()]
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f'DELETE FROM {ARCHIVE_FTS_TABLE}')
+        for segment in MessageArchive.objects.only('room_id', 'data').iterator():
+            self.index_archived(segment.room_id, archive.decode_segment(segment.data))
+
+    def index_archived(self, room_id, messages):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {ARCHIVE_FTS_TABLE}(rowid, content, room_id) VALUES (%s, %s, %s)',
+                [(message['id'], message['content'], room_id) for message in messages],
+            )
+
+
+class ORMMessageSearch(MessageSearchBackend):
+    """Unindexed fallback: substring match, newest first, hot rows then archives."""
+
+    def search(self, user, query, room_name=None, limit=20, offset=0):
+        query = (query or '').strip()
+        if not query:
+            return []
+        queryset = Message.objects.filter(room__participants=user, content__icontains=query)
+        archives = MessageArchive.objects.filter(room__participants=user)
+        if room_name:
+            queryset = queryset.filter(room__name=room_name)
+            archives = archives.filter(room__name=room_name)
+        ids = list(queryset.order_by('-timestamp').values_list('id', flat=True)[offset:offset + limit])
+        if len(ids) == limit:
+            return ids
+
+        # Archived messages are all older than the hot ones: continue there.
+        skip = max(offset - queryset.count(), 0) if not ids else 0
+        needle = query.casefold()
+        for segment in archives.order_by('-last_timestamp').only('data').iterator():
+            for message in reversed(archive.decode_segment(segment.data)):
+                if needle not in message['content'].casefold():
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                ids.append(message['id'])
+                if len(ids) == limit:
+                    return ids
+        return ids
+
+
+def get_backend():
+    return get_search_backend('CHAT_SEARCH_BACKEND', connection, {
+        'sqlite': 'chat.search.SQLiteFTSMessageSearch',
+        '*': 'chat.search.ORMMessageSearch',
+    })
+
+
+def search_messages(user, query, room_name=None, limit=20, offset=0):
+    """Return serialized messages (MessageSerializer), archived ones included, in rank order."""
+    ids = get_backend().search(user, query, room_name=room_name, limit=limit, offset=offset)
+    by_id = {message['id']: message for message in MessageSerializer.values_data(Message.objects.filter(id__in=ids))}
+    missing = [pk for pk in ids if pk not in by_id]
+    if missing:
+        by_id.update(archive.load_archived(missing))
+    return [by_id[pk] for pk in ids if pk in by_id]
@@ -1,36 +1,58 @@
-from rest_framework import serializers
-from .models import Room, Message
-
-class MessageSerializer(serializers.ModelSerializer):
-    sender_username = serializers.CharField(source='sender.username', read_only=True)
-
-    class Meta:
-        model = Message
-        fields = ['id', 'room', 'sender', 'sender_username', 'content', 'timestamp']
-        read_only_fields = ['sender', 'timestamp']
-
-
-class RoomSerializer(serializers.ModelSerializer):
-    participants_usernames = serializers.SerializerMethodField()
-    last_message = serializers.SerializerMethodField()
-    unread_count = serializers.SerializerMethodField()
-
-    class Meta:
-        model = Room
-        fields = ['id', 'name', 'participants', 'participants_usernames', 'last_message', 'unread_count', 'created_at']
-
-    def get_participants_usernames(self, obj):
-        return [user.username for user in obj.participants.all()]
-
-    def get_last_message(self, obj):
-        last_msg = obj.messages.order_by('-timestamp').first()
-        if last_msg:
-            return {
-                'content': last_msg.content,
-                'timestamp': str(last_msg.timestamp),
-                'sender': last_msg.sender.username
-            }
-        return None
-
-    def get_unread_count(self, obj):
-        return 0
\ No newline at end of file
+from rest_framework import serializers
+from .models import Room, Message
+
+_timestamp_field = serializers.DateTimeField()
+
+
+class MessageSerializer(serializers.ModelSerializer):
+    sender_username = serializers.CharField(source='sender.username', read_only=True)
+
+    class Meta:
+        model = Message
+        fields = ['id', 'room', 'sender', 'sender_username', 'content', 'timestamp']
+        read_only_fields = ['sender', 'timestamp']
+
+    # Flat mode: the same output built from .values() rows, without model
+    # instances or per-field serializer dispatch.
+    VALUES = ('id', 'room_id', 'sender_id', 'sender__username', 'content', 'timestamp')
+
+    @staticmethod
+    def row_to_dict(row):
+        return {
+            'id': row['id'],
+            'room': row['room_id'],
+            'sender': row['sender_id'],
+            'sender_username': row['sender__username'],
+            'content': row['content'],
+            'timestamp': _timestamp_field.to_representation(row['timestamp']),
+        }
+
+    @classmethod
+    def values_data(cls, queryset):
+        return [cls.row_to_dict(row) for row in queryset.values(*cls.VALUES)]
+
+
+class RoomSerializer(serializers.ModelSerializer):
+    participants_usernames = serializers.SerializerMethodField()
+    last_message = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Room
+        fields = ['id', 'name', 'participants', 'participants_usernames', 'last_message', 'unread_count', 'created_at']
+
+    def get_participants_usernames(self, obj):
+        return [user.username for user in obj.participants.all()]
+
+    def get_last_message(self, obj):
+        last_msg = obj.messages.order_by('-timestamp').first()
+        if last_msg:
+            return {
+                'content': last_msg.content,
+                'timestamp': str(last_msg.timestamp),
+                'sender': last_msg.sender.username
+            }
+        return None
+
+    def get_unread_count(self, obj):
+        return 0
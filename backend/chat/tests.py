@@ -1,3 +1,147 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import presence
+from .archive import archive_messages, load_history
+from .models import Message, Room
+from .search import SQLiteFTSMessageSearch, search_messages
+
+# The suite runs without Redis: the shared cache is process-local here.
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'presence-tests'},
+}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class PresenceTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['shared'].clear()
+
+    def status(self):
+        return async_to_sync(presence.room_presence)('room', [(1, 'ada')])[0]['status']
+
+    def online(self):
+        return async_to_sync(presence.mark_online)('room', 1)
+
+    def heartbeat(self, slot):
+        return async_to_sync(presence.keep_online)('room', 1, slot)
+
+    def offline(self, slot):
+        return async_to_sync(presence.mark_offline)('room', 1, slot)
+
+    def lapse(self, slot):
+        # What the cache does once ONLINE_TTL passes without a heartbeat.
+        caches['shared'].delete(presence._slot_keys('room', 1)[slot])
+
+    def test_user_stays_online_until_the_last_connection_closes(self):
+        first, came_online = self.online()
+        self.assertTrue(came_online)
+        second, came_online = self.online()  # second tab
+        self.assertFalse(came_online)
+        self.assertNotEqual(first, second)
+        self.assertIsNone(self.offline(first))
+        self.assertEqual(self.status(), 'online')
+        self.assertIsNotNone(self.offline(second))
+        self.assertEqual(self.status(), 'offline')
+
+    def test_lapsed_heartbeat_does_not_forget_other_connections(self):
+        first, _ = self.online()
+        second, _ = self.online()
+        self.lapse(first)
+        first, came_online = self.heartbeat(first)
+        self.assertFalse(came_online)  # the second tab kept the user online
+        self.assertIsNone(self.offline(second))
+        self.assertEqual(self.status(), 'online')
+        self.assertIsNotNone(self.offline(first))
+
+    def test_crashed_connection_stops_counting_once_it_lapses(self):
+        crashed, _ = self.online()
+        alive, _ = self.online()
+        self.lapse(crashed)  # never heartbeats or disconnects again
+        self.assertEqual(self.heartbeat(alive), (alive, False))
+        self.assertIsNotNone(self.offline(alive))
+        self.assertEqual(self.status(), 'offline')
+
+    def test_heartbeat_after_every_slot_lapsed_brings_the_user_back(self):
+        slot, _ = self.online()
+        self.lapse(slot)
+        self.assertEqual(self.status(), 'offline')
+        slot, came_online = self.heartbeat(slot)
+        self.assertTrue(came_online)
+        self.assertEqual(self.heartbeat(slot), (slot, False))
+        self.assertEqual(self.status(), 'online')
+
+
+@override_settings(CACHES=LOCAL_CACHES, CHAT_ARCHIVE={'SEGMENT_SIZE': 2, 'HISTORY_LIMIT': 3})
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='ada')
+        self.room = Room.objects.create(name='room')
+        self.room.participants.add(self.user)
+        for i in range(5):
+            Message.objects.create(room=self.room, sender=self.user, content=f'note {i} archived')
+        Message.objects.create(room=self.room, sender=self.user, content='fresh note')
+        old = Message.objects.exclude(content='fresh note')
+        old.update(timestamp=timezone.now() - timedelta(days=365))
+        self.assertEqual(archive_messages(older_than_days=30), 5)
+
+    def test_archived_messages_stay_searchable(self):
+        for backend in ('chat.search.SQLiteFTSMessageSearch', 'chat.search.ORMMessageSearch'):
+            with self.subTest(backend=backend), self.settings(CHAT_SEARCH_BACKEND=backend):
+                hits = search_messages(self.user, 'archived', limit=10)
+                self.assertEqual(sorted(hit['content'] for hit in hits), [f'note {i} archived' for i in range(5)])
+                self.assertEqual(len(search_messages(self.user, 'note', limit=10)), 6)
+                self.assertEqual(search_messages(User.objects.create_user(username=backend), 'note'), [])
+
+    def test_rebuild_keeps_the_archive_index(self):
+        SQLiteFTSMessageSearch().rebuild()
+        self.assertEqual(len(search_messages(self.user, 'archived', room_name='room', limit=10)), 5)
+        self.assertEqual(search_messages(self.user, 'archived', room_name='other'), [])
+
+    def test_history_without_limit_stops_at_the_cap(self):
+        self.assertEqual(
+            [m['content'] for m in load_history('room')],
+            ['note 3 archived', 'note 4 archived', 'fresh note'],
+        )
+        self.assertEqual([m['content'] for m in load_history('room', limit=10)][:2], ['note 0 archived', 'note 1 archived'])
+
+    def test_history_without_limit_caps_the_hot_rows(self):
+        for i in range(4):
+            Message.objects.create(room=self.room, sender=self.user, content=f'new {i}')
+        self.assertEqual([m['content'] for m in load_history('room')], ['new 1', 'new 2', 'new 3'])
+
+
+class RoomPairTests(TestCase):
+
+    def setUp(self):
+        self.ada = User.objects.create_user(username='ada')
+        self.bob = User.objects.create_user(username='bob')
+
+    def test_legacy_room_with_the_generated_name_is_adopted(self):
+        low, high = sorted((self.ada.pk, self.bob.pk))
+        legacy = Room.objects.create(name=f'chat_{low}_{high}')
+        legacy.participants.add(self.ada, self.bob)
+        room, created = Room.get_or_create_for_pair(self.bob.pk, self.ada.pk)
+        self.assertEqual((room.pk, created), (legacy.pk, False))
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.pair_key, Room.pair_key_for(self.ada.pk, self.bob.pk))
+        self.assertEqual(Room.get_or_create_for_pair(self.ada.pk, self.bob.pk), (legacy, False))
+
+    def test_new_pair_gets_one_room(self):
+        room, created = Room.get_or_create_for_pair(self.ada.pk, self.bob.pk)
+        self.assertTrue(created)
+        self.assertEqual(set(room.participants.values_list('pk', flat=True)), {self.ada.pk, self.bob.pk})
+        self.assertEqual(Room.get_or_create_for_pair(self.bob.pk, self.ada.pk), (room, False))
+
+    def test_a_user_cannot_pair_with_themselves(self):
+        with self.assertRaises(ValueError):
+            Room.get_or_create_for_pair(self.ada.pk, self.ada.pk)
+        self.assertFalse(Room.objects.exists())
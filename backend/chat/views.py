@@ -4,6 +4,8 @@ from django.shortcuts import render
 from rest_framework import viewsets, permissions
 from .models import Room, Message
 from .serializers import RoomSerializer, MessageSerializer
+from .search import search_messages
+from .archive import load_history
 from django.contrib.auth import get_user_model
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -30,25 +32,15 @@ class RoomViewSet(viewsets.ModelViewSet):
         if not provider_id:
             return Response({'error': 'provider_id is required'}, status=400)
         
-        try:
-            # The frontend sends provider_id which is the Provider's uuid.
-            # In our system, the User's username is set to the Provider's uuid.
-            provider = User.objects.get(username=str(provider_id))
-        except (User.DoesNotExist, ValueError):
+        # The frontend sends provider_id which is the Provider's uuid.
+        # In our system, the User's username is set to the Provider's uuid.
+        provider_user_id = User.objects.filter(username=str(provider_id)).values_list('id', flat=True).first()
+        if provider_user_id is None:
             return Response({'error': 'Provider not found'}, status=404)
+        if provider_user_id == request.user.id:
+            return Response({'error': 'You cannot start a conversation with yourself'}, status=400)
 
-        # Find a room where both the requester and the provider are participants
-        # For a 1-on-1 chat, we can search for a room that has exactly these two participants.
-        # However, for simplicity, we'll just find any room that contains both.
-        room = Room.objects.filter(participants=request.user).filter(participants=provider).first()
-
-        if not room:
-            # Create a unique name for the room
-            user_ids = sorted([request.user.id, provider.id])
-            room_name = f"chat_{user_ids[0]}_{user_ids[1]}"
-            room, created = Room.objects.get_or_create(name=room_name)
-            room.participants.add(request.user, provider)
-            room.save()
+        room, _ = Room.get_or_create_for_pair(request.user.id, provider_user_id)
 
         serializer = self.get_serializer(room)
         return Response(serializer.data)
@@ -62,4 +54,53 @@ class MessageViewSet(viewsets.ReadOnlyModelViewSet):
         room_name = self.request.query_params.get('room')
         if room_name:
             return Message.objects.filter(room__name=room_name)
-        return Message.objects.none()
\ No newline at end of file
+        return Message.objects.none()
+
+    def list(self, request, *args, **kwargs):
+        """
+        GET /api/chat/messages/?room=<name>
+        The newest CHAT_ARCHIVE['HISTORY_LIMIT'] messages, archived segments
+        included, oldest first.
+
+        GET /api/chat/messages/?room=<name>&limit=50[&before=<message id>]
+        One page of the newest messages older than ``before``.
+        """
+        room_name = request.query_params.get('room')
+        if not room_name:
+            return Response([])
+        try:
+            before = request.query_params.get('before')
+            before = int(before) if before else None
+            limit = request.query_params.get('limit')
+            limit = min(max(int(limit), 1), 200) if limit else None
+        except ValueError:
+            return Response({'error': 'before and limit must be integers'}, status=400)
+
+        messages = load_history(room_name, before=before, limit=limit)
+        if limit is None:
+            return Response(messages)
+        return Response({
+            'results': messages,
+            'next_before': messages[0]['id'] if len(messages) == limit else None,
+        })
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        GET /api/chat/messages/search/?q=<text>&room=<name>&limit=20&offset=0
+        Ranked full-text hits limited to rooms the user participates in.
+        """
+        query = request.query_params.get('q', '')
+        room_name = request.query_params.get('room')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response({'error': 'limit and offset must be integers'}, status=400)
+
+        # Fetch one extra hit to know whether another page exists.
+        hits = search_messages(request.user, query, room_name=room_name, limit=limit + 1, offset=offset)
+        return Response({
+            'results': hits[:limit],
+            'next_offset': offset + limit if len(hits) > limit else None,
+        })
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Absolute URLs for stored files.
+
+The URL base is worked out once: MEDIA_URLS['BASE_URL'] (e.g. a CDN origin
+mirroring the app's media paths) when set, otherwise the scheme and host of
+the current request. Built URLs are memoised by file name, so a listing pays
+one dict lookup per repeated file and one string concatenation per new one,
+instead of a request.build_absolute_uri() call per file.
+"""
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.encoding import filepath_to_uri
+
+_DEFAULTS = {
+    'BASE_URL': '',
+}
+
+
+def conf(name):
+    return getattr(settings, 'MEDIA_URLS', {}).get(name, _DEFAULTS[name])
+
+
+class MediaURLBuilder:
+
+    def __init__(self, base):
+        self.base = base.rstrip('/')
+        self._memo = {}
+        self._prefixes = {}
+
+    def _prefix(self, storage):
+        """URL prefix for a FileSystemStorage with a root-relative base_url, else None."""
+        if storage not in self._prefixes:
+            prefix = None
+            if isinstance(storage, FileSystemStorage) and storage.base_url.startswith('/'):
+                prefix = self.base + storage.base_url
+            self._prefixes[storage] = prefix
+        return self._prefixes[storage]
+
+    def url(self, name, storage=default_storage):
+        """Absolute URL of the stored file ``name`` (None for an empty name)."""
+        if not name:
+            return None
+        name = str(name)
+        url = self._memo.get(name)
+        if url is None:
+            prefix = self._prefix(storage)
+            if prefix is not None:
+                # What storage.url() returns, minus its urljoin()
+                url = prefix + filepath_to_uri(name).lstrip('/')
+            else:
+                path = storage.url(name)
+                if path.startswith('/'):
+                    url = self.base + path
+                elif '://' in path:
+                    url = path
+                else:
+                    url = urljoin(self.base + '/', path)
+            self._memo[name] = url
+        return url
+
+
+def media_urls(request=None):
+    """
+    Return the MediaURLBuilder for ``request``, created on first use and
+    kept on the request. None when there is neither a configured base URL
+    nor a request to take the host from.
+    """
+    if request is None:
+        base = conf('BASE_URL')
+        return MediaURLBuilder(base) if base else None
+    builder = getattr(request, '_media_url_builder', None)
+    if builder is None:
+        builder = MediaURLBuilder(conf('BASE_URL') or request.build_absolute_uri('/'))
+        request._media_url_builder = builder
+    return builder
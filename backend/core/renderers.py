@@ -0,0 +1,25 @@
+"""
+JSON renderer backed by orjson when it is installed.
+
+orjson serialises dicts, lists, str/int/float, UUID and datetime natively in
+C; anything else (Decimal, lazy translation strings, ...) goes through DRF's
+JSONEncoder.default, so output matches the stock renderer. Without orjson, or
+when the browsable API asks for indented output, the stock renderer is used.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=JSONEncoder().default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,38 @@
+"""
+Small helpers shared by the full-text search backends (chat messages, services).
+"""
+import re
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_fts5_query(text, prefix_last=True):
+    """
+    Turn free user input into a safe FTS5 MATCH expression.
+
+    Every word is quoted so FTS5 operators in the input (AND, NEAR, ``*``,
+    ``:``...) are treated as plain text; words are ANDed together and the last
+    one is matched as a prefix so results update while the user is typing.
+    Returns '' when the input has no searchable words.
+    """
+    tokens = _TOKEN_RE.findall(text or '')
+    if not tokens:
+        return ''
+    parts = [f'"{token}"' for token in tokens]
+    if prefix_last:
+        parts[-1] += '*'
+    return ' '.join(parts)
+
+
+def get_search_backend(setting_name, connection, defaults):
+    """
+    Instantiate the backend named by ``settings.<setting_name>`` or, if unset,
+    the entry of ``defaults`` for the connection vendor (falling back to '*').
+    """
+    path = getattr(settings, setting_name, None)
+    if not path:
+        path = defaults.get(connection.vendor, defaults['*'])
+    return import_string(path)()
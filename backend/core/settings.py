@@ -90,6 +90,20 @@ CHANNEL_LAYERS = {
     },
 }
 
+# 'shared' is seen by every worker process: token cache, chat presence and
+# catalog generation use it (see their settings below). Same Redis as the
+# channel layer, separate database.
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'{REDIS_URL}/1',
+    },
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -155,12 +169,126 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
-    ]
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    # orjson-backed when installed, stock JSON otherwise (core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Token -> user cache used by REST and WebSocket authentication (api/authentication.py).
+# CACHE_ALIAS must be shared between workers, or a deleted token keeps
+# working in the other processes until SHARED_TTL runs out.
+TOKEN_AUTH_CACHE = {
+    'CACHE_ALIAS': 'shared',
+    'LOCAL_TTL': 5,
+    'SHARED_TTL': 300,
 }
 
 FILE_SERVE_ROOTS = {
     "services/media": os.path.join(BASE_DIR, "media"),
     "provider/avatar": os.path.join(BASE_DIR, "avatars"),
     "other/path": os.path.join(BASE_DIR, "other_files"),
-}
\ No newline at end of file
+}
+# Presence / typing indicators for chat (chat/presence.py). Cache-only, no DB
+# writes; CACHE_ALIAS must be shared so all workers see the same presence.
+CHAT_PRESENCE = {
+    'CACHE_ALIAS': 'shared',
+    'ONLINE_TTL': 60,
+    'TYPING_INTERVAL': 2.0,
+    'TYPING_TTL': 6,
+}
+
+# Chat history archival (chat/archive.py, `manage.py archive_messages`).
+CHAT_ARCHIVE = {
+    'AFTER_DAYS': 180,
+    'SEGMENT_SIZE': 500,
+    'HISTORY_LIMIT': 1000,
+}
+
+# Worker threads for in-process background jobs (api/tasks.py).
+BACKGROUND_WORKERS = 2
+
+# Precomputed recommendations (api/recommendations.py, `manage.py refresh_recommendations`).
+RECOMMENDATIONS = {
+    'LIST_SIZE': 30,
+    'POPULAR_SIZE': 100,
+    'MAX_AGE': 60 * 60,
+    'REFRESH_GUARD': 5 * 60,
+    'CACHE_ALIAS': 'shared',
+}
+
+# Tag-similarity related services (api/related.py, `manage.py rebuild_related_services`).
+RELATED_SERVICES = {
+    'TOP_K': 12,
+    'BLOCK_SIZE': 512,
+}
+
+# Pre-rendered discover sections keyed by catalog generation (api/catalog_cache.py).
+# CACHE_ALIAS must be shared, or a write in one worker leaves the others
+# serving the old catalog.
+CATALOG_CACHE = {
+    'CACHE_ALIAS': 'shared',
+    'TIMEOUT': 60 * 60,
+}
+
+# List endpoints (api/pagination.py). Requests without ?limit= still get a
+# plain list for older clients, cut at UNPAGINATED_LIMIT rows, newest first.
+PAGINATION = {
+    'UNPAGINATED_LIMIT': 500,
+}
+
+# Provider bulk import/export (api/bulk.py).
+SERVICE_BULK = {
+    'CHUNK_SIZE': 500,
+    'MAX_ROWS': 20000,
+    'MAX_ERRORS': 100,
+}
+
+# Absolute media URLs (core/media_urls.py). BASE_URL, e.g. a CDN origin that
+# mirrors /media/..., replaces the request's scheme and host when set.
+MEDIA_URLS = {
+    'BASE_URL': '',
+}
+
+# Resized WebP/JPEG variants of listing images (api/images.py).
+IMAGE_VARIANTS = {
+    'SIZES': {'thumb': 160, 'card': 480, 'full': 1280},
+    'WEBP_QUALITY': 80,
+    'JPEG_QUALITY': 82,
+}
+
+# Media serving (core/views.serve_file). MODE 'x-sendfile' or 'x-accel-redirect'
+# hands transfers to the front server; see core/views.py for the other keys.
+FILE_SERVING = {
+    'MODE': 'python',
+    'ACCEL_REDIRECT_PREFIX': '/protected-media/',
+    'CACHE_CONTROL': 'public, max-age=3600',
+    'IMMUTABLE_CACHE_CONTROL': 'public, max-age=31536000, immutable',
+}
+
+# Resumable chunked uploads (api/uploads.py). Purge stale ones with
+# `manage.py purge_uploads`.
+CHUNKED_UPLOADS = {
+    'TEMP_DIR': os.path.join(BASE_DIR, 'tmp_uploads'),
+    'MAX_SIZE': 100 * 1024 * 1024,
+    'MAX_CHUNK_SIZE': 8 * 1024 * 1024,
+    'EXPIRE_AFTER': 24 * 60 * 60,
+}
+
+# Media is content-addressed and deduplicated (api/storage.py). Recount blob
+# references with `manage.py rebuild_blob_refs`.
+STORAGES = {
+    'default': {'BACKEND': 'api.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Activity feeds and customer dashboard counters (api/activity.py).
+ACTIVITY_FEED = {
+    'MAX_ITEMS': 50,
+    'DASHBOARD_ITEMS': 5,
+    'MERGE_MESSAGES_WITHIN': 15 * 60,
+    'ACTIVE_ORDERS_SHOWN': 3,
+}
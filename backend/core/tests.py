@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from .views import serve_file
+
+CONTENT = b'0123456789'
+
+
+class ServeFileTests(SimpleTestCase):
+
+	def setUp(self):
+		root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+		os.makedirs(os.path.join(root, 'files'))
+		path = os.path.join(root, 'files', 'a.txt')
+		with open(path, 'wb') as f:
+			f.write(CONTENT)
+		os.utime(path, (1_700_000_000, 1_700_000_000))
+		settings = override_settings(FILE_SERVE_ROOTS={'files': root}, FILE_SERVING={})
+		settings.enable()
+		self.addCleanup(settings.disable)
+		self.factory = RequestFactory()
+
+	def get(self, filepath='a.txt', method='get', **headers):
+		request = getattr(self.factory, method)('/media/files/' + filepath, headers=headers)
+		response = serve_file(request, 'files', filepath)
+		self.addCleanup(response.close)
+		return response
+
+	def body(self, response):
+		return b''.join(response.streaming_content) if response.streaming else response.content
+
+	def test_full_response_carries_validators(self):
+		response = self.get()
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(self.body(response), CONTENT)
+		self.assertEqual(response['Last-Modified'], http_date(1_700_000_000))
+		self.assertEqual(response['Accept-Ranges'], 'bytes')
+		self.assertTrue(response['ETag'].startswith('"'))
+
+	def test_not_modified(self):
+		etag = self.get()['ETag']
+		for headers in ({'If-None-Match': etag}, {'If-Modified-Since': http_date(1_700_000_000)}):
+			with self.subTest(headers=headers):
+				response = self.get(**headers)
+				self.assertEqual(response.status_code, 304)
+				self.assertEqual(response['ETag'], etag)
+		self.assertEqual(self.get(**{'If-None-Match': '"other"'}).status_code, 200)
+		self.assertEqual(self.get(**{'If-Modified-Since': http_date(1_600_000_000)}).status_code, 200)
+
+	def test_partial_content(self):
+		for header, content_range, body in (
+			('bytes=2-5', 'bytes 2-5/10', b'2345'),
+			('bytes=7-', 'bytes 7-9/10', b'789'),
+			('bytes=-3', 'bytes 7-9/10', b'789'),
+			('bytes=8-100', 'bytes 8-9/10', b'89'),
+		):
+			with self.subTest(range=header):
+				response = self.get(Range=header)
+				self.assertEqual(response.status_code, 206)
+				self.assertEqual(response['Content-Range'], content_range)
+				self.assertEqual(response['Content-Length'], str(len(body)))
+				self.assertEqual(self.body(response), body)
+
+	def test_unsatisfiable_range(self):
+		for header in ('bytes=10-', 'bytes=-0', 'bytes=5-2'):
+			with self.subTest(range=header):
+				response = self.get(Range=header)
+				self.assertEqual(response.status_code, 416)
+				self.assertEqual(response['Content-Range'], 'bytes */10')
+		# Malformed or multi-range headers fall back to the whole file.
+		self.assertEqual(self.get(Range='bytes=0-1,4-5').status_code, 200)
+
+	def test_if_range(self):
+		etag = self.get()['ETag']
+		for if_range, status in (
+			(etag, 206),
+			('"stale"', 200),
+			(http_date(1_700_000_000), 206),
+			(http_date(1_600_000_000), 200),
+		):
+			with self.subTest(if_range=if_range):
+				response = self.get(Range='bytes=2-5', **{'If-Range': if_range})
+				self.assertEqual(response.status_code, status)
+				self.assertEqual(self.body(response), CONTENT if status == 200 else b'2345')
+
+	def test_head_has_no_body(self):
+		response = self.get(method='head')
+		self.assertEqual((response.status_code, response['Content-Length'], response.content), (200, '10', b''))
+
+	def test_front_server_modes(self):
+		with override_settings(FILE_SERVING={'MODE': 'x-accel-redirect'}):
+			response = self.get()
+		self.assertEqual(response['X-Accel-Redirect'], '/protected-media/files/a.txt')
+		with override_settings(FILE_SERVING={'MODE': 'x-sendfile'}):
+			response = self.get()
+		self.assertTrue(response['X-Sendfile'].endswith(os.path.join('files', 'a.txt')))
+		self.assertEqual(response.content, b'')
+
+	def test_missing_and_escaping_paths_are_404(self):
+		for filepath in ('../../etc/passwd', 'missing.txt'):
+			with self.subTest(filepath=filepath):
+				with self.assertRaises(Http404):
+					self.get(filepath)
@@ -1,6 +1,83 @@
-from django.http import FileResponse, Http404
+from django.http import FileResponse, Http404, HttpResponse
+import mimetypes
 import os
+import re
 from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+_FILE_SERVING_DEFAULTS = {
+	# 'python' streams from this process; 'x-sendfile' (Apache/lighttpd) and
+	# 'x-accel-redirect' (nginx) hand the transfer to the front server.
+	'MODE': 'python',
+	# nginx internal location that maps onto the FILE_SERVE_ROOTS directories
+	'ACCEL_REDIRECT_PREFIX': '/protected-media/',
+	'CACHE_CONTROL': 'public, max-age=3600',
+	'IMMUTABLE_CACHE_CONTROL': 'public, max-age=31536000, immutable',
+	'CHUNK_SIZE': 64 * 1024,
+}
+
+# A 16-64 character hex run as the name (or the last dot-separated part before
+# the extension) marks content-addressed files, which never change in place.
+_HASHED_NAME = re.compile(r'(?:^|[._-])[0-9a-f]{16,64}(?:\.[A-Za-z0-9]+)?$')
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _conf(name):
+	return getattr(settings, 'FILE_SERVING', {}).get(name, _FILE_SERVING_DEFAULTS[name])
+
+
+class _RangeFile:
+	"""Read-only view of ``length`` bytes of ``path`` from ``start``, for FileResponse."""
+
+	def __init__(self, path, start, length):
+		self._file = open(path, 'rb')
+		self._file.seek(start)
+		self._remaining = length
+
+	def read(self, size=-1):
+		if size < 0 or size > self._remaining:
+			size = self._remaining
+		data = self._file.read(size)
+		self._remaining -= len(data)
+		return data
+
+	def close(self):
+		self._file.close()
+
+
+def _parse_range(header, size):
+	"""(start, end) inclusive for a single satisfiable range, None to ignore, 'unsatisfiable'."""
+	match = _RANGE.match(header.strip())
+	if not match:
+		# Multiple or malformed ranges: answering with the full body is allowed.
+		return None
+	first, last = match.groups()
+	if not first and not last:
+		return None
+	if not first:
+		# "bytes=-N": the last N bytes
+		length = int(last)
+		if length == 0:
+			return 'unsatisfiable'
+		return max(size - length, 0), size - 1
+	start = int(first)
+	end = min(int(last), size - 1) if last else size - 1
+	if start >= size or end < start:
+		return 'unsatisfiable'
+	return start, end
+
+
+def _range_applies(request, etag, last_modified):
+	"""If-Range: honour Range only while the client's copy is still current."""
+	if_range = request.headers.get('If-Range')
+	if not if_range:
+		return True
+	if if_range.startswith(('"', 'W/')):
+		return if_range == etag
+	date = parse_http_date_safe(if_range)
+	return date is not None and int(last_modified) <= date
+
 
 def serve_file(request, prefix, filepath):
 	base_dir = settings.FILE_SERVE_ROOTS.get(prefix)
@@ -8,13 +85,76 @@ def serve_file(request, prefix, filepath):
 	if not base_dir:
 		raise Http404("Invalid path")
 
+	base_dir = os.path.normpath(base_dir)
 	full_path = os.path.normpath(os.path.join(base_dir, prefix, filepath))
-	
+
 	# 🔒 Security check (VERY important)
-	if not full_path.startswith(base_dir):
+	if not full_path.startswith(base_dir + os.sep):
 		raise Http404("Invalid file path")
 
-	if not os.path.exists(full_path):
+	try:
+		stat = os.stat(full_path)
+	except OSError:
 		raise Http404("File not found")
+	if not os.path.isfile(full_path):
+		raise Http404("File not found")
+
+	size = stat.st_size
+	etag = '"%x-%x"' % (stat.st_mtime_ns, size)
+	last_modified = stat.st_mtime
+	cache_control = (
+		_conf('IMMUTABLE_CACHE_CONTROL') if _HASHED_NAME.search(os.path.basename(full_path))
+		else _conf('CACHE_CONTROL')
+	)
+
+	def finish(response):
+		response['ETag'] = etag
+		response['Last-Modified'] = http_date(last_modified)
+		response['Cache-Control'] = cache_control
+		response['Accept-Ranges'] = 'bytes'
+		return response
+
+	# 304 (If-None-Match / If-Modified-Since) or 412 (If-Match / If-Unmodified-Since)
+	conditional = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+	if conditional is not None:
+		return finish(conditional)
+
+	content_type, encoding = mimetypes.guess_type(full_path)
+	if encoding or not content_type:
+		# Serve .gz/.br files as opaque bytes, never as transparently-decoded content.
+		content_type = 'application/octet-stream'
+
+	mode = _conf('MODE')
+	if mode in ('x-sendfile', 'x-accel-redirect'):
+		# The front server sends the bytes and handles Range itself.
+		response = HttpResponse(content_type=content_type)
+		if mode == 'x-sendfile':
+			response['X-Sendfile'] = full_path
+		else:
+			relative = os.path.relpath(full_path, base_dir).replace(os.sep, '/')
+			response['X-Accel-Redirect'] = _conf('ACCEL_REDIRECT_PREFIX').rstrip('/') + '/' + relative
+		return finish(response)
+
+	byte_range = None
+	range_header = request.headers.get('Range')
+	if range_header and size and _range_applies(request, etag, last_modified):
+		byte_range = _parse_range(range_header, size)
+		if byte_range == 'unsatisfiable':
+			response = HttpResponse(status=416)
+			response['Content-Range'] = 'bytes */%d' % size
+			return finish(response)
+
+	if request.method == 'HEAD':
+		response = HttpResponse(content_type=content_type)
+		response['Content-Length'] = str(size)
+		return finish(response)
 
-	return FileResponse(open(full_path, "rb"))
\ No newline at end of file
+	if byte_range is None:
+		response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+	else:
+		start, end = byte_range
+		response = FileResponse(_RangeFile(full_path, start, end - start + 1), content_type=content_type, status=206)
+		response['Content-Range'] = 'bytes %d-%d/%d' % (start, end, size)
+		response['Content-Length'] = str(end - start + 1)
+	response.block_size = _conf('CHUNK_SIZE')
+	return finish(response)
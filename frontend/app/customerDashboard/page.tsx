@@ -89,6 +89,12 @@ export interface ChatMessage {
     timestamp: string;
 }
 
+export interface ImageVariants {
+    src: string;
+    srcset: string;
+    jpeg_srcset: string;
+}
+
 export interface DiscoverService {
     id: string;
     uuid: string;
@@ -96,10 +102,12 @@ export interface DiscoverService {
     description: string;
     tags: string[];
     images: string[];
+    image_variants?: ImageVariants[];
     price_range: string;
     provider_id: string;
     provider_name: string;
     provider_image?: string;
+    provider_image_variants?: ImageVariants | null;
     location?: string;
     verification_status: string;
 }
@@ -38,7 +38,7 @@ export interface ProviderOrder {
 
 // Interfaces
 interface RecentOrder {
-    id: number;
+    id: string;
     title: string;
     client: string;
     amount: number;
@@ -51,7 +51,7 @@ interface DashboardData {
     trust_badge_detail: string;
     total_earnings: number;
     active_orders: number;
-    provider_rating: number;
+    provider_rating: number | null;
     job_success_rate: number;
     recent_orders: RecentOrder[];
     earnings_statistics: {
@@ -100,7 +100,9 @@ function FeaturedCard({ service, onClick }: { service: DiscoverService; onClick:
         >
             <div className="aspect-[4/3] bg-zinc-100 relative overflow-hidden">
                 <img 
-                    src={service.images?.[0] || `https://ui-avatars.com/api/?name=${service.title}&background=132d1f&color=fff&size=512`} 
+                    src={service.image_variants?.[0]?.src || service.images?.[0] || `https://ui-avatars.com/api/?name=${service.title}&background=132d1f&color=fff&size=512`} 
+                    srcSet={service.image_variants?.[0]?.srcset || undefined}
+                    sizes="(min-width: 1024px) 33vw, 100vw"
                     alt={service.title} 
                     className="w-full h-full object-cover transition-transform group-hover:scale-105 duration-700"
                 />
@@ -127,6 +129,8 @@ function FeaturedCard({ service, onClick }: { service: DiscoverService; onClick:
                         <div className="w-10 h-10 rounded-xl bg-zinc-100 overflow-hidden border-2 border-white shadow-sm ring-1 ring-zinc-100">
                              <img 
                                 src={service.provider_image || `https://ui-avatars.com/api/?name=${service.provider_name}&background=f8fafb&color=132d1f`} 
+                                srcSet={service.provider_image_variants?.srcset || undefined}
+                                sizes="40px"
                                 alt={service.provider_name}
                                 className="w-full h-full object-cover"
                             />
@@ -152,7 +156,9 @@ function TrendingCard({ service, onClick }: { service: DiscoverService; onClick:
         >
             <div className="aspect-square bg-zinc-100 relative overflow-hidden">
                 <img 
-                    src={service.images?.[0] || `https://ui-avatars.com/api/?name=${service.title}&background=132d1f&color=fff&size=512`} 
+                    src={service.image_variants?.[0]?.src || service.images?.[0] || `https://ui-avatars.com/api/?name=${service.title}&background=132d1f&color=fff&size=512`} 
+                    srcSet={service.image_variants?.[0]?.srcset || undefined}
+                    sizes="(min-width: 1024px) 25vw, 50vw"
                     alt={service.title} 
                     className="w-full h-full object-cover grayscale-[0.5] group-hover:grayscale-0 transition-all duration-500"
                 />
@@ -188,7 +194,9 @@ function RecommendedRow({ service, onClick }: { service: DiscoverService; onClic
         >
             <div className="w-20 h-20 rounded-2xl bg-zinc-100 overflow-hidden flex-shrink-0 ring-4 ring-zinc-50">
                 <img 
-                    src={service.images?.[0] || `https://ui-avatars.com/api/?name=${service.title}&background=132d1f&color=fff&size=128`} 
+                    src={service.image_variants?.[0]?.src || service.images?.[0] || `https://ui-avatars.com/api/?name=${service.title}&background=132d1f&color=fff&size=128`} 
+                    srcSet={service.image_variants?.[0]?.srcset || undefined}
+                    sizes="80px"
                     alt={service.title} 
                     className="w-full h-full object-cover grayscale-[0.2] group-hover:grayscale-0 transition-all"
                 />
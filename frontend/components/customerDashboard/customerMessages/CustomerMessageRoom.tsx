@@ -16,6 +16,9 @@ import {
 } from "lucide-react";
 import { CustomerMessage, ChatMessage } from "@/app/customerDashboard/page";
 
+// Within CHAT_PRESENCE['ONLINE_TTL'] (60s) on the server, with room for a missed beat
+const HEARTBEAT_INTERVAL_MS = 25_000;
+
 interface CustomerMessageRoomProps {
     room: CustomerMessage;
     onBack: () => void;
@@ -53,8 +56,14 @@ export default function CustomerMessageRoom({ room, onBack, userName, token }: C
         const ws = new WebSocket(wsUrl);
 
         ws.onopen = () => console.log("WebSocket Connected");
+        // Presence heartbeat (backend chat/presence.py)
+        const heartbeat = setInterval(() => {
+            if (ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify({ type: "heartbeat" }));
+        }, HEARTBEAT_INTERVAL_MS);
         ws.onmessage = (e) => {
             const data = JSON.parse(e.data);
+            // Presence / typing events carry a type; only chat messages are rendered
+            if (data.type) return;
             setMessages((prev) => [...prev, {
                 id: Math.random().toString(), // Temp ID
                 room: room.name,
@@ -66,7 +75,10 @@ export default function CustomerMessageRoom({ room, onBack, userName, token }: C
         ws.onclose = () => console.log("WebSocket Disconnected");
 
         setSocket(ws);
-        return () => ws.close();
+        return () => {
+            clearInterval(heartbeat);
+            ws.close();
+        };
     }, [room.name, token]);
 
     // Scroll to bottom
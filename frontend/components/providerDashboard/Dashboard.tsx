@@ -14,7 +14,7 @@ import {
 } from 'lucide-react';
 
 interface RecentOrder {
-    id: number;
+    id: string;
     title: string;
     client: string;
     amount: number;
@@ -28,7 +28,7 @@ interface DashboardProps {
         trust_badge_detail: string;
         total_earnings: number;
         active_orders: number;
-        provider_rating: number;
+        provider_rating: number | null;
         job_success_rate: number;
         recent_orders: RecentOrder[];
         earnings_statistics: {
@@ -106,7 +106,7 @@ export default function Dashboard({ data }: DashboardProps) {
                 {[
                     { label: "Total Earnings", value: `₹${data.total_earnings.toLocaleString()}`, change: "+12.5%", icon: Wallet, trend: "up" },
                     { label: "Active Orders", value: data.active_orders, change: "8 New", icon: ShoppingBag, color: "blue" },
-                    { label: "Provider Rating", value: data.provider_rating, change: "4.9 Avg", icon: Star, color: "amber" },
+                    { label: "Provider Rating", value: data.provider_rating ?? "—", change: "4.9 Avg", icon: Star, color: "amber" },
                     { label: "Job Success Rate", value: `${data.job_success_rate}%`, change: "Excellent", icon: TrendingUp, color: "emerald" }
                 ].map((stat, idx) => (
                     <div key={idx} className="bg-white p-6 rounded-[2rem] border border-zinc-100 shadow-sm transition-all hover:-translate-y-1 hover:shadow-lg hover:shadow-emerald-500/5 cursor-default group">
@@ -93,6 +93,9 @@ function ProposalCard({ onAccept }: { onAccept: () => void }) {
     );
 }
 
+// Within CHAT_PRESENCE['ONLINE_TTL'] (60s) on the server, with room for a missed beat
+const HEARTBEAT_INTERVAL_MS = 25_000;
+
 interface ProviderMessageRoomProps {
     room: ProviderMessage;
     onBack: () => void;
@@ -164,8 +167,14 @@ export default function ProviderMessageRoom({ room, onBack, userName, token }: P
         const ws = new WebSocket(wsUrl);
 
         ws.onopen = () => console.log("WebSocket Connected");
+        // Presence heartbeat (backend chat/presence.py)
+        const heartbeat = setInterval(() => {
+            if (ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify({ type: "heartbeat" }));
+        }, HEARTBEAT_INTERVAL_MS);
         ws.onmessage = (e) => {
             const data = JSON.parse(e.data);
+            // Presence / typing events carry a type; only chat messages are rendered
+            if (data.type) return;
             setMessages((prev) => [...prev, {
                 id: Math.random().toString(), // Temp ID
                 room: room.name,
@@ -178,6 +187,7 @@ export default function ProviderMessageRoom({ room, onBack, userName, token }: P
 
         socketRef.current = ws;
         return () => {
+            clearInterval(heartbeat);
             socketRef.current = null;
             ws.close();
         };